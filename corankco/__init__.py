@@ -5,6 +5,7 @@ from .ranking import Ranking
 from .element import Element
 from .consensus import Consensus, ConsensusFeature
 from .utils import *
-from .kemeny_score_computation import KemenyComputingFactory, InvalidRankingsForComputingDistance
+from .kemeny_score_computation import KemenyComputingFactory, InvalidRankingsForComputingDistance, \
+    PreparedKemenyComputation
 from .partitioning import OrderedPartition
 from .algorithms import *
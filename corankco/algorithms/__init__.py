@@ -3,7 +3,8 @@ Module that allows to choose a rank aggregation algorithm from an enumeration.
 """
 
 from .algorithm_choice import get_algorithm, Algorithm, AlgorithmEnumeration
-from .pairwisebasedalgorithm import PairwiseBasedAlgorithm
+from .pairwisebasedalgorithm import PairwiseBasedAlgorithm, TiledCostMatrix, PartialPairwiseMatrix, SparseCostMatrix, \
+    PairwiseMatrixCache
 from .rank_aggregation_algorithm import RankAggAlgorithm
 from .exact import ExactAlgorithm
 from .borda import BordaCount
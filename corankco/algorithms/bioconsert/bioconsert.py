@@ -1,14 +1,16 @@
-from typing import Dict, Iterable, List, Set, Tuple
-from numpy import (zeros, array, ndarray, asarray, int32 as np_int32, float64 as np_float64, max as np_max, amin, where,
-                   vstack)
-from numba import jit
+from typing import Dict, Iterable, List, Set
+from numpy import (zeros, ndarray, int32 as np_int32, float64 as np_float64, max as np_max, amin, where,
+                   vstack, ascontiguousarray)
+from numba import jit, prange, get_num_threads
 from corankco.algorithms.rank_aggregation_algorithm import RankAggAlgorithm
 from corankco.dataset import Dataset
 from corankco.scoringscheme import ScoringScheme
 from corankco.consensus import Consensus, ConsensusFeature
 from corankco.ranking import Ranking
 from corankco.element import Element
-from corankco.algorithms.pairwisebasedalgorithm import PairwiseBasedAlgorithm
+from corankco.utils import readonly_signatures
+from corankco.algorithms.pairwisebasedalgorithm import PairwiseBasedAlgorithm, SparseCostMatrix, \
+    _fill_costs_of_element, _run_with_threads
 
 
 @jit("void(float64[:], int32, float64)", nopython=True, cache=True)
@@ -160,33 +162,126 @@ def _add_bucket(r, n, element, old_pos, new_pos, alone_in_old_bucket):
             r[element] = new_pos
 
 
-@jit("int32(int32[:], int32, float64[:], int32, float64[:], float64[:], int32)", nopython=True, cache=True)
-def _compute_delta_costs(ranking, target_element, cost_matrix, bucket_elem, change, add, n):
+@jit(readonly_signatures(["int32(int32[:], int32, float64[:, :], int32, float64[:], float64[:], int32)",
+                          "int32(int32[:], int32, float32[:, :], int32, float64[:], float64[:], int32)",
+                          "int32(int32[:], int32, int32[:, :], int32, float64[:], float64[:], int32)"], 2),
+     nopython=True, cache=True)
+def _compute_delta_costs(ranking, target_element, packed_cost_matrix, bucket_elem, change, add, n):
+    """
+    Computes the variations of cost when the target element is moved in another bucket or alone in a new bucket.
+
+    :param ranking: The current ranking, 1D int32 array of the bucket ids of the elements.
+    :param int target_element: The element to move.
+    :param packed_cost_matrix: The packed cost matrix, see PairwiseBasedAlgorithm.pairwise_cost_matrix_packed.
+    :param int bucket_elem: The bucket ID of the target element.
+    :param change: 1D float64 array, filled with 0., variation in cost if the target element is moved in bucket i.
+    :param add: 1D float64 array, filled with 0., variation in cost if the target element is placed alone in a new
+                bucket at rank i.
+    :param int n: The number of elements.
+    :return: 1 if the target element is alone in its bucket, 0 otherwise
+    """
+    alone: int = 1
+    tied_to_before = 0.
+    tied_to_after = 0.
+    tied_to_tied = 0.
+    # index of the pair (e2, target_element) for e2 < target_element
+    index_before_target = target_element - 1
+    # index of the pair (target_element, e2) for e2 > target_element
+    index_after_target = target_element * (2 * n - target_element - 1) // 2
+
+    for e2 in range(target_element):
+        # the cost of target_element before e2 is the cost of e2 after target_element
+        cost_before = np_float64(packed_cost_matrix[index_before_target, 1])
+        cost_after = np_float64(packed_cost_matrix[index_before_target, 0])
+        cost_tied = np_float64(packed_cost_matrix[index_before_target, 2])
+        index_before_target += n - e2 - 2
+        bucket_e2 = ranking[e2]
+        if bucket_elem < bucket_e2:
+            change[bucket_e2] += cost_tied - cost_before
+            change[bucket_e2 + 1] += cost_after - cost_tied
+            add[bucket_e2 + 1] += cost_after - cost_before
+        elif bucket_elem > bucket_e2:
+            change[bucket_e2] += cost_tied - cost_after
+            if bucket_e2 != 0:
+                change[bucket_e2 - 1] += cost_before - cost_tied
+            add[bucket_e2] += cost_before - cost_after
+        else:
+            alone = 0
+            tied_to_before += cost_before
+            tied_to_after += cost_after
+            tied_to_tied += cost_tied
+
+    for e2 in range(target_element + 1, n):
+        cost_before = np_float64(packed_cost_matrix[index_after_target, 0])
+        cost_after = np_float64(packed_cost_matrix[index_after_target, 1])
+        cost_tied = np_float64(packed_cost_matrix[index_after_target, 2])
+        index_after_target += 1
+        bucket_e2 = ranking[e2]
+        if bucket_elem < bucket_e2:
+            change[bucket_e2] += cost_tied - cost_before
+            change[bucket_e2 + 1] += cost_after - cost_tied
+            add[bucket_e2 + 1] += cost_after - cost_before
+        elif bucket_elem > bucket_e2:
+            change[bucket_e2] += cost_tied - cost_after
+            if bucket_e2 != 0:
+                change[bucket_e2 - 1] += cost_before - cost_tied
+            add[bucket_e2] += cost_before - cost_after
+        else:
+            alone = 0
+            tied_to_before += cost_before
+            tied_to_after += cost_after
+            tied_to_tied += cost_tied
+
+    if bucket_elem != 0:
+        change[bucket_elem - 1] += tied_to_before - tied_to_tied
+    change[bucket_elem + 1] += tied_to_after - tied_to_tied
+    add[bucket_elem + 1] += tied_to_after - tied_to_tied
+    add[bucket_elem] += tied_to_before - tied_to_tied
+    return alone
+
+
+@jit("int32(int32[:], int32, float64[:, :], int32, float64[:], float64[:], int32)", nopython=True, cache=True)
+def _compute_delta_costs_of_row(ranking, target_element, costs, bucket_elem, change, add, n):
+    """
+    Computes the variations of cost when the target element is moved in another bucket or alone in a new bucket, as
+    _compute_delta_costs, from the costs of the pairs (target_element, e2) for all e2.
+
+    :param ranking: The current ranking, 1D int32 array of the bucket ids of the elements.
+    :param int target_element: The element to move.
+    :param costs: The (n, 3) array, costs[e2] = cost to have target_element before, after, tied with e2.
+    :param int bucket_elem: The bucket ID of the target element.
+    :param change: 1D float64 array, filled with 0., variation in cost if the target element is moved in bucket i.
+    :param add: 1D float64 array, filled with 0., variation in cost if the target element is placed alone in a new
+                bucket at rank i.
+    :param int n: The number of elements.
+    :return: 1 if the target element is alone in its bucket, 0 otherwise
+    """
     alone: int = 1
-    pos = 3 * n * target_element
     tied_to_before = 0.
     tied_to_after = 0.
     tied_to_tied = 0.
 
     for e2 in range(n):
+        if e2 == target_element:
+            continue
+        cost_before = costs[e2, 0]
+        cost_after = costs[e2, 1]
+        cost_tied = costs[e2, 2]
         bucket_e2 = ranking[e2]
         if bucket_elem < bucket_e2:
-            change[bucket_e2] += cost_matrix[pos + 2] - cost_matrix[pos]
-            change[bucket_e2 + 1] += cost_matrix[pos + 1] - cost_matrix[pos + 2]
-            add[bucket_e2 + 1] += cost_matrix[pos + 1] - cost_matrix[pos]
+            change[bucket_e2] += cost_tied - cost_before
+            change[bucket_e2 + 1] += cost_after - cost_tied
+            add[bucket_e2 + 1] += cost_after - cost_before
         elif bucket_elem > bucket_e2:
-            change[bucket_e2] += cost_matrix[pos + 2] - cost_matrix[pos + 1]
+            change[bucket_e2] += cost_tied - cost_after
             if bucket_e2 != 0:
-                change[bucket_e2 - 1] += cost_matrix[pos] - cost_matrix[pos + 2]
-            add[bucket_e2] += cost_matrix[pos] - cost_matrix[pos + 1]
+                change[bucket_e2 - 1] += cost_before - cost_tied
+            add[bucket_e2] += cost_before - cost_after
         else:
-            if target_element != e2:
-                if alone == 1:
-                    alone = 0
-                tied_to_before += cost_matrix[pos]
-                tied_to_after += cost_matrix[pos + 1]
-                tied_to_tied += cost_matrix[pos + 2]
-        pos += 3
+            alone = 0
+            tied_to_before += cost_before
+            tied_to_after += cost_after
+            tied_to_tied += cost_tied
 
     if bucket_elem != 0:
         change[bucket_elem - 1] += tied_to_before - tied_to_tied
@@ -196,8 +291,9 @@ def _compute_delta_costs(ranking, target_element, cost_matrix, bucket_elem, chan
     return alone
 
 
-@jit("float64(int32[:], float64[:], int32)", nopython=True, cache=True)
-def _improve_one_ranking(r: ndarray, cost_matrix_1d, n):
+@jit(readonly_signatures(["float64(int32[:], float64[:, :], int32)", "float64(int32[:], float32[:, :], int32)",
+                          "float64(int32[:], int32[:, :], int32)"], 1), nopython=True, cache=True)
+def _improve_one_ranking(r: ndarray, packed_cost_matrix, n):
     max_id_bucket = np_max(r)
     delta_dist = 0.0
     change = zeros(n + 2, dtype=np_float64)
@@ -214,8 +310,91 @@ def _improve_one_ranking(r: ndarray, cost_matrix_1d, n):
             change.fill(0.0)
             add.fill(0.0)
 
-            alone = _compute_delta_costs(r, elem, cost_matrix_1d, bucket_elem, change, add, n)
+            alone = _compute_delta_costs(r, elem, packed_cost_matrix, bucket_elem, change, add, n)
+
+            to = _search_to_change_bucket(bucket_elem, change, max_id_bucket)
+
+            if to >= 0:
+                terminated = 0
+                delta_dist += change[to]
+                _change_bucket(r, n, elem, bucket_elem, to, alone)
+                if alone == 1:
+                    max_id_bucket -= 1
+            else:
+                to = _search_to_add_bucket(bucket_elem, add, max_id_bucket)
+                if to >= 0:
+                    terminated = 0
+                    delta_dist += add[to]
+                    _add_bucket(r, n, elem, bucket_elem, to, alone)
+                    if alone != 1:
+                        max_id_bucket += 1
+    return delta_dist
+
+
+@jit(readonly_signatures(["void(int32[:, :], float64[:, :], int32, float64[:])",
+                          "void(int32[:, :], float32[:, :], int32, float64[:])",
+                          "void(int32[:, :], int32[:, :], int32, float64[:])"], 1),
+     nopython=True, parallel=True, cache=True)
+def _bio_consert_packed(departure_rankings, packed_cost_matrix, n, dst_min):
+    """
+    The main function of BioConsert algorithm. The departure rankings are independent local searches on the same
+    read-only cost matrix: they are improved in parallel, each one with its own scratch arrays, and the result of the
+    i-th departure ranking is always stored at index i whatever the number of threads.
+
+    :param departure_rankings: The (nb_rankings_departure, n) departure rankings to consider, improved in place
+    :param packed_cost_matrix: The packed cost matrix, containing for each pair x < y of elements the cost to have
+    x before, after or tied with y, see PairwiseBasedAlgorithm.pairwise_cost_matrix_packed
+    :param n: The number of elements
+    :param dst_min: a nb_rankings_departure array, to fill with the score of the result rankings
+    :return: None
+    """
+    for i in prange(departure_rankings.shape[0]):
+        r = departure_rankings[i]
+        dst_init = 0.
+        # the pairs id_elem1 < id_elem2 are stored in lexicographic order
+        index = 0
+        for id_elem1 in range(n - 1):
+            for id_elem2 in range(id_elem1 + 1, n):
+                if r[id_elem1] < r[id_elem2]:
+                    dst_init += packed_cost_matrix[index, 0]
+                elif r[id_elem1] > r[id_elem2]:
+                    dst_init += packed_cost_matrix[index, 1]
+                else:
+                    dst_init += packed_cost_matrix[index, 2]
+                index += 1
+        dst_min[i] = dst_init + _improve_one_ranking(r, packed_cost_matrix, n)
+
+
+@jit("float64(int32[:], float64, float64[:], float64[:, :], int64[:], int64[:], float64[:, :], int32)", nopython=True,
+     cache=True)
+def _improve_one_ranking_sparse(r, total_weight, ranked_weights, costs_of_situations, row_offsets, columns,
+                                corrections, n):
+    """
+    Local search of _improve_one_ranking on a sparse cost matrix, see SparseCostMatrix: the costs of the pairs of the
+    element to move are computed from the sparse matrix when needed, only O(n) memory is used besides the matrix.
+
+    :return: the variation of the score of r
+    """
+    max_id_bucket = np_max(r)
+    delta_dist = 0.0
+    change = zeros(n + 2, dtype=np_float64)
+    add = zeros(n + 3, dtype=np_float64)
+    costs = zeros((n, 3), dtype=np_float64)
+
+    terminated = 0
+    alone: int
+
+    while terminated == 0:
+        terminated = 1
+        for elem in range(n):
+            bucket_elem = r[elem]
+
+            change.fill(0.0)
+            add.fill(0.0)
 
+            _fill_costs_of_element(costs, elem, total_weight, ranked_weights, costs_of_situations, row_offsets,
+                                   columns, corrections)
+            alone = _compute_delta_costs_of_row(r, elem, costs, bucket_elem, change, add, n)
             to = _search_to_change_bucket(bucket_elem, change, max_id_bucket)
 
             if to >= 0:
@@ -235,8 +414,55 @@ def _improve_one_ranking(r: ndarray, cost_matrix_1d, n):
     return delta_dist
 
 
+@jit("void(int32[:, :], float64, float64[:], float64[:, :], int64[:], int64[:], float64[:, :], int32, float64[:])",
+     nopython=True, parallel=True, cache=True)
+def _bio_consert_sparse(departure_rankings, total_weight, ranked_weights, costs_of_situations, row_offsets, columns,
+                        corrections, n, dst_min):
+    """
+    BioConsert on a sparse cost matrix, see _bio_consert_packed and SparseCostMatrix.
+
+    :param departure_rankings: The (nb_rankings_departure, n) departure rankings to consider, improved in place
+    :param n: The number of elements
+    :param dst_min: a nb_rankings_departure array, to fill with the score of the result rankings
+    :return: None
+    """
+    for i in prange(departure_rankings.shape[0]):
+        r = departure_rankings[i]
+        costs = zeros((n, 3), dtype=np_float64)
+        dst_init = 0.
+        for id_elem1 in range(n - 1):
+            _fill_costs_of_element(costs, id_elem1, total_weight, ranked_weights, costs_of_situations, row_offsets,
+                                   columns, corrections)
+            for id_elem2 in range(id_elem1 + 1, n):
+                if r[id_elem1] < r[id_elem2]:
+                    dst_init += costs[id_elem2, 0]
+                elif r[id_elem1] > r[id_elem2]:
+                    dst_init += costs[id_elem2, 1]
+                else:
+                    dst_init += costs[id_elem2, 2]
+
+        dst_min[i] = dst_init + _improve_one_ranking_sparse(r, total_weight, ranked_weights, costs_of_situations,
+                                                            row_offsets, columns, corrections, n)
+
+
 class BioConsert(RankAggAlgorithm, PairwiseBasedAlgorithm):
-    def __init__(self, starting_algorithms=None):
+    def __init__(self, starting_algorithms=None, cost_matrix_dtype: type = np_float64, sparse: bool = False,
+                 nb_threads: int = None):
+        """
+        :param starting_algorithms: the algorithms whose consensus are the departure rankings of the local search. If
+        None, the departure rankings are the distinct input rankings (unified) and the ranking where all the elements
+        are tied
+        :param cost_matrix_dtype: the type of the packed cost matrix, float64, float32 (half the memory) or int32 (only
+        when the costs are integers), see PairwiseBasedAlgorithm.pairwise_cost_matrix_packed
+        :param sparse: if True, the cost matrix is a SparseCostMatrix, for datasets of short rankings over many
+        elements: the memory is O(nb_elements + sum of k_i²), k_i being the number of elements of the i-th ranking,
+        instead of O(nb_elements²). cost_matrix_dtype is then ignored
+        :param nb_threads: the maximal number of threads used to improve the departure rankings in parallel, the number
+        of threads of numba by default. The result does not depend on the number of threads
+        """
+        self._cost_matrix_dtype = cost_matrix_dtype
+        self._sparse: bool = sparse
+        self._nb_threads: int = nb_threads
         is_valid = True
         if isinstance(starting_algorithms, Iterable):
             for obj in starting_algorithms:
@@ -281,17 +507,24 @@ class BioConsert(RankAggAlgorithm, PairwiseBasedAlgorithm):
         id_elements: Dict[int, Element] = dataset.mapping_id_elem
         nb_elements: int = dataset.nb_elements
 
-        departure = self._departure_rankings(dataset, scoring_scheme)
+        # the departure rankings are improved in place
+        departure: ndarray = ascontiguousarray(self._departure_rankings(dataset, scoring_scheme))
         dst_res = zeros(len(departure), dtype=np_float64)
-        departure_c: ndarray = array(departure.flatten(), dtype=np_int32)
-
-        pairwise_cost_matrix = self.pairwise_cost_matrix(dataset.get_positions(), scoring_scheme)
-
-        matrix_1d = pairwise_cost_matrix.flatten()
-
-        self._bio_consert(departure_c, matrix_1d, nb_elements, len(departure), dst_res)
+        nb_threads: int = self._nb_threads if self._nb_threads is not None else get_num_threads()
+
+        if self._sparse:
+            sparse_matrix: SparseCostMatrix = SparseCostMatrix.compute(dataset.get_compact_positions(), scoring_scheme,
+                                                                       dataset.weights)
+            _run_with_threads(nb_threads, _bio_consert_sparse, departure, sparse_matrix.total_weight,
+                              sparse_matrix.ranked_weights, sparse_matrix.costs_of_situations,
+                              sparse_matrix.row_offsets, sparse_matrix.columns, sparse_matrix.corrections, nb_elements,
+                              dst_res)
+        else:
+            # only the pairs i < j are stored, and the local search reads the packed matrix directly
+            pairwise_cost_matrix = self.pairwise_cost_matrix_packed(dataset.get_compact_positions(), scoring_scheme,
+                                                                    dataset.weights, self._cost_matrix_dtype)
 
-        departure = departure_c.reshape(-1, nb_elements)
+            _run_with_threads(nb_threads, _bio_consert_packed, departure, pairwise_cost_matrix, nb_elements, dst_res)
         # at the end, all the computed rankings do not necessarily have the same score.
         # now we retain only the rankings with minimal score
         ranking_dict: Dict[int, Set[Element]] = {}
@@ -352,48 +585,6 @@ class BioConsert(RankAggAlgorithm, PairwiseBasedAlgorithm):
                               }
                          )
 
-    @staticmethod
-    @jit("void(int32[:], float64[:], int32, int32, float64[:])", nopython=True, cache=False)
-    def _bio_consert(departure_rankings, cost_matrix_1d, n, nb_rankings_departure, dst_min):
-        """
-
-        The main function of BioConsert algorithm.
-        :param departure_rankings: The departure rankings to consider
-        :param cost_matrix_1d: The cost matrix with nb_elements * nb_elements * 3 elements
-        containing the cost for each pair x,y of elements to have x before, after or tied with y.
-        Note that the matrix is flattened, 1D
-        :param n: The number of elements
-        :param nb_rankings_departure: The number of rankings to improve
-        :param dst_min: a nb_rankings_departure array, initially fill with 0., to fill the scorfe of the result
-        rankings
-        :return:
-        """
-        r = zeros(n, dtype=np_int32)
-        cpt = 0
-
-        for i in range(nb_rankings_departure):
-            cpt2 = cpt
-            for j in range(n):
-                r[j] = departure_rankings[cpt2]
-                cpt2 += 1
-            dst_init = 0.
-            for id_elem1 in range(n-1):
-                cpt1 = id_elem1 * n * 3
-                for id_elem2 in range(id_elem1+1, n):
-                    if r[id_elem1] < r[id_elem2]:
-                        dst_init += cost_matrix_1d[cpt1 + id_elem2 * 3]
-                    elif r[id_elem1] < r[id_elem2]:
-                        dst_init += cost_matrix_1d[cpt1 + id_elem2 * 3 + 1]
-                    else:
-                        dst_init += cost_matrix_1d[cpt1 + id_elem2 * 3 + 2]
-
-            dst_min[i] = dst_init + _improve_one_ranking(r, cost_matrix_1d, n)
-            cpt2 = cpt
-            for j in range(n):
-                departure_rankings[cpt2] = r[j]
-                cpt2 += 1
-            cpt += n
-
     def _departure_rankings(self, dataset: Dataset, scoring_scheme: ScoringScheme, unify: bool = True,
                             all_tied_as_well: bool = True) -> ndarray:
         """
@@ -402,7 +593,7 @@ class BioConsert(RankAggAlgorithm, PairwiseBasedAlgorithm):
         :param scoring_scheme: the scoring scheme to consider
         :param unify: should the rankings be unified
         :param all_tied_as_well: should the ranking with all elements tied should be considered
-        :return: a 2D ndarray with nb_elements columns, res[i][j] = bucket id of element j in departure ranking i
+        :return: a 2D int32 ndarray with nb_elements columns, res[i][j] = bucket id of element j in departure ranking i
         """
 
         if unify and not dataset.is_complete:
@@ -428,22 +619,15 @@ class BioConsert(RankAggAlgorithm, PairwiseBasedAlgorithm):
             # get for each departure ranking the initial value of kemeny score with the input Dataset
             bucket_ids: ndarray = dataset_to_consider.get_bucket_ids().transpose()
 
-            # to be sure that all the departure rankings are different, use a dct
-            distinct_rankings: Set[Tuple[int, ...]] = set()
-            distinct_rankings_ids: List[int] = []
-
-            # select only distinct input rankings as starters for BioConsert
-            for id_ranking, ranking in enumerate(dataset_to_consider.rankings):
-                ranking_tuple = tuple(bucket_ids[id_ranking])
-                if ranking_tuple not in distinct_rankings:
-                    distinct_rankings.add(ranking_tuple)
-                    distinct_rankings_ids.append(id_ranking)
-                    # the initial kemeny score is computed for the target ranking
+            # select only distinct input rankings as starters for BioConsert, to be sure that all the departure
+            # rankings are different
+            distinct_rankings_ids, _ = dataset_to_consider.distinct_rankings()
 
-            rankings_departure = bucket_ids[asarray(distinct_rankings_ids)]
+            rankings_departure = bucket_ids[distinct_rankings_ids]
             if all_tied_as_well:
                 # add ranking with all elements at position 0
-                rankings_departure = vstack((rankings_departure, zeros((1, dataset_to_consider.nb_elements))))
+                rankings_departure = vstack((rankings_departure,
+                                             zeros((1, dataset_to_consider.nb_elements), dtype=np_int32)))
             return rankings_departure
 
     def get_full_name(self) -> str:
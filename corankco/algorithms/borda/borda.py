@@ -2,8 +2,8 @@
 Module for Borda algorithm. More details in Borda docstring class.
 """
 
-from typing import Dict, List, Tuple, Set
-from itertools import groupby
+from typing import List, Set
+from numpy import ndarray, where, ones_like, count_nonzero, argsort, flatnonzero, max as npmax
 from corankco.algorithms.rank_aggregation_algorithm import RankAggAlgorithm, ScoringSchemeNotHandledException
 from corankco.dataset import Dataset
 from corankco.scoringscheme import ScoringScheme
@@ -65,39 +65,37 @@ class BordaCount(RankAggAlgorithm):
         if not dataset.is_complete and not self.is_scoring_scheme_relevant_when_incomplete_rankings(scoring_scheme):
             raise ScoringSchemeNotHandledException
 
+        # score of each element in each ranking: its bucket id or its position, -1 if non-ranked
+        scores: ndarray = dataset.get_bucket_ids() if self._use_bucket_id_not_bucket_size else dataset.get_positions()
+        is_ranked: ndarray = scores >= 0
+
         if scoring_scheme.is_equivalent_to(ScoringScheme.get_unifying_scoring_scheme()) or \
                 scoring_scheme.is_equivalent_to(ScoringScheme.get_unifying_scoring_scheme_p(0.5)):
-            rankings_to_use = dataset.unified_rankings()
+            # non-ranked elements are considered as in a unifying bucket after the last bucket of the ranking
+            if self._use_bucket_id_not_bucket_size:
+                score_unifying_bucket: ndarray = npmax(scores, axis=0) + 1
+            else:
+                score_unifying_bucket = count_nonzero(is_ranked, axis=0)
+            scores = where(is_ranked, scores, score_unifying_bucket)
+            is_ranked = ones_like(is_ranked)
         else:
-            rankings_to_use = dataset.rankings
-
-        # for a given element e, points[e][0] = number of points of e with borda count and points[e][1] =
-        # number of rankings such that e is ranked
-
-        # computing scores for each element in a Dict
-        points: Dict[Element, List[int]] = {}
-        for ranking in rankings_to_use:
-            id_bucket: int = 0
-            for bucket in ranking:
-                for elem in bucket:
-                    if elem not in points:
-                        points[elem]: List[int] = [0, 0]
-                    points[elem][0] += id_bucket
-                    points[elem][1] += 1
-                if self._use_bucket_id_not_bucket_size:
-                    id_bucket += 1
-                else:
-                    id_bucket += len(bucket)
-
-        elements_scores: List[Tuple[Element, float]] = \
-            [(elem, scores[0] * 1.0 / scores[1]) for elem, scores in points.items()]
+            scores = where(is_ranked, scores, 0)
+
+        # for a given element e, points[e] = number of points of e with borda count and nb_rankings[e] =
+        # number of rankings such that e is ranked. Each ranking counts as many times as its weight
+        weights: ndarray = dataset.weights
+        points: ndarray = scores @ weights
+        nb_rankings: ndarray = is_ranked @ weights
+        mean_scores: ndarray = points / nb_rankings
+
         # now, sort the elements by increasing order of score
-        sorted_elements_scores_by_score = sorted(elements_scores, key=lambda col: col[1])
+        sorted_ids: ndarray = argsort(mean_scores, kind="stable")
+        sorted_scores: ndarray = mean_scores[sorted_ids]
 
-        # construct the consensus bucket by bucket
-        consensus_list: List[Set[Element]] = []
-        for _, group in groupby(sorted_elements_scores_by_score, lambda x: x[1]):
-            consensus_list.append({elem for elem, _ in group})
+        # construct the consensus bucket by bucket, a new bucket starts each time the score changes
+        elements: List[Element] = [dataset.mapping_id_elem[id_elem] for id_elem in sorted_ids.tolist()]
+        offsets: List[int] = [0] + (flatnonzero(sorted_scores[1:] != sorted_scores[:-1]) + 1).tolist() + [len(elements)]
+        consensus_list: List[Set[Element]] = [set(elements[offsets[i]:offsets[i + 1]]) for i in range(len(offsets) - 1)]
 
         return Consensus(consensus_rankings=[Ranking(consensus_list)],
                          dataset=dataset,
@@ -2,18 +2,116 @@
 Module for Copeland algorithm. More details in CopelandMethod docstring class.
 """
 
-from typing import List, Dict, Set
-from numpy import ndarray, zeros, argsort
+from typing import List, Dict, Set, Tuple, Union
+from numpy import ndarray, zeros, argsort, sort, searchsorted, unique
+from numba import jit
 from corankco.algorithms.rank_aggregation_algorithm import RankAggAlgorithm
-from corankco.algorithms.pairwisebasedalgorithm import PairwiseBasedAlgorithm
+from corankco.algorithms.pairwisebasedalgorithm import PairwiseBasedAlgorithm, TiledCostMatrix, SparseCostMatrix
 from corankco.dataset import Dataset
 from corankco.ranking import Ranking
 from corankco.consensus import Consensus
 from corankco.scoringscheme import ScoringScheme
+from corankco.kemeny_score_computation import KemenyComputingFactory
+from corankco.utils import readonly_signatures
 from corankco.consensus import ConsensusFeature
 from corankco.element import Element
 
 
+@jit(readonly_signatures(["void(float64[:, :], int64, int64, int64, float64[:], float64[:, :])",
+                          "void(float32[:, :], int64, int64, int64, float64[:], float64[:, :])",
+                          "void(int32[:, :], int64, int64, int64, float64[:], float64[:, :])"], 0),
+     nopython=True, cache=True)
+def _copeland_scores(packed_cost_matrix, first_elem1, first_elem2, nb_elements, scores, results):
+    """
+    Computes the Copeland scores and the victories, equalities and defeats of the elements, or adds the ones of the
+    pairs of a tile of the packed cost matrix.
+
+    :param packed_cost_matrix: The packed cost matrix, see PairwiseBasedAlgorithm.pairwise_cost_matrix_packed, or a tile
+                               of it, see TiledCostMatrix
+    :param first_elem1: The first element of the first pair of packed_cost_matrix, 0 for a whole matrix
+    :param first_elem2: The second element of the first pair of packed_cost_matrix, 1 for a whole matrix
+    :param nb_elements: The number of elements
+    :param scores: The 1D array to fill, scores[i] = Copeland score of element with ID = i
+    :param results: The (nb_elements, 3) array to fill, results[i] = number of victories, equalities, defeats of element
+                    with ID = i
+    :return: None
+    """
+    # the pairs (el1, el2) with el1 < el2 are stored in lexicographic order
+    el1 = first_elem1
+    el2 = first_elem2
+    for index in range(packed_cost_matrix.shape[0]):
+        put_before = packed_cost_matrix[index][0]
+        put_after = packed_cost_matrix[index][1]
+        if put_before < put_after:
+            scores[el1] += 1
+            results[el1, 0] += 1
+            results[el2, 2] += 1
+        elif put_after < put_before:
+            scores[el2] += 1
+            results[el1, 2] += 1
+            results[el2, 0] += 1
+        else:
+            scores[el1] += 0.5
+            scores[el2] += 0.5
+            results[el1, 1] += 1
+            results[el2, 1] += 1
+        el2 += 1
+        if el2 == nb_elements:
+            el1 += 1
+            el2 = el1 + 1
+
+
+@jit("void(int64, int64, float64, float64, float64[:], float64[:, :])", nopython=True, cache=True)
+def _add_copeland_outcome(el1, el2, before_minus_after, sign, scores, results):
+    """
+    Adds (sign = 1) or removes (sign = -1) the outcome of the duel between el1 and el2 in the Copeland scores.
+
+    :param before_minus_after: The cost to have el1 before el2 minus the cost to have el1 after el2
+    :return: None
+    """
+    if before_minus_after < 0:
+        scores[el1] += sign
+        results[el1, 0] += sign
+        results[el2, 2] += sign
+    elif before_minus_after > 0:
+        scores[el2] += sign
+        results[el1, 2] += sign
+        results[el2, 0] += sign
+    else:
+        scores[el1] += 0.5 * sign
+        scores[el2] += 0.5 * sign
+        results[el1, 1] += sign
+        results[el2, 1] += sign
+
+
+@jit("void(float64[:], float64, int64[:], int64[:], float64[:, :], float64[:], float64[:, :])", nopython=True,
+     cache=True)
+def _correct_copeland_scores_of_co_ranked_pairs(ranked_weights, gap, row_offsets, columns, corrections, scores,
+                                                results):
+    """
+    Replaces, for each pair of elements ranked together in at least one ranking, the outcome of their duel computed
+    from their ranked weights only by the actual outcome, see CopelandMethod._fill_dicts_copeland.
+
+    :param ranked_weights: ranked_weights[x] = sum of the weights of the rankings where x is ranked
+    :param gap: B[3] - B[4], see SparseCostMatrix
+    :param row_offsets: The row offsets of the corrections of the sparse cost matrix
+    :param columns: The columns of the corrections of the sparse cost matrix
+    :param corrections: The corrections of the sparse cost matrix
+    :param scores: The Copeland scores to correct
+    :param results: The victories, equalities and defeats to correct
+    :return: None
+    """
+    for el1 in range(ranked_weights.shape[0]):
+        for index in range(row_offsets[el1], row_offsets[el1 + 1]):
+            el2 = columns[index]
+            # each pair is stored twice, as (el1, el2) and (el2, el1)
+            if el2 > el1:
+                default = (ranked_weights[el1] - ranked_weights[el2]) * gap
+                _add_copeland_outcome(el1, el2, default, -1., scores, results)
+                _add_copeland_outcome(el1, el2, default + (corrections[index, 0] - corrections[index, 1]), 1.,
+                                      scores, results)
+
+
 class CopelandMethod(RankAggAlgorithm, PairwiseBasedAlgorithm):
     """
     Copeland's method is one of the most famous electoral system published in :
@@ -24,6 +122,26 @@ class CopelandMethod(RankAggAlgorithm, PairwiseBasedAlgorithm):
     A victory for x against y becomes before(x,y) < before(y,x), score += 1 for x and += 0 for y
     An equality for x against y becomes before(x,y) = before(y,x), score += 0.5 for both x and y
     """
+    def __init__(self, tile_size: int = None, tiles_directory: str = None, sparse: bool = False):
+        """
+        Construct a CopelandMethod instance
+
+        :param tile_size: if not None, the cost matrix is computed on disk by tiles of tile_size pairs of elements and
+                          the scores are computed tile by tile, so that the memory used does not depend on the number
+                          of elements, see TiledCostMatrix
+        :param tiles_directory: the directory of the temporary file of the tiled cost matrix, the default temporary
+                                directory if None
+        :param sparse: if True, the cost matrix is a SparseCostMatrix: for datasets of short rankings over many
+                       elements, the time and memory are O(nb_elements * log(nb_elements) + sum of k_i²), k_i being the
+                       number of elements of the i-th ranking
+        :raise ValueError: if both tile_size and sparse are set, the cost matrix being either tiled or sparse
+        """
+        if sparse and tile_size is not None:
+            raise ValueError("A cost matrix cannot be both tiled and sparse: set either tile_size or sparse")
+        self._tile_size: int = tile_size
+        self._tiles_directory: str = tiles_directory
+        self._sparse: bool = sparse
+
     def compute_consensus_rankings(
             self,
             dataset: Dataset,
@@ -57,15 +175,32 @@ class CopelandMethod(RankAggAlgorithm, PairwiseBasedAlgorithm):
 
         mapping_id_elem: Dict[int, Element] = dataset.mapping_id_elem
 
-        pairwise_cost_matrix: ndarray = CopelandMethod.pairwise_cost_matrix(
-            dataset.get_positions(),
-            scoring_scheme
-        )
-
         # scores: nb_elements 1D ndarray, scores[i] = Copeland score of element with ID = i
         # results: (nb_elements, 3) 2D ndarray, scores[i] = number of victories, equalities, defeats of element
         # with ID = i
-        scores_np, results_np = CopelandMethod._fill_dicts_copeland(pairwise_cost_matrix)
+        # the Kemeny score of the consensus is computed from the cost matrix when it is available, the bucket of each
+        # element in the consensus being the rank of its score among the distinct scores, in decreasing order
+        if self._sparse:
+            scores_np, results_np = CopelandMethod._fill_dicts_copeland(
+                SparseCostMatrix.compute(dataset.get_compact_positions(), scoring_scheme, dataset.weights),
+                dataset.nb_elements)
+            kemeny_score: float = KemenyComputingFactory(scoring_scheme).get_kemeny_score_of_buckets(
+                CopelandMethod._buckets_of_scores(scores_np), dataset)
+        elif self._tile_size is not None:
+            with TiledCostMatrix.compute(dataset.get_compact_positions(), scoring_scheme, dataset.weights,
+                                         tile_size=self._tile_size, directory=self._tiles_directory) as tiled_matrix:
+                scores_np, results_np = CopelandMethod._fill_dicts_copeland(tiled_matrix, dataset.nb_elements)
+                kemeny_score: float = tiled_matrix.kemeny_score_of_buckets(CopelandMethod._buckets_of_scores(scores_np))
+        else:
+            # only the pairs i < j are needed, the cost matrix is packed
+            pairwise_cost_matrix: ndarray = CopelandMethod.pairwise_cost_matrix_packed(
+                dataset.get_compact_positions(),
+                scoring_scheme,
+                dataset.weights
+            )
+            scores_np, results_np = CopelandMethod._fill_dicts_copeland(pairwise_cost_matrix, dataset.nb_elements)
+            kemeny_score: float = CopelandMethod.kemeny_score_of_buckets(
+                pairwise_cost_matrix, CopelandMethod._buckets_of_scores(scores_np))
 
         sorted_indices = argsort(scores_np)[::-1]  # Trie les indices en ordre décroissant de scores.
         current_score = scores_np[sorted_indices[0]]
@@ -88,6 +223,7 @@ class CopelandMethod(RankAggAlgorithm, PairwiseBasedAlgorithm):
                                       scoring_scheme=scoring_scheme,
                                       att={
                                           ConsensusFeature.ASSOCIATED_ALGORITHM: self.get_full_name(),
+                                          ConsensusFeature.KEMENY_SCORE: kemeny_score,
                                           ConsensusFeature.COPELAND_SCORES: {mapping_id_elem[i]: scores_np[i] for i
                                                                              in range(len(scores_np))},
                                           ConsensusFeature.COPELAND_VICTORIES: {mapping_id_elem[i]: list(results_np[i])
@@ -95,6 +231,14 @@ class CopelandMethod(RankAggAlgorithm, PairwiseBasedAlgorithm):
                                       }
                          )
 
+    @staticmethod
+    def _buckets_of_scores(scores: ndarray) -> ndarray:
+        """
+        :param scores: the Copeland score of each element
+        :return: the bucket of each element in the Copeland ranking, where the elements are sorted by decreasing score
+        """
+        return unique(-scores, return_inverse=True)[1]
+
     def get_full_name(self) -> str:
         """
         Return the full name of the algorithm.
@@ -116,28 +260,57 @@ class CopelandMethod(RankAggAlgorithm, PairwiseBasedAlgorithm):
         return True
 
     @staticmethod
-    def _fill_dicts_copeland(pairwise_cost_matrix: ndarray):
-        nb_elements, _, _ = pairwise_cost_matrix.shape
-
+    def _fill_dicts_copeland(pairwise_cost_matrix: Union[ndarray, TiledCostMatrix, SparseCostMatrix],
+                             nb_elements: int) -> Tuple[ndarray, ndarray]:
+        """
+        :param pairwise_cost_matrix: the cost matrix, packed (see PairwiseBasedAlgorithm.pairwise_cost_matrix_packed)
+                                     or not, a tiled cost matrix read tile by tile, or a sparse cost matrix
+        :param nb_elements: the number of elements
+        :return: the 1D array of the Copeland scores of the elements, and the (nb_elements, 3) array of their numbers of
+                 victories, equalities and defeats
+        """
+        if isinstance(pairwise_cost_matrix, SparseCostMatrix):
+            return CopelandMethod._copeland_scores_of_sparse(pairwise_cost_matrix)
         scores = zeros(nb_elements)
         results = zeros((nb_elements, 3))
+        if isinstance(pairwise_cost_matrix, TiledCostMatrix):
+            for first_elem1, first_elem2, tile in pairwise_cost_matrix.tiles():
+                _copeland_scores(tile, first_elem1, first_elem2, nb_elements, scores, results)
+            return scores, results
+        if pairwise_cost_matrix.ndim == 3:
+            pairwise_cost_matrix = CopelandMethod.pack_cost_matrix(pairwise_cost_matrix)
+        _copeland_scores(pairwise_cost_matrix, 0, 1, nb_elements, scores, results)
+        return scores, results
 
-        for el1 in range(nb_elements):
-            for el2 in range(el1 + 1, nb_elements):
-                put_before: float = pairwise_cost_matrix[el1][el2][0]
-                put_after: float = pairwise_cost_matrix[el1][el2][1]
-                if put_before < put_after:
-                    scores[el1] += 1
-                    results[el1, 0] += 1
-                    results[el2, 2] += 1
-                elif put_after < put_before:
-                    scores[el2] += 1
-                    results[el1, 2] += 1
-                    results[el2, 0] += 1
-                else:
-                    scores[el1] += 0.5
-                    scores[el2] += 0.5
-                    results[el1, 1] += 1
-                    results[el2, 1] += 1
+    @staticmethod
+    def _copeland_scores_of_sparse(sparse_matrix: SparseCostMatrix) -> Tuple[ndarray, ndarray]:
+        """
+        If x and y are never ranked together, the cost to have x before y minus the cost to have x after y is
+        (W(x) - W(y)) * (B[3] - B[4]), see SparseCostMatrix: the winner of the duel is given by the ranked weights of
+        x and y. The outcomes of these duels are counted for all the pairs by sorting the ranked weights, then the
+        outcomes of the pairs ranked together are corrected.
 
+        :param sparse_matrix: a sparse cost matrix
+        :return: the 1D array of the Copeland scores of the elements, and the (nb_elements, 3) array of their numbers of
+                 victories, equalities and defeats
+        """
+        ranked_weights: ndarray = sparse_matrix.ranked_weights
+        nb_elements: int = ranked_weights.shape[0]
+        gap: float = float(sparse_matrix.costs_of_situations[3, 0] - sparse_matrix.costs_of_situations[3, 1])
+        sorted_weights: ndarray = sort(ranked_weights)
+        nb_lower: ndarray = searchsorted(sorted_weights, ranked_weights, side="left")
+        nb_lower_or_equal: ndarray = searchsorted(sorted_weights, ranked_weights, side="right")
+        nb_equal: ndarray = nb_lower_or_equal - nb_lower - 1
+        nb_greater: ndarray = nb_elements - nb_lower_or_equal
+        results: ndarray = zeros((nb_elements, 3))
+        if gap < 0:
+            # x before y is cheaper iff x is ranked in rankings of greater weight
+            results[:, 0], results[:, 1], results[:, 2] = nb_lower, nb_equal, nb_greater
+        elif gap > 0:
+            results[:, 0], results[:, 1], results[:, 2] = nb_greater, nb_equal, nb_lower
+        else:
+            results[:, 1] = nb_elements - 1
+        scores: ndarray = results[:, 0] + 0.5 * results[:, 1]
+        _correct_copeland_scores_of_co_ranked_pairs(ranked_weights, gap, sparse_matrix.row_offsets,
+                                                    sparse_matrix.columns, sparse_matrix.corrections, scores, results)
         return scores, results
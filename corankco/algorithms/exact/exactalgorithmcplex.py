@@ -114,16 +114,16 @@ class ExactAlgorithmCplex(ExactAlgorithmBase, PairwiseBasedAlgorithm):
         nb_elem: int = dataset.nb_elements
 
         # 2d matrix where positions[i][j] denotes the position of elem with int id i in ranking j (-1 if non-ranked)
-        positions: ndarray = dataset.get_positions()
+        positions: ndarray = dataset.get_compact_positions()
 
         # get both the graph of elements defined in GraphBasedAlgorithm interface and the cost matrix
         # which is a 3D matrix where matrix[i][j][0], then [1], then [2] denote the cost to have i before j,
         # i after j, i tied with j in the consensus according to the scoring scheme.
         if look_for_scc:
-            # computes the graph with the cost matrix
-            graph_elements, cost_matrix = ExactAlgorithmCplex.graph_of_elements(positions, scoring_scheme)
-            # computes the scc of the graph
-            scc = graph_elements.components()
+            # computes the cost matrix
+            cost_matrix = ExactAlgorithmCplex.pairwise_cost_matrix_packed(positions, scoring_scheme, dataset.weights)
+            # computes the scc of the graph of elements, in a topological sort
+            scc = ExactAlgorithmCplex.components_of_graph_of_elements(cost_matrix)
             # to store the consensus ranking
             ranking: List[Set[Element]] = []
             for scc_i in scc:
@@ -145,7 +145,7 @@ class ExactAlgorithmCplex(ExactAlgorithmBase, PairwiseBasedAlgorithm):
 
         # else, no more recursive calls to do, single problem to solve
         consensus_rankings: List[Ranking] = []
-        cost_matrix = ExactAlgorithmCplex.pairwise_cost_matrix(positions, scoring_scheme)
+        cost_matrix = ExactAlgorithmCplex.pairwise_cost_matrix_packed(positions, scoring_scheme, dataset.weights)
         # key: int id of cplex variable. Value: Tuple['x' or 't', element1, element2]. x = before, t = tied
 
         # Cplex object
@@ -236,7 +236,8 @@ class ExactAlgorithmCplex(ExactAlgorithmBase, PairwiseBasedAlgorithm):
         :param my_names: List to which the names of the variables will be appended
         :type my_names: list[str]
         :param mat_score: 3D matrix where matrix[i][j][0], then [1], then [2] denote the cost to have i before j,
-                          i after j, i tied with j in the consensus according to the scoring scheme.
+                          i after j, i tied with j in the consensus according to the scoring scheme, or its packed
+                          form (see PairwiseBasedAlgorithm.pairwise_cost_matrix_packed)
         :type mat_score: numpy.ndarray
         :return: A dictionary mapping variable ID to a tuple consisting of variable type (before or tied), element1, and
                  element2
@@ -245,7 +246,7 @@ class ExactAlgorithmCplex(ExactAlgorithmBase, PairwiseBasedAlgorithm):
         # sets the "before" variables
         map_elements_cplex: Dict[int, Tuple[str, int, int]] = {}
         cpt: int = 0
-        nb_elements: int = len(mat_score)
+        nb_elements: int = PairwiseBasedAlgorithm.nb_elements_of_cost_matrix(mat_score)
         for i in range(nb_elements):
             for j in range(nb_elements):
                 if not i == j:
@@ -253,7 +254,7 @@ class ExactAlgorithmCplex(ExactAlgorithmBase, PairwiseBasedAlgorithm):
                     # name of the new cplex variable, x = before whereas t = tied. Here, cost of i before j
                     cplex_var: str = f"x_{i}_{j}"
                     # associated cost in the consensus
-                    my_obj.append(mat_score[i][j][0])
+                    my_obj.append(PairwiseBasedAlgorithm.costs_of_pair(mat_score, i, j)[0])
                     # the variable is boolean, must be between 0 and 1
                     my_ub.append(1.0)
                     my_lb.append(0.0)
@@ -268,7 +269,7 @@ class ExactAlgorithmCplex(ExactAlgorithmBase, PairwiseBasedAlgorithm):
                 # t for ties. Variable t_i_j : variable "i tied with j"
                 cplex_var: str = f"t_{i}_{j}"
                 # associated cost
-                my_obj.append(mat_score[i][j][2])
+                my_obj.append(PairwiseBasedAlgorithm.costs_of_pair(mat_score, i, j)[2])
                 # boolean variable: 0 or 1 : ub = 1 et lb = 0
                 my_ub.append(1.0)
                 my_lb.append(0.0)
@@ -381,7 +382,8 @@ class ExactAlgorithmCplex(ExactAlgorithmBase, PairwiseBasedAlgorithm):
         :param my_rownames: List of strings representing the names of the constraints
         :param rows: List of lists representing the coefficients of the constraints
         :param cost_matrix: 3D matrix where matrix[i][j][0], then [1], then [2] denote the cost to have i before j,
-                          i after j, i tied with j in the consensus according to the scoring scheme.
+                          i after j, i tied with j in the consensus according to the scoring scheme, or its packed
+                          form (see PairwiseBasedAlgorithm.pairwise_cost_matrix_packed)
         :return: String representing the type of constraints added, all 'E' for equality constraints
         """
 
@@ -395,10 +397,10 @@ class ExactAlgorithmCplex(ExactAlgorithmBase, PairwiseBasedAlgorithm):
         # is a ranking without ties
         can_have_no_ties: bool = True
         # for e1 in 0 ... nb_elements - 2 and e2 in e1 + 1, nb_elements+1
-        for el_1, el_2 in combinations(range(len(cost_matrix)), 2):
-            cost_to_tie = cost_matrix[el_1][el_2][2]
-            cost_to_place_before = cost_matrix[el_1][el_2][0]
-            cost_to_place_after = cost_matrix[el_1][el_2][1]
+        nb_elements: int = PairwiseBasedAlgorithm.nb_elements_of_cost_matrix(cost_matrix)
+        for el_1, el_2 in combinations(range(nb_elements), 2):
+            cost_to_place_before, cost_to_place_after, cost_to_tie = \
+                PairwiseBasedAlgorithm.costs_of_pair(cost_matrix, el_1, el_2)
             calc: float = cost_to_place_before + cost_to_place_after - 2 * cost_to_tie
             # if the test fails, then the optimization cannot be used
             if calc > ExactAlgorithmCplex._PRECISION_THRESHOLD:
@@ -407,7 +409,7 @@ class ExactAlgorithmCplex(ExactAlgorithmBase, PairwiseBasedAlgorithm):
 
         # if the optimization can be done, then all tied variables are set to 0
         if can_have_no_ties:
-            for el_1, el_2 in combinations(range(len(cost_matrix)), 2):
+            for el_1, el_2 in combinations(range(nb_elements), 2):
                 if el_1 > el_2:
                     el_1, el_2 = el_2, el_1
 
@@ -7,6 +7,7 @@ from typing import List, Union
 from itertools import combinations
 from numpy import ndarray
 from corankco.algorithms.exact.exactalgorithmcplex import ExactAlgorithmCplex
+from corankco.algorithms.pairwisebasedalgorithm import PairwiseBasedAlgorithm
 
 
 class ExactAlgorithmCplexForPaperOptim1(ExactAlgorithmCplex):
@@ -32,7 +33,8 @@ class ExactAlgorithmCplexForPaperOptim1(ExactAlgorithmCplex):
         :param my_rownames: List of strings representing the names of the constraints
         :param rows: List of lists representing the coefficients of the constraints
         :param cost_matrix: 3D matrix where matrix[i][j][0], then [1], then [2] denote the cost to have i before j,
-                          i after j, i tied with j in the consensus according to the scoring scheme.
+                          i after j, i tied with j in the consensus according to the scoring scheme, or its packed
+                          form (see PairwiseBasedAlgorithm.pairwise_cost_matrix_packed)
         :return: String representing the type of constraints added, all 'E' for equality constraints
         """
         initial_nb_constraints: int = len(my_rhs)
@@ -42,10 +44,10 @@ class ExactAlgorithmCplexForPaperOptim1(ExactAlgorithmCplex):
         # is a ranking without ties
         can_have_no_ties: bool = True
         # for e1 in 0 ... nb_elements - 2 and e2 in e1 + 1, nb_elements+1
-        for el_1, el_2 in combinations(range(len(cost_matrix)), 2):
-            cost_to_tie = cost_matrix[el_1][el_2][2]
-            cost_to_place_before = cost_matrix[el_1][el_2][0]
-            cost_to_place_after = cost_matrix[el_1][el_2][1]
+        nb_elements: int = PairwiseBasedAlgorithm.nb_elements_of_cost_matrix(cost_matrix)
+        for el_1, el_2 in combinations(range(nb_elements), 2):
+            cost_to_place_before, cost_to_place_after, cost_to_tie = \
+                PairwiseBasedAlgorithm.costs_of_pair(cost_matrix, el_1, el_2)
             calc: float = cost_to_place_before + cost_to_place_after - 2 * cost_to_tie
             # if the test fails, then the optimization cannot be used
             if calc > ExactAlgorithmCplex._PRECISION_THRESHOLD:
@@ -54,7 +56,7 @@ class ExactAlgorithmCplexForPaperOptim1(ExactAlgorithmCplex):
 
         # if the optimization can be done, then all tied variables are set to 0
         if can_have_no_ties:
-            for el_1, el_2 in combinations(range(len(cost_matrix)), 2):
+            for el_1, el_2 in combinations(range(nb_elements), 2):
                 if el_1 > el_2:
                     el_1, el_2 = el_2, el_1
 
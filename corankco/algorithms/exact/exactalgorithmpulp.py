@@ -7,7 +7,6 @@ from itertools import combinations
 from operator import itemgetter
 from numpy import ndarray
 import pulp
-from igraph import Graph
 from corankco.algorithms.rank_aggregation_algorithm import RankAggAlgorithm
 from corankco.dataset import Dataset
 from corankco.scoringscheme import ScoringScheme
@@ -53,10 +52,11 @@ class ExactAlgorithmPulp(RankAggAlgorithm, PairwiseBasedAlgorithm):
         # nb of distinct elements in the dataset
         nb_elem: int = dataset.nb_elements
         # 2d matrix where positions[i][j] = position of element whose int id is i in ranking j, -1 if non-ranked
-        positions: ndarray = dataset.get_positions()
+        positions: ndarray = dataset.get_compact_positions()
 
-        # get the graph of elements and the score matrix
-        graph, cost_matrix = ExactAlgorithmPulp.graph_of_elements(positions, scoring_scheme)
+        # get the score matrix, packed
+        cost_matrix: ndarray = ExactAlgorithmPulp.pairwise_cost_matrix_packed(positions, scoring_scheme,
+                                                                              dataset.weights)
 
         # values of penalty associated to each true pulp variable
         my_values: List[float] = []
@@ -72,7 +72,8 @@ class ExactAlgorithmPulp(RankAggAlgorithm, PairwiseBasedAlgorithm):
         # add the binary constraints of the problem
         ExactAlgorithmPulp._add_binary_constraints(nb_elem, prob, my_vars, h_vars)
         ExactAlgorithmPulp._add_transitivity_constraints(nb_elem, prob, my_vars, h_vars)
-        ExactAlgorithmPulp._add_personal_optimization_constraints(prob, my_vars, h_vars, graph, cost_matrix)
+        ExactAlgorithmPulp._add_personal_optimization_constraints(
+            prob, my_vars, h_vars, ExactAlgorithmPulp.components_of_graph_of_elements(cost_matrix), cost_matrix)
         # objective function
         prob += pulp.lpSum(my_vars[cpt] * my_values[cpt] for cpt in range(len(my_vars)))
 
@@ -96,12 +97,16 @@ class ExactAlgorithmPulp(RankAggAlgorithm, PairwiseBasedAlgorithm):
                 bucket = {id_elements[elem]}
                 current_nb_def = nb_defeats
         ranking.append(bucket)
-        return Consensus(consensus_rankings=[Ranking(ranking)],
+        consensus: Ranking = Ranking(ranking)
+        # the score is computed from the cost matrix rather than read from the objective of the solver, which is
+        # subject to its numerical tolerance
+        return Consensus(consensus_rankings=[consensus],
                          dataset=dataset,
                          scoring_scheme=scoring_scheme,
                          att={ConsensusFeature.NECESSARILY_OPTIMAL: True,
                               ConsensusFeature.ASSOCIATED_ALGORITHM: self.get_full_name(),
-                              ConsensusFeature.KEMENY_SCORE: prob.objective.value(),
+                              ConsensusFeature.KEMENY_SCORE: ExactAlgorithmPulp.kemeny_score_from_cost_matrix(
+                                  cost_matrix, consensus, dataset),
                               })
 
     @staticmethod
@@ -118,7 +123,8 @@ class ExactAlgorithmPulp(RankAggAlgorithm, PairwiseBasedAlgorithm):
         i >= j
         :type my_vars: List[str]
         :param cost_matrix: 3D matrix where matrix[i][j][0], then [1], then [2] denote the cost to have i before j,
-                          i after j, i tied with j in the consensus according to the scoring scheme.
+                          i after j, i tied with j in the consensus according to the scoring scheme, or its packed
+                          form (see PairwiseBasedAlgorithm.pairwise_cost_matrix_packed)
         :type cost_matrix: numpy.ndarray
         :return: A dictionary mapping variable name str to its unique int ID
         :rtype: Dict[str, int]
@@ -132,8 +138,9 @@ class ExactAlgorithmPulp(RankAggAlgorithm, PairwiseBasedAlgorithm):
                 # for each pair of integers (unique IDs of elements) with i != j, define variable x_i_j as i before j
                 if not i == j:
                     name_var = f"x_{i}_{j}"
+                    costs_i_j: ndarray = PairwiseBasedAlgorithm.costs_of_pair(cost_matrix, i, j)
                     # associate the cost to place i before j in the consensus
-                    my_values.append(cost_matrix[i][j][0])
+                    my_values.append(costs_i_j[0])
                     # variable is binary
                     my_vars.append(pulp.LpVariable(name_var, 0, 1, cat="Binary"))
                     # associate a unique pulp variable id
@@ -142,7 +149,7 @@ class ExactAlgorithmPulp(RankAggAlgorithm, PairwiseBasedAlgorithm):
                     # variable t_i_j = tie i with j in the consensus. Defined only for i < j
                     if i < j:
                         name_var = f"t_{i}_{j}"
-                        my_values.append(cost_matrix[i][j][2])
+                        my_values.append(costs_i_j[2])
                         my_vars.append(pulp.LpVariable(name_var, 0, 1, cat="Binary"))
                         map_variables_int_id[name_var] = cpt
                         cpt += 1
@@ -241,10 +248,10 @@ class ExactAlgorithmPulp(RankAggAlgorithm, PairwiseBasedAlgorithm):
 
     @staticmethod
     def _add_personal_optimization_constraints(prob: pulp.LpProblem, my_vars: List[pulp.LpVariable],
-                                               h_vars: Dict[str, int], graph_of_elements: Graph, cost_matrix: ndarray):
+                                               h_vars: Dict[str, int], cfc: List[List[int]], cost_matrix: ndarray):
         """
         Adds optimization constraints based on Prop 2 and Thm 4 in Andrieu et al., IJAR, 2023.
-        More precisely, computes the SCC of the graph of elements in a topological sort, and sets that for each x, y
+        More precisely, given the SCC of the graph of elements in a topological sort, sets that for each x, y
         such that x is in scc[i], y in scc[j] with i < j, we set x before y in consensus.
         Moreover, if for all pairs of elements of a given scc, the cost of tying is high enough vs before / after,
         we set there is no possible ties between elements of this group.
@@ -257,23 +264,22 @@ class ExactAlgorithmPulp(RankAggAlgorithm, PairwiseBasedAlgorithm):
         :type my_vars: List[str]
         :param h_vars: A dictionary mapping variable name str to its unique int ID
         :type h_vars: Dict[str, int]
-        :param graph_of_elements: The graph of elements presented in Andrieu et al., IJAR, 2023.
-        :type graph_of_elements: Graph
+        :param cfc: The strongly connected components of the graph of elements presented in Andrieu et al., IJAR,
+                    2023, in a topological sort, see PairwiseBasedAlgorithm.components_of_graph_of_elements
+        :type cfc: List[List[int]]
         :param cost_matrix: 3D matrix where matrix[i][j][0], then [1], then [2] denote the cost to have i before j,
-                          i after j, i tied with j in the consensus according to the scoring scheme.
+                          i after j, i tied with j in the consensus according to the scoring scheme, or its packed
+                          form (see PairwiseBasedAlgorithm.pairwise_cost_matrix_packed)
         :type cost_matrix: numpy.ndarray
         """
-        # computes the scc of the graph
-        cfc = graph_of_elements.components()
         for id_scc, cfc_i in enumerate(cfc):
             # for each scc, check if for all pairs of elements, the below condition is respected
             group_i: Set[int] = set(cfc_i)
             ties_must_be_checked: bool = False
             pairs: combinations = combinations(group_i, 2)
             for el_1, el_2 in pairs:
-                cost_e1_before_e2 = cost_matrix[el_1][el_2][0]
-                cost_e1_after_e2 = cost_matrix[el_1][el_2][1]
-                cost_e1_tied_e2 = cost_matrix[el_1][el_2][2]
+                cost_e1_before_e2, cost_e1_after_e2, cost_e1_tied_e2 = \
+                    PairwiseBasedAlgorithm.costs_of_pair(cost_matrix, el_1, el_2)
                 if 2 * cost_e1_tied_e2 < cost_e1_before_e2 + cost_e1_after_e2:
                     ties_must_be_checked = True
                     break
@@ -7,11 +7,12 @@ A class that implements the abstract class must implement the choice of the pivo
 """
 
 from typing import List, Dict
-from numpy import ndarray, asarray
+from numpy import ndarray, asarray, empty, int64
 from corankco.algorithms.rank_aggregation_algorithm import RankAggAlgorithm
 from corankco.dataset import Dataset
 from corankco.scoringscheme import ScoringScheme
 from corankco.consensus import Consensus, ConsensusFeature
+from corankco.kemeny_score_computation import KemenyComputingFactory
 from corankco.element import Element
 from corankco.ranking import Ranking
 
@@ -55,10 +56,20 @@ class KwikSortAbs(RankAggAlgorithm):
         mapping_elements_id: Dict[Element, int] = dataset.mapping_elem_id
         positions = dataset.get_positions()
 
-        self._kwik_sort(consensus_list, list(dataset.universe), mapping_elements_id, positions, scoring_scheme_numpy)
+        self._kwik_sort(consensus_list, list(dataset.universe), mapping_elements_id, positions, scoring_scheme_numpy,
+                        dataset.weights, dataset.is_complete and dataset.without_ties)
+
+        # KwikSort does not compute the cost matrix: the Kemeny score is computed in O(m * n * log(n))
+        consensus_buckets: ndarray = empty(dataset.nb_elements, dtype=int64)
+        for id_bucket, bucket in enumerate(consensus_list):
+            for element in bucket:
+                consensus_buckets[mapping_elements_id[element]] = id_bucket
         return Consensus(
             consensus_rankings=[Ranking([set(bucket) for bucket in consensus_list])], dataset=dataset,
-            scoring_scheme=scoring_scheme, att={ConsensusFeature.ASSOCIATED_ALGORITHM: self.get_full_name()})
+            scoring_scheme=scoring_scheme,
+            att={ConsensusFeature.ASSOCIATED_ALGORITHM: self.get_full_name(),
+                 ConsensusFeature.KEMENY_SCORE: KemenyComputingFactory(scoring_scheme).get_kemeny_score_of_buckets(
+                     consensus_buckets, dataset)})
 
     def _get_pivot(self, mapping_elements_id: Dict[Element, int], elements: List[Element], positions: ndarray,
                    scoring_scheme: ndarray) -> Element:
@@ -75,7 +86,7 @@ class KwikSortAbs(RankAggAlgorithm):
     # public abstract V getPivot(List < V > elements, U var);
 
     def _where_should_it_be(self, pos_pivot_rankings: ndarray, pos_other_element_rankings: ndarray,
-                            scoring_scheme_numpy: ndarray) -> int:
+                            scoring_scheme_numpy: ndarray, weights: ndarray) -> int:
         """
         Private method. Given the pivot defined by its ranks in the input rankings as a ndarray and another element
         defined by the same way, returns -1, 1, 0 if the element should be respectively before, after or tied with
@@ -83,13 +94,31 @@ class KwikSortAbs(RankAggAlgorithm):
         :param pos_pivot_rankings: the nb_rankings positions of the pivot in a ndarray
         :param pos_other_element_rankings: the nb_rankings positions of the target element in a ndarray
         :param scoring_scheme_numpy: the ScoringScheme
+        :param weights: the nb_rankings weights of the rankings in a ndarray
         :return: returns -1, 1, 0 if the element should be respectively before, after or tied with the pivot
         in the consensus
         """
         raise NotImplementedError("The method not implemented")
 
+    def _where_should_they_be_in_permutations(self, pos_pivot_rankings: ndarray, pos_other_elements_rankings: ndarray,
+                                              scoring_scheme_numpy: ndarray, weights: ndarray) -> List[int]:
+        """
+        Private method. Same as _where_should_it_be for several elements at once, when the rankings are complete and
+        without ties. Daughter classes may override it with a vectorized version, by default _where_should_it_be is
+        called for each element.
+        :param pos_pivot_rankings: the nb_rankings positions of the pivot in a ndarray
+        :param pos_other_elements_rankings: the (nb_elements, nb_rankings) positions of the target elements
+        :param scoring_scheme_numpy: the ScoringScheme
+        :param weights: the nb_rankings weights of the rankings in a ndarray
+        :return: for each target element, -1, 1, 0 if the element should be respectively before, after or tied with
+        the pivot in the consensus
+        """
+        return [self._where_should_it_be(pos_pivot_rankings, pos_other_element_rankings, scoring_scheme_numpy, weights)
+                for pos_other_element_rankings in pos_other_elements_rankings]
+
     def _kwik_sort(self, consensus: List[List[Element]], remaining_elements: List[Element],
-                   mapping_element_id: Dict[Element, int], positions: ndarray, scoring_scheme: ndarray):
+                   mapping_element_id: Dict[Element, int], positions: ndarray, scoring_scheme: ndarray,
+                   weights: ndarray, permutations: bool = False):
         after: List[Element] = []
         before: List[Element] = []
         pivot: Element = Element(-1)
@@ -99,27 +128,33 @@ class KwikSortAbs(RankAggAlgorithm):
         positions_pivot = positions[mapping_element_id.get(pivot)]
 
         # compare pivot with all remaining elements to separate between "left", "center", "right"
-        for element in remaining_elements:
-            if element != pivot:
-                positions_element = positions[mapping_element_id.get(element)]
-                pos = self._where_should_it_be(positions_pivot, positions_element, scoring_scheme)
-                if pos < 0:
-                    before.append(element)
-                elif pos > 0:
-                    after.append(element)
-                else:
-                    same.append(element)
+        other_elements: List[Element] = [element for element in remaining_elements if element != pivot]
+        if permutations:
+            # complete rankings without ties: all the elements are compared with the pivot at once
+            groups = self._where_should_they_be_in_permutations(
+                positions_pivot, positions[[mapping_element_id.get(element) for element in other_elements]],
+                scoring_scheme, weights)
+        else:
+            groups = [self._where_should_it_be(positions_pivot, positions[mapping_element_id.get(element)],
+                                               scoring_scheme, weights) for element in other_elements]
+        for element, pos in zip(other_elements, groups):
+            if pos < 0:
+                before.append(element)
+            elif pos > 0:
+                after.append(element)
+            else:
+                same.append(element)
 
         if len(before) == 1:
             consensus.append(before)
         elif len(before) > 0:
-            self._kwik_sort(consensus, before, mapping_element_id, positions, scoring_scheme)
+            self._kwik_sort(consensus, before, mapping_element_id, positions, scoring_scheme, weights, permutations)
         if len(same) > 0:
             consensus.append(same)
         if len(after) == 1:
             consensus.append(after)
         elif len(after) > 0:
-            self._kwik_sort(consensus, after, mapping_element_id, positions, scoring_scheme)
+            self._kwik_sort(consensus, after, mapping_element_id, positions, scoring_scheme, weights, permutations)
 
     def get_full_name(self) -> str:
         """
@@ -5,7 +5,7 @@ randomly.
 
 from typing import List, Dict
 from random import choice
-from numpy import count_nonzero, vdot, ndarray
+from numpy import vdot, ndarray, where, logical_and
 from corankco.algorithms.kwiksort.kwiksortabs import KwikSortAbs
 from corankco.element import Element
 from corankco.scoringscheme import ScoringScheme
@@ -30,7 +30,7 @@ class KwikSortRandom(KwikSortAbs):
         return choice(elements)
 
     def _where_should_it_be(self, pos_pivot_rankings: ndarray, pos_other_element_rankings: ndarray,
-                            scoring_scheme_numpy: ndarray) -> int:
+                            scoring_scheme_numpy: ndarray, weights: ndarray) -> int:
         """
         Given the pivot defined by its ranks in the input rankings as a ndarray and another element
         defined by the same way, returns -1, 1, 0 if the element should be respectively before, after or tied with
@@ -39,36 +39,40 @@ class KwikSortRandom(KwikSortAbs):
         :param pos_pivot_rankings: the nb_rankings positions of the pivot in a ndarray
         :param pos_other_element_rankings: the nb_rankings positions of the target element in a ndarray
         :param scoring_scheme_numpy: the ScoringScheme as a numpy ndarray
+        :param weights: the nb_rankings weights of the rankings in a ndarray
         :return: returns 0 if the cost of tying the pivot and the element is minimal (not necessarily the unique minimal
         cost), -1 if the cost of having the element before the pivot in the consensus is minimal and the cost of tying
         them is not, 1 otherwise
         """
-        # nb of rankings such that both pivot and other non-ranked
-        both_non_ranked: int = count_nonzero(pos_pivot_rankings + pos_other_element_rankings == -2)
-        # nb of rankings such that both pivot and other have same position or both non-ranked
-        same_position: int = count_nonzero(pos_pivot_rankings == pos_other_element_rankings)
-        # nb of rankings such that pivot is non-ranked
-        pivot_missing: int = count_nonzero(pos_pivot_rankings == -1)
-        # nb of rankings such that other is non-ranked
-        other_missing: int = count_nonzero(pos_other_element_rankings == -1)
-        # nb of rankings such that other is before pivot or other is non-ranked whereas pivot is ranked
-        other_bef_pivot_or_missing: int = count_nonzero(pos_other_element_rankings < pos_pivot_rankings)
+        # each ranking counts as many times as its weight
+        # weight of rankings such that both pivot and other non-ranked
+        both_non_ranked: float = vdot(weights, logical_and(pos_pivot_rankings == -1, pos_other_element_rankings == -1))
+        # weight of rankings such that both pivot and other have same position or both non-ranked
+        same_position: float = vdot(weights, pos_pivot_rankings == pos_other_element_rankings)
+        # weight of rankings such that pivot is non-ranked
+        pivot_missing: float = vdot(weights, pos_pivot_rankings == -1)
+        # weight of rankings such that other is non-ranked
+        other_missing: float = vdot(weights, pos_other_element_rankings == -1)
+        # weight of rankings such that other is before pivot or other is non-ranked whereas pivot is ranked
+        other_bef_pivot_or_missing: float = vdot(weights, pos_other_element_rankings < pos_pivot_rankings)
+        # total weight of the rankings
+        total_weight: float = weights.sum()
 
         # vector of all situations
-        comp: List[int] = [other_bef_pivot_or_missing - other_missing + both_non_ranked,
-                           len(pos_pivot_rankings) - other_bef_pivot_or_missing - same_position - pivot_missing
-                           + both_non_ranked,
-                           same_position - both_non_ranked,
-                           pivot_missing - both_non_ranked,
-                           other_missing - both_non_ranked,
-                           both_non_ranked]
+        comp: List[float] = [other_bef_pivot_or_missing - other_missing + both_non_ranked,
+                             total_weight - other_bef_pivot_or_missing - same_position - pivot_missing
+                             + both_non_ranked,
+                             same_position - both_non_ranked,
+                             pivot_missing - both_non_ranked,
+                             other_missing - both_non_ranked,
+                             both_non_ranked]
         # cost to place other before pivot
         cost_before = vdot(scoring_scheme_numpy[0], comp)
         # cost to tie other and pivot
         cost_same = vdot(scoring_scheme_numpy[1], comp)
         # cost to place other after pivot
         cost_after = vdot(scoring_scheme_numpy[0],
-                          [len(pos_pivot_rankings) - other_bef_pivot_or_missing - same_position - pivot_missing
+                          [total_weight - other_bef_pivot_or_missing - same_position - pivot_missing
                            + both_non_ranked,
                            other_bef_pivot_or_missing - other_missing + both_non_ranked,
                            same_position - both_non_ranked,
@@ -85,6 +89,34 @@ class KwikSortRandom(KwikSortAbs):
             return -1
         return 1
 
+    def _where_should_they_be_in_permutations(self, pos_pivot_rankings: ndarray, pos_other_elements_rankings: ndarray,
+                                              scoring_scheme_numpy: ndarray, weights: ndarray) -> ndarray:
+        """
+        Same as _where_should_it_be for several elements at once, when the rankings are complete and without ties: the
+        only non-zero situations are then "other before pivot" and "other after pivot", the weight of the former being
+        computed for all the elements with a single matrix product.
+
+        :param pos_pivot_rankings: the nb_rankings positions of the pivot in a ndarray
+        :param pos_other_elements_rankings: the (nb_elements, nb_rankings) positions of the target elements
+        :param scoring_scheme_numpy: the ScoringScheme as a numpy ndarray
+        :param weights: the nb_rankings weights of the rankings in a ndarray
+        :return: for each target element, the value returned by _where_should_it_be
+        """
+        # weight of rankings such that other is before pivot, and such that other is after pivot
+        other_bef_pivot: ndarray = (pos_other_elements_rankings < pos_pivot_rankings) @ weights
+        other_after_pivot: ndarray = weights.sum() - other_bef_pivot
+
+        cost_before: ndarray = scoring_scheme_numpy[0][0] * other_bef_pivot + scoring_scheme_numpy[0][1] * \
+            other_after_pivot
+        cost_same: ndarray = scoring_scheme_numpy[1][0] * other_bef_pivot + scoring_scheme_numpy[1][1] * \
+            other_after_pivot
+        cost_after: ndarray = scoring_scheme_numpy[0][0] * other_after_pivot + scoring_scheme_numpy[0][1] * \
+            other_bef_pivot
+
+        # same choice as _where_should_it_be
+        return where(cost_same <= cost_before, where(cost_same <= cost_after, 0, 1),
+                     where(cost_before <= cost_after, -1, 1))
+
     def get_full_name(self) -> str:
         """
         Return the full name of the algorithm.
@@ -2,98 +2,848 @@
 Module that implements generic functions about pairwise based rank aggregation algorithm. Module for code factorisation.
 """
 
-from typing import Tuple, Set
+from typing import Tuple, Set, List, Iterator, Iterable, Dict, Callable
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from hashlib import blake2b
 from itertools import combinations
-from numba import jit
+from math import isqrt
+import os
+from tempfile import mkstemp
+from threading import Lock
+from numba import jit, prange, get_num_threads, set_num_threads, config
 from igraph import Graph
-from numpy import ndarray, shape, zeros, asarray, logical_or, where, logical_and, ones, column_stack, newaxis
+from numpy import ndarray, zeros, asarray, logical_or, where, logical_and, ones, column_stack, newaxis, float64, \
+    float32, int32, int64, dtype as np_dtype, all as np_all, round as np_round, sum as np_sum, abs as np_abs, \
+    max as np_max, iinfo, triu_indices, arange, searchsorted, flatnonzero, concatenate, lexsort, uint64, \
+    argsort, bincount, cumsum, split, load, array, array_split, ascontiguousarray, unique, unpackbits, uint8
+from numpy.lib.format import open_memmap
 from corankco.scoringscheme import ScoringScheme
+from corankco.ranking import Ranking
+from corankco.dataset import Dataset
+from corankco.kemeny_score_computation import KemenyComputingFactory, InvalidRankingsForComputingDistance
+from corankco.utils import write_binary_arrays, read_binary_arrays, read_binary_header, is_binary_file, \
+    jit_for_positions_types, readonly_signatures
 
 
-@jit("float64[:, :, :](int32[:, :], float64[:, :], float64[:], int32, int32)", nopython=True, cache=True)
-def _pairwise_cost_matrix_only(positions, scoring_scheme_numpy, weights, nb_elem, nb_rankings) -> ndarray:
+# number of (pair of elements, ranking) situations above which the pairwise cost matrix is computed in parallel
+PARALLEL_THRESHOLD: int = 1 << 24
+
+# kinds of rankings, see PairwiseBasedAlgorithm.kind_of_rankings: the pairwise kernels skip the branches on non-ranked
+# elements for complete rankings, and on ties for complete rankings without ties
+GENERIC_RANKINGS: int = 0
+COMPLETE_RANKINGS: int = 1
+COMPLETE_RANKINGS_WITHOUT_TIES: int = 2
+
+
+@jit_for_positions_types()
+def _fill_row_of_cost_matrix(positions, weighted_b_vector, weighted_t_vector, matrix, elem1, nb_elem, nb_rankings):
     """
-    Computes the pairwise cost matrix.
+    Computes the costs of the pairs (elem1, elem2) with elem2 > elem1, and of the symmetric pairs (elem2, elem1).
+    The other cells of the matrix are not read nor written, so that distinct rows can be filled concurrently.
 
     :param positions: The 2D ndarray matrix where positions[i][j] is the position of element int id i in ranking j
+    :param weighted_b_vector: The (nb_rankings, 6) array, b vector of the scoring scheme times the weight of the ranking
+    :param weighted_t_vector: The (nb_rankings, 6) array, t vector of the scoring scheme times the weight of the ranking
+    :param matrix: The (nb_elem, nb_elem, 3) matrix to fill
+    :param elem1: The row to fill
+    :return: None
+    """
+    # array : pos of element 1 in all rankings
+    all_pos_elem1 = positions[elem1]
+
+    # pointer save
+    cost_elem1 = matrix[elem1]
+    for elem2 in range(elem1 + 1, nb_elem):
+        # array : pos of element 2 in all rankings
+        all_pos_elem2 = positions[elem2]
+
+        cost_elem1_elem2 = cost_elem1[elem2]
+        for id_ranking in range(nb_rankings):
+            # pos of element 1 in ranking id_ranking
+            pos_elem1 = all_pos_elem1[id_ranking]
+            # pos of element 2 in ranking id_ranking
+            pos_elem2 = all_pos_elem2[id_ranking]
+
+            # if both elements are ranked in the target ranking
+            if pos_elem1 != -1 and pos_elem2 != -1:
+                # elem1 before elem2
+                if pos_elem1 < pos_elem2:
+                    cost_elem1_elem2[0] += weighted_b_vector[id_ranking][0]
+                    cost_elem1_elem2[1] += weighted_b_vector[id_ranking][1]
+                    cost_elem1_elem2[2] += weighted_t_vector[id_ranking][0]
+
+                # elem2 before elem1
+                elif pos_elem1 > pos_elem2:
+                    cost_elem1_elem2[0] += weighted_b_vector[id_ranking][1]
+                    cost_elem1_elem2[1] += weighted_b_vector[id_ranking][0]
+                    cost_elem1_elem2[2] += weighted_t_vector[id_ranking][1]
+
+                # elem1 tied with elem2
+                else:
+                    cost_elem1_elem2[0] += weighted_b_vector[id_ranking][2]
+                    cost_elem1_elem2[1] += weighted_b_vector[id_ranking][2]
+                    cost_elem1_elem2[2] += weighted_t_vector[id_ranking][2]
+            # only elem1 is ranked
+            elif pos_elem1 != -1:
+                cost_elem1_elem2[0] += weighted_b_vector[id_ranking][3]
+                cost_elem1_elem2[1] += weighted_b_vector[id_ranking][4]
+                cost_elem1_elem2[2] += weighted_t_vector[id_ranking][3]
+
+            # only elem2 is ranked
+            elif pos_elem2 != -1:
+                cost_elem1_elem2[0] += weighted_b_vector[id_ranking][4]
+                cost_elem1_elem2[1] += weighted_b_vector[id_ranking][3]
+                cost_elem1_elem2[2] += weighted_t_vector[id_ranking][4]
+
+            # elem1 and elem2 are non-ranked
+            else:
+                cost_elem1_elem2[0] += weighted_b_vector[id_ranking][5]
+                cost_elem1_elem2[1] += weighted_b_vector[id_ranking][5]
+                cost_elem1_elem2[2] += weighted_t_vector[id_ranking][5]
+
+        # matrix is symmetric
+        matrix[elem2][elem1][0] = cost_elem1_elem2[1]
+        matrix[elem2][elem1][1] = cost_elem1_elem2[0]
+        matrix[elem2][elem1][2] = cost_elem1_elem2[2]
+
+
+@jit("UniTuple(float64[:, :], 2)(float64[:, :], float64[:], int64)", nopython=True, cache=True)
+def _weighted_penalty_vectors(scoring_scheme_numpy, weights, nb_rankings):
+    """
     :param scoring_scheme_numpy: The associated scoring scheme, 2D numpy ndarray form.
     :param weights: a float64 array that associates a weight for each ranking
-    :return: The pairwise cost matrix as n * n * 3 ndarray, where n is the number of elements
+    :return: The two (nb_rankings, 6) arrays of the b and t vectors of the scoring scheme times the weight of each
+             ranking. The arrays are filled with loops, array expressions cannot be broadcast in parallel kernels
     """
-
     scoring_scheme_b_vector = scoring_scheme_numpy[0]
     scoring_scheme_t_vector = scoring_scheme_numpy[1]
+    weighted_b_vector = zeros((nb_rankings, 6))
+    weighted_t_vector = zeros((nb_rankings, 6))
+    for id_ranking in range(nb_rankings):
+        for id_situation in range(6):
+            weighted_b_vector[id_ranking][id_situation] = scoring_scheme_b_vector[id_situation] * weights[id_ranking]
+            weighted_t_vector[id_ranking][id_situation] = scoring_scheme_t_vector[id_situation] * weights[id_ranking]
+    return weighted_b_vector, weighted_t_vector
+
+
+@jit_for_positions_types()
+def _fill_row_of_packed_cost_matrix_complete(positions, weighted_b_vector, weighted_t_vector, packed, index, elem1,
+                                             first_elem2, end_elem2, nb_rankings):
+    """
+    Same as _fill_row_of_packed_cost_matrix when all the elements are ranked in all the rankings: the costs are summed
+    in the same order, so that they are identical, without testing whether the elements are ranked.
+
+    :param positions: The 2D ndarray matrix where positions[i][j] is the position of element int id i in ranking j
+    :param weighted_b_vector: The (nb_rankings, 6) array, b vector of the scoring scheme times the weight of the ranking
+    :param weighted_t_vector: The (nb_rankings, 6) array, t vector of the scoring scheme times the weight of the ranking
+    :param packed: The packed matrix, or the tile, to fill
+    :param index: The row of packed associated with the pair (elem1, first_elem2)
+    :param elem1: The row of the cost matrix to fill, first_elem2 > elem1
+    :return: None
+    """
+    all_pos_elem1 = positions[elem1]
+    for elem2 in range(first_elem2, end_elem2):
+        all_pos_elem2 = positions[elem2]
+        cost_before = 0.
+        cost_after = 0.
+        cost_tied = 0.
+        for id_ranking in range(nb_rankings):
+            pos_elem1 = all_pos_elem1[id_ranking]
+            pos_elem2 = all_pos_elem2[id_ranking]
+            if pos_elem1 < pos_elem2:
+                cost_before += weighted_b_vector[id_ranking][0]
+                cost_after += weighted_b_vector[id_ranking][1]
+                cost_tied += weighted_t_vector[id_ranking][0]
+            elif pos_elem1 > pos_elem2:
+                cost_before += weighted_b_vector[id_ranking][1]
+                cost_after += weighted_b_vector[id_ranking][0]
+                cost_tied += weighted_t_vector[id_ranking][1]
+            else:
+                cost_before += weighted_b_vector[id_ranking][2]
+                cost_after += weighted_b_vector[id_ranking][2]
+                cost_tied += weighted_t_vector[id_ranking][2]
+        packed[index][0] = cost_before
+        packed[index][1] = cost_after
+        packed[index][2] = cost_tied
+        index += 1
+
+
+@jit_for_positions_types()
+def _fill_row_of_packed_cost_matrix_without_ties(positions, weighted_b_vector, weighted_t_vector, packed, index, elem1,
+                                                 first_elem2, end_elem2, nb_rankings):
+    """
+    Same as _fill_row_of_packed_cost_matrix when the rankings are complete permutations: each pair is in one of two
+    situations, chosen by a single positional comparison that compiles to conditional moves rather than branches. The
+    costs are summed in the same order, so that they are identical.
+
+    :param positions: The 2D ndarray matrix where positions[i][j] is the position of element int id i in ranking j
+    :param weighted_b_vector: The (nb_rankings, 6) array, b vector of the scoring scheme times the weight of the ranking
+    :param weighted_t_vector: The (nb_rankings, 6) array, t vector of the scoring scheme times the weight of the ranking
+    :param packed: The packed matrix, or the tile, to fill
+    :param index: The row of packed associated with the pair (elem1, first_elem2)
+    :param elem1: The row of the cost matrix to fill, first_elem2 > elem1
+    :return: None
+    """
+    all_pos_elem1 = positions[elem1]
+    for elem2 in range(first_elem2, end_elem2):
+        all_pos_elem2 = positions[elem2]
+        cost_before = 0.
+        cost_after = 0.
+        cost_tied = 0.
+        for id_ranking in range(nb_rankings):
+            before = all_pos_elem1[id_ranking] < all_pos_elem2[id_ranking]
+            cost_before += weighted_b_vector[id_ranking][0] if before else weighted_b_vector[id_ranking][1]
+            cost_after += weighted_b_vector[id_ranking][1] if before else weighted_b_vector[id_ranking][0]
+            cost_tied += weighted_t_vector[id_ranking][0] if before else weighted_t_vector[id_ranking][1]
+        packed[index][0] = cost_before
+        packed[index][1] = cost_after
+        packed[index][2] = cost_tied
+        index += 1
+
+
+@jit_for_positions_types()
+def _fill_row_of_cost_matrix_of_kind(positions, weighted_b_vector, weighted_t_vector, matrix, elem1, nb_elem,
+                                     nb_rankings, kind):
+    """
+    Same as _fill_row_of_cost_matrix, with the kernel specialised for the kind of rankings, see
+    PairwiseBasedAlgorithm.kind_of_rankings.
+
+    :param kind: GENERIC_RANKINGS, COMPLETE_RANKINGS or COMPLETE_RANKINGS_WITHOUT_TIES
+    :return: None
+    """
+    if kind == GENERIC_RANKINGS:
+        _fill_row_of_cost_matrix(positions, weighted_b_vector, weighted_t_vector, matrix, elem1, nb_elem, nb_rankings)
+        return
+    # the pairs (elem1, elem2), elem2 > elem1, are consecutive in matrix[elem1] as in a packed matrix
+    if kind == COMPLETE_RANKINGS_WITHOUT_TIES:
+        _fill_row_of_packed_cost_matrix_without_ties(positions, weighted_b_vector, weighted_t_vector, matrix[elem1],
+                                                     elem1 + 1, elem1, elem1 + 1, nb_elem, nb_rankings)
+    else:
+        _fill_row_of_packed_cost_matrix_complete(positions, weighted_b_vector, weighted_t_vector, matrix[elem1],
+                                                 elem1 + 1, elem1, elem1 + 1, nb_elem, nb_rankings)
+    cost_elem1 = matrix[elem1]
+    for elem2 in range(elem1 + 1, nb_elem):
+        matrix[elem2][elem1][0] = cost_elem1[elem2][1]
+        matrix[elem2][elem1][1] = cost_elem1[elem2][0]
+        matrix[elem2][elem1][2] = cost_elem1[elem2][2]
+
+
+@jit_for_positions_types()
+def _pairwise_cost_matrix_only(positions, scoring_scheme_numpy, weights, nb_elem, nb_rankings, kind) -> ndarray:
+    """
+    Computes the pairwise cost matrix.
+
+    :param positions: The 2D ndarray matrix where positions[i][j] is the position of element int id i in ranking j
+    :param scoring_scheme_numpy: The associated scoring scheme, 2D numpy ndarray form.
+    :param weights: a float64 array that associates a weight for each ranking
+    :param kind: the kind of rankings, see PairwiseBasedAlgorithm.kind_of_rankings
+    :return: The pairwise cost matrix as n * n * 3 ndarray, where n is the number of elements
+    """
 
     # create the matrix
     matrix = zeros((nb_elem, nb_elem, 3))
 
-    # 2D float array, weighted_b_vector[i] = scoring_scheme_b_vector * weights[i]
-    # dimension of the array: nb_rankings, 6
-    weighted_b_vector = scoring_scheme_b_vector * weights[:, newaxis]
-    # same for t vector
-    weighted_t_vector = scoring_scheme_t_vector * weights[:, newaxis]
+    # 2D float arrays of dimension (nb_rankings, 6), weighted_b_vector[i] = scoring_scheme_b_vector * weights[i]
+    weighted_b_vector, weighted_t_vector = _weighted_penalty_vectors(scoring_scheme_numpy, weights, nb_rankings)
 
     # fill the matrix
     for elem1 in range(nb_elem):
-        # array : pos of element 1 in all rankings
-        all_pos_elem1 = positions[elem1]
+        _fill_row_of_cost_matrix_of_kind(positions, weighted_b_vector, weighted_t_vector, matrix, elem1, nb_elem,
+                                         nb_rankings, kind)
+
+    return matrix
+
+
+@jit_for_positions_types(parallel=True)
+def _pairwise_cost_matrix_parallel(positions, scoring_scheme_numpy, weights, nb_elem, nb_rankings, kind) -> ndarray:
+    """
+    Computes the pairwise cost matrix with several threads, see _pairwise_cost_matrix_only. Each cell is computed by
+    the same sequence of operations as in _pairwise_cost_matrix_only, so both matrices are identical.
+
+    :param positions: The 2D ndarray matrix where positions[i][j] is the position of element int id i in ranking j
+    :param scoring_scheme_numpy: The associated scoring scheme, 2D numpy ndarray form.
+    :param weights: a float64 array that associates a weight for each ranking
+    :param kind: the kind of rankings, see PairwiseBasedAlgorithm.kind_of_rankings
+    :return: The pairwise cost matrix as n * n * 3 ndarray, where n is the number of elements
+    """
+    matrix = zeros((nb_elem, nb_elem, 3))
+    weighted_b_vector, weighted_t_vector = _weighted_penalty_vectors(scoring_scheme_numpy, weights, nb_rankings)
+
+    # row i has nb_elem - 1 - i pairs to compute: row i is paired with row nb_elem - 1 - i so that each iteration
+    # computes nb_elem - 1 pairs, and the threads have balanced workloads
+    for first_row in prange((nb_elem + 1) // 2):
+        _fill_row_of_cost_matrix_of_kind(positions, weighted_b_vector, weighted_t_vector, matrix, first_row, nb_elem,
+                                         nb_rankings, kind)
+        last_row = nb_elem - 1 - first_row
+        if last_row != first_row:
+            _fill_row_of_cost_matrix_of_kind(positions, weighted_b_vector, weighted_t_vector, matrix, last_row, nb_elem,
+                                             nb_rankings, kind)
+
+    return matrix
+
+
+@jit("int64(int64, int64, int64)", nopython=True, cache=True)
+def _packed_index(elem1, elem2, nb_elem):
+    """
+    Index of the pair (elem1, elem2) in a packed cost matrix, see PairwiseBasedAlgorithm.pairwise_cost_matrix_packed.
+
+    :param elem1: The first element of the pair
+    :param elem2: The second element of the pair, elem1 < elem2
+    :param nb_elem: The number of elements
+    :return: The index of the row of the packed matrix associated with the pair (elem1, elem2)
+    """
+    return elem1 * (2 * nb_elem - elem1 - 1) // 2 + elem2 - elem1 - 1
+
+
+@jit_for_positions_types()
+def _fill_row_of_packed_cost_matrix(positions, weighted_b_vector, weighted_t_vector, packed, index, elem1,
+                                    first_elem2, end_elem2, nb_rankings):
+    """
+    Computes the costs of the pairs (elem1, elem2) with first_elem2 <= elem2 < end_elem2 in a packed cost matrix, or in
+    a tile of it. The costs are summed in float64 in the same order as in _fill_row_of_cost_matrix, then converted to
+    the type of packed.
+
+    :param positions: The 2D ndarray matrix where positions[i][j] is the position of element int id i in ranking j
+    :param weighted_b_vector: The (nb_rankings, 6) array, b vector of the scoring scheme times the weight of the ranking
+    :param weighted_t_vector: The (nb_rankings, 6) array, t vector of the scoring scheme times the weight of the ranking
+    :param packed: The packed matrix, or the tile, to fill
+    :param index: The row of packed associated with the pair (elem1, first_elem2)
+    :param elem1: The row of the cost matrix to fill, first_elem2 > elem1
+    :return: None
+    """
+    all_pos_elem1 = positions[elem1]
+    # costs of the current pair; summing in a small array rather than in scalars keeps the branches of the inner loop
+    # as they are, which is faster
+    costs = zeros(3)
+    for elem2 in range(first_elem2, end_elem2):
+        all_pos_elem2 = positions[elem2]
+        costs[0] = 0.
+        costs[1] = 0.
+        costs[2] = 0.
+        for id_ranking in range(nb_rankings):
+            pos_elem1 = all_pos_elem1[id_ranking]
+            pos_elem2 = all_pos_elem2[id_ranking]
+            if pos_elem1 != -1 and pos_elem2 != -1:
+                if pos_elem1 < pos_elem2:
+                    costs[0] += weighted_b_vector[id_ranking][0]
+                    costs[1] += weighted_b_vector[id_ranking][1]
+                    costs[2] += weighted_t_vector[id_ranking][0]
+                elif pos_elem1 > pos_elem2:
+                    costs[0] += weighted_b_vector[id_ranking][1]
+                    costs[1] += weighted_b_vector[id_ranking][0]
+                    costs[2] += weighted_t_vector[id_ranking][1]
+                else:
+                    costs[0] += weighted_b_vector[id_ranking][2]
+                    costs[1] += weighted_b_vector[id_ranking][2]
+                    costs[2] += weighted_t_vector[id_ranking][2]
+            elif pos_elem1 != -1:
+                costs[0] += weighted_b_vector[id_ranking][3]
+                costs[1] += weighted_b_vector[id_ranking][4]
+                costs[2] += weighted_t_vector[id_ranking][3]
+            elif pos_elem2 != -1:
+                costs[0] += weighted_b_vector[id_ranking][4]
+                costs[1] += weighted_b_vector[id_ranking][3]
+                costs[2] += weighted_t_vector[id_ranking][4]
+            else:
+                costs[0] += weighted_b_vector[id_ranking][5]
+                costs[1] += weighted_b_vector[id_ranking][5]
+                costs[2] += weighted_t_vector[id_ranking][5]
+        packed[index][0] = costs[0]
+        packed[index][1] = costs[1]
+        packed[index][2] = costs[2]
+        index += 1
+
+
+@jit_for_positions_types()
+def _fill_row_of_packed_cost_matrix_of_kind(positions, weighted_b_vector, weighted_t_vector, packed, index, elem1,
+                                            first_elem2, end_elem2, nb_rankings, kind):
+    """
+    Same as _fill_row_of_packed_cost_matrix, with the kernel specialised for the kind of rankings, see
+    PairwiseBasedAlgorithm.kind_of_rankings.
+
+    :param kind: GENERIC_RANKINGS, COMPLETE_RANKINGS or COMPLETE_RANKINGS_WITHOUT_TIES
+    :return: None
+    """
+    if kind == COMPLETE_RANKINGS_WITHOUT_TIES:
+        _fill_row_of_packed_cost_matrix_without_ties(positions, weighted_b_vector, weighted_t_vector, packed, index,
+                                                     elem1, first_elem2, end_elem2, nb_rankings)
+    elif kind == COMPLETE_RANKINGS:
+        _fill_row_of_packed_cost_matrix_complete(positions, weighted_b_vector, weighted_t_vector, packed, index, elem1,
+                                                 first_elem2, end_elem2, nb_rankings)
+    else:
+        _fill_row_of_packed_cost_matrix(positions, weighted_b_vector, weighted_t_vector, packed, index, elem1,
+                                        first_elem2, end_elem2, nb_rankings)
+
+
+@jit_for_positions_types(parallel=True)
+def _fill_packed_cost_matrix(positions, scoring_scheme_numpy, weights, nb_elem, nb_rankings, packed, kind):
+    """
+    Computes the packed pairwise cost matrix, see PairwiseBasedAlgorithm.pairwise_cost_matrix_packed. Rows are
+    distributed among the threads as in _pairwise_cost_matrix_parallel.
+
+    :param positions: The 2D ndarray matrix where positions[i][j] is the position of element int id i in ranking j
+    :param scoring_scheme_numpy: The associated scoring scheme, 2D numpy ndarray form.
+    :param weights: a float64 array that associates a weight for each ranking
+    :param packed: The (nb_elem * (nb_elem - 1) / 2, 3) matrix to fill
+    :param kind: the kind of rankings, see PairwiseBasedAlgorithm.kind_of_rankings
+    :return: None
+    """
+    weighted_b_vector, weighted_t_vector = _weighted_penalty_vectors(scoring_scheme_numpy, weights, nb_rankings)
+    for first_row in prange((nb_elem + 1) // 2):
+        _fill_row_of_packed_cost_matrix_of_kind(positions, weighted_b_vector, weighted_t_vector, packed,
+                                                _packed_index(first_row, first_row + 1, nb_elem), first_row,
+                                                first_row + 1, nb_elem, nb_rankings, kind)
+        last_row = nb_elem - 1 - first_row
+        if last_row != first_row:
+            _fill_row_of_packed_cost_matrix_of_kind(positions, weighted_b_vector, weighted_t_vector, packed,
+                                                    _packed_index(last_row, last_row + 1, nb_elem), last_row,
+                                                    last_row + 1, nb_elem, nb_rankings, kind)
+
+
+@jit_for_positions_types(parallel=True)
+def _fill_tile_of_packed_cost_matrix(positions, scoring_scheme_numpy, weights, nb_elem, nb_rankings, first_elem1,
+                                     first_elem2, tile, kind):
+    """
+    Computes a tile of the packed pairwise cost matrix, that is the costs of len(tile) consecutive pairs of the packed
+    matrix, the first one being (first_elem1, first_elem2). The rows of the cost matrix covered by the tile are
+    distributed among the threads.
+
+    :param positions: The 2D ndarray matrix where positions[i][j] is the position of element int id i in ranking j
+    :param scoring_scheme_numpy: The associated scoring scheme, 2D numpy ndarray form.
+    :param weights: a float64 array that associates a weight for each ranking
+    :param tile: The (nb_pairs, 3) matrix to fill
+    :param kind: the kind of rankings, see PairwiseBasedAlgorithm.kind_of_rankings
+    :return: None
+    """
+    weighted_b_vector, weighted_t_vector = _weighted_penalty_vectors(scoring_scheme_numpy, weights, nb_rankings)
+    first_index = _packed_index(first_elem1, first_elem2, nb_elem)
+    end_index = first_index + tile.shape[0]
+    # last row of the cost matrix covered by the tile
+    last_elem1 = first_elem1
+    while last_elem1 < nb_elem - 1 and _packed_index(last_elem1 + 1, last_elem1 + 2, nb_elem) < end_index:
+        last_elem1 += 1
+    for elem1 in prange(first_elem1, last_elem1 + 1):
+        start_elem2 = first_elem2 if elem1 == first_elem1 else elem1 + 1
+        index = _packed_index(elem1, start_elem2, nb_elem) - first_index
+        _fill_row_of_packed_cost_matrix_of_kind(positions, weighted_b_vector, weighted_t_vector, tile, index, elem1,
+                                                start_elem2, min(nb_elem, start_elem2 + tile.shape[0] - index),
+                                                nb_rankings, kind)
+
+
+@jit_for_positions_types()
+def _fill_row_of_situation_counts(positions, weights, counts, elem1, nb_elem, nb_rankings):
+    """
+    Computes the weighted counts of the situations of the pairs (elem1, elem2) with elem2 > elem1, and of the
+    symmetric pairs (elem2, elem1). The other cells of counts are not read nor written.
+
+    :param positions: The 2D ndarray matrix where positions[i][j] is the position of element int id i in ranking j
+    :param weights: a float64 array that associates a weight for each ranking
+    :param counts: The (nb_elem, nb_elem, 6) tensor to fill, see _pairwise_situation_counts
+    :param elem1: The row to fill
+    :return: None
+    """
+    all_pos_elem1 = positions[elem1]
+    counts_elem1 = counts[elem1]
+    for elem2 in range(elem1 + 1, nb_elem):
+        all_pos_elem2 = positions[elem2]
+        counts_elem1_elem2 = counts_elem1[elem2]
+        for id_ranking in range(nb_rankings):
+            pos_elem1 = all_pos_elem1[id_ranking]
+            pos_elem2 = all_pos_elem2[id_ranking]
+            if pos_elem1 != -1 and pos_elem2 != -1:
+                if pos_elem1 < pos_elem2:
+                    counts_elem1_elem2[0] += weights[id_ranking]
+                elif pos_elem1 > pos_elem2:
+                    counts_elem1_elem2[1] += weights[id_ranking]
+                else:
+                    counts_elem1_elem2[2] += weights[id_ranking]
+            elif pos_elem1 != -1:
+                counts_elem1_elem2[3] += weights[id_ranking]
+            elif pos_elem2 != -1:
+                counts_elem1_elem2[4] += weights[id_ranking]
+            else:
+                counts_elem1_elem2[5] += weights[id_ranking]
+
+        # elem2 before elem1 <=> elem1 after elem2, only elem2 <=> only elem1
+        counts_elem2_elem1 = counts[elem2][elem1]
+        counts_elem2_elem1[0] = counts_elem1_elem2[1]
+        counts_elem2_elem1[1] = counts_elem1_elem2[0]
+        counts_elem2_elem1[2] = counts_elem1_elem2[2]
+        counts_elem2_elem1[3] = counts_elem1_elem2[4]
+        counts_elem2_elem1[4] = counts_elem1_elem2[3]
+        counts_elem2_elem1[5] = counts_elem1_elem2[5]
+
+
+@jit_for_positions_types(parallel=True)
+def _pairwise_situation_counts(positions, weights, nb_elem, nb_rankings) -> ndarray:
+    """
+    Computes the weighted counts of the six situations of each pair of elements: counts[x][y] is the total weight of the
+    rankings where x is before y, x is after y, x is tied with y, only x is ranked, only y is ranked, and neither x nor
+    y is ranked. Rows are distributed among the threads as in _pairwise_cost_matrix_parallel.
+
+    :param positions: The 2D ndarray matrix where positions[i][j] is the position of element int id i in ranking j
+    :param weights: a float64 array that associates a weight for each ranking
+    :return: The (nb_elem, nb_elem, 6) tensor of the weighted counts of the situations
+    """
+    counts = zeros((nb_elem, nb_elem, 6))
+    for first_row in prange((nb_elem + 1) // 2):
+        _fill_row_of_situation_counts(positions, weights, counts, first_row, nb_elem, nb_rankings)
+        last_row = nb_elem - 1 - first_row
+        if last_row != first_row:
+            _fill_row_of_situation_counts(positions, weights, counts, last_row, nb_elem, nb_rankings)
+    return counts
+
+
+@jit(readonly_signatures(["void(float64[:, :], int64, int64, int64, uint64[:, :], uint64[:, :])",
+                          "void(float32[:, :], int64, int64, int64, uint64[:, :], uint64[:, :])",
+                          "void(int32[:, :], int64, int64, int64, uint64[:, :], uint64[:, :])"], 0),
+     nopython=True, cache=True)
+def _set_arcs_of_tile(tile, first_elem1, first_elem2, nb_elem, out_arcs, in_arcs):
+    """
+    Sets the bits of the arcs of the graph of elements defined by the pairs of a tile of a packed cost matrix. The arc
+    (i, j) exists iff the cost of i after j is not the cheapest, see PairwiseBasedAlgorithm.graph_of_elements.
+
+    :param tile: A tile of a packed cost matrix, see TiledCostMatrix
+    :param first_elem1: The first element of the first pair of the tile
+    :param first_elem2: The second element of the first pair of the tile
+    :param nb_elem: The number of elements
+    :param out_arcs: The (nb_elem, nb_words) bitsets of the successors of each element
+    :param in_arcs: The (nb_elem, nb_words) bitsets of the predecessors of each element
+    :return: None
+    """
+    elem1 = first_elem1
+    elem2 = first_elem2
+    for index in range(tile.shape[0]):
+        put_before = tile[index][0]
+        put_after = tile[index][1]
+        put_tied = tile[index][2]
+        if put_after > put_before or put_after > put_tied:
+            out_arcs[elem1, elem2 >> 6] |= uint64(1) << uint64(elem2 & 63)
+            in_arcs[elem2, elem1 >> 6] |= uint64(1) << uint64(elem1 & 63)
+        if put_before > put_after or put_before > put_tied:
+            out_arcs[elem2, elem1 >> 6] |= uint64(1) << uint64(elem1 & 63)
+            in_arcs[elem1, elem2 >> 6] |= uint64(1) << uint64(elem2 & 63)
+        elem2 += 1
+        if elem2 == nb_elem:
+            elem1 += 1
+            elem2 = elem1 + 1
+
+
+@jit(readonly_signatures(["void(float64[:, :, :], uint64[:, :], uint64[:, :])"], 0), nopython=True, cache=True)
+def _set_arcs_of_dense_cost_matrix(matrix, out_arcs, in_arcs):
+    """
+    Sets the bits of the arcs of the graph of elements defined by a dense cost matrix, see _set_arcs_of_tile. Only the
+    upper triangle of the matrix is read.
+
+    :param matrix: A dense (nb_elem, nb_elem, 3) cost matrix, see PairwiseBasedAlgorithm.pairwise_cost_matrix
+    :param out_arcs: The (nb_elem, nb_words) bitsets of the successors of each element
+    :param in_arcs: The (nb_elem, nb_words) bitsets of the predecessors of each element
+    :return: None
+    """
+    nb_elem = matrix.shape[0]
+    for elem1 in range(nb_elem):
+        for elem2 in range(elem1 + 1, nb_elem):
+            put_before = matrix[elem1, elem2, 0]
+            put_after = matrix[elem1, elem2, 1]
+            put_tied = matrix[elem1, elem2, 2]
+            if put_after > put_before or put_after > put_tied:
+                out_arcs[elem1, elem2 >> 6] |= uint64(1) << uint64(elem2 & 63)
+                in_arcs[elem2, elem1 >> 6] |= uint64(1) << uint64(elem1 & 63)
+            if put_before > put_after or put_before > put_tied:
+                out_arcs[elem2, elem1 >> 6] |= uint64(1) << uint64(elem1 & 63)
+                in_arcs[elem1, elem2 >> 6] |= uint64(1) << uint64(elem2 & 63)
+
+
+@jit(readonly_signatures(["float64(float64[:, :], int64, int64, int64[:])",
+                          "float64(float32[:, :], int64, int64, int64[:])",
+                          "float64(int32[:, :], int64, int64, int64[:])"], 0), nopython=True, cache=True)
+def _score_of_buckets_in_tile(tile, first_elem1, first_elem2, buckets):
+    """
+    Sum of the costs of the pairs of a tile of a packed cost matrix, each pair being placed as in a consensus.
+
+    :param tile: A tile of a packed cost matrix, see TiledCostMatrix, or a whole packed cost matrix
+    :param first_elem1: The first element of the first pair of the tile
+    :param first_elem2: The second element of the first pair of the tile
+    :param buckets: The bucket of each element in the consensus
+    :return: The sum of the costs of the pairs of the tile
+    """
+    nb_elem = buckets.shape[0]
+    score = 0.
+    elem1 = first_elem1
+    elem2 = first_elem2
+    for index in range(tile.shape[0]):
+        if buckets[elem1] < buckets[elem2]:
+            score += tile[index][0]
+        elif buckets[elem1] > buckets[elem2]:
+            score += tile[index][1]
+        else:
+            score += tile[index][2]
+        elem2 += 1
+        if elem2 == nb_elem:
+            elem1 += 1
+            elem2 = elem1 + 1
+    return score
+
 
-        # pointer save
-        cost_elem1 = matrix[elem1]
+@jit(readonly_signatures(["float64(float64[:, :, :], int64[:])"], 0), nopython=True, cache=True)
+def _score_of_buckets_in_dense_cost_matrix(matrix, buckets):
+    """
+    Sum of the costs of the pairs of a dense cost matrix, each pair being placed as in a consensus. Only the upper
+    triangle of the matrix is read.
+
+    :param matrix: A dense (nb_elem, nb_elem, 3) cost matrix, see PairwiseBasedAlgorithm.pairwise_cost_matrix
+    :param buckets: The bucket of each element in the consensus
+    :return: The Kemeny score of the consensus
+    """
+    nb_elem = matrix.shape[0]
+    score = 0.
+    for elem1 in range(nb_elem):
         for elem2 in range(elem1 + 1, nb_elem):
-            # array : pos of element 2 in all rankings
-            all_pos_elem2 = positions[elem2]
-
-            cost_elem1_elem2 = cost_elem1[elem2]
-            for id_ranking in range(nb_rankings):
-                # pos of element 1 in ranking id_ranking
-                pos_elem1 = all_pos_elem1[id_ranking]
-                # pos of element 2 in ranking id_ranking
-                pos_elem2 = all_pos_elem2[id_ranking]
-
-                # if both elements are ranked in the target ranking
-                if pos_elem1 != -1 and pos_elem2 != -1:
-                    # elem1 before elem2
-                    if pos_elem1 < pos_elem2:
-                        cost_elem1_elem2[0] += weighted_b_vector[id_ranking][0]
-                        cost_elem1_elem2[1] += weighted_b_vector[id_ranking][1]
-                        cost_elem1_elem2[2] += weighted_t_vector[id_ranking][0]
-
-                    # elem2 before elem1
-                    elif pos_elem1 > pos_elem2:
-                        cost_elem1_elem2[0] += weighted_b_vector[id_ranking][1]
-                        cost_elem1_elem2[1] += weighted_b_vector[id_ranking][0]
-                        cost_elem1_elem2[2] += weighted_t_vector[id_ranking][1]
-
-                    # elem1 tied with elem2
-                    else:
-                        cost_elem1_elem2[0] += weighted_b_vector[id_ranking][2]
-                        cost_elem1_elem2[1] += weighted_b_vector[id_ranking][2]
-                        cost_elem1_elem2[2] += weighted_t_vector[id_ranking][2]
-                # only elem1 is ranked
-                elif pos_elem1 != -1:
-                    cost_elem1_elem2[0] += weighted_b_vector[id_ranking][3]
-                    cost_elem1_elem2[1] += weighted_b_vector[id_ranking][4]
-                    cost_elem1_elem2[2] += weighted_t_vector[id_ranking][3]
-
-                # only elem2 is ranked
-                elif pos_elem2 != -1:
-                    cost_elem1_elem2[0] += weighted_b_vector[id_ranking][4]
-                    cost_elem1_elem2[1] += weighted_b_vector[id_ranking][3]
-                    cost_elem1_elem2[2] += weighted_t_vector[id_ranking][4]
-
-                # elem1 and elem2 are non-ranked
+            if buckets[elem1] < buckets[elem2]:
+                score += matrix[elem1, elem2, 0]
+            elif buckets[elem1] > buckets[elem2]:
+                score += matrix[elem1, elem2, 1]
+            else:
+                score += matrix[elem1, elem2, 2]
+    return score
+
+
+@jit("int64(uint64[:, :], int64, uint64[:], int64[:], int64[:], int64[:], int64)", nopython=True, cache=True)
+def _depth_first_search(arcs, start, unvisited, stack, cursors, order, nb_ordered):
+    """
+    Iterative depth first search on a graph given as bitsets, from an unvisited vertex. The visited vertices are
+    appended to order in post-order. The successors of a vertex are found word by word among the unvisited vertices,
+    so that the search costs O(nb_vertices² / 64) in total.
+
+    :param arcs: The (nb_vertices, nb_words) bitsets of the successors of each vertex
+    :param start: The vertex to start from
+    :param unvisited: The bitset of the unvisited vertices, updated
+    :param stack: An array of size nb_vertices used as stack
+    :param cursors: cursors[v] = the first word of arcs[v] that may contain an unvisited successor of v
+    :param order: The array of the vertices in post-order, completed
+    :param nb_ordered: The number of vertices already in order
+    :return: The number of vertices in order after the search
+    """
+    nb_words = arcs.shape[1]
+    unvisited[start >> 6] &= ~(uint64(1) << uint64(start & 63))
+    cursors[start] = 0
+    stack[0] = start
+    height = 1
+    while height > 0:
+        vertex = stack[height - 1]
+        id_word = cursors[vertex]
+        successor = -1
+        while id_word < nb_words:
+            word = arcs[vertex, id_word] & unvisited[id_word]
+            if word != 0:
+                bit = 0
+                while (word >> uint64(bit)) & uint64(1) == 0:
+                    bit += 1
+                successor = id_word * 64 + bit
+                break
+            id_word += 1
+        cursors[vertex] = id_word
+        if successor == -1:
+            height -= 1
+            order[nb_ordered] = vertex
+            nb_ordered += 1
+        else:
+            unvisited[successor >> 6] &= ~(uint64(1) << uint64(successor & 63))
+            cursors[successor] = 0
+            stack[height] = successor
+            height += 1
+    return nb_ordered
+
+
+@jit("int64[:](uint64[:, :], uint64[:, :], int64)", nopython=True, cache=True)
+def _strongly_connected_components(out_arcs, in_arcs, nb_elem):
+    """
+    Kosaraju's algorithm on a graph given as bitsets.
+
+    :param out_arcs: The (nb_elem, nb_words) bitsets of the successors of each vertex
+    :param in_arcs: The (nb_elem, nb_words) bitsets of the predecessors of each vertex
+    :param nb_elem: The number of vertices
+    :return: The 1D array of the strongly connected component of each vertex, the components being numbered in a
+             topological order of the graph
+    """
+    nb_words = out_arcs.shape[1]
+    unvisited = zeros(nb_words, dtype=uint64)
+    for vertex in range(nb_elem):
+        unvisited[vertex >> 6] |= uint64(1) << uint64(vertex & 63)
+    all_unvisited = unvisited.copy()
+    stack = zeros(nb_elem, dtype=int64)
+    cursors = zeros(nb_elem, dtype=int64)
+    finish_order = zeros(nb_elem, dtype=int64)
+    nb_finished = 0
+    for vertex in range(nb_elem):
+        if (unvisited[vertex >> 6] >> uint64(vertex & 63)) & uint64(1) == 1:
+            nb_finished = _depth_first_search(out_arcs, vertex, unvisited, stack, cursors, finish_order, nb_finished)
+
+    # in decreasing finish time, each search in the transposed graph gives a component, sources first
+    components = zeros(nb_elem, dtype=int64)
+    component_order = zeros(nb_elem, dtype=int64)
+    nb_in_components = 0
+    nb_components = 0
+    unvisited[:] = all_unvisited
+    for id_vertex in range(nb_elem - 1, -1, -1):
+        vertex = finish_order[id_vertex]
+        if (unvisited[vertex >> 6] >> uint64(vertex & 63)) & uint64(1) == 1:
+            first = nb_in_components
+            nb_in_components = _depth_first_search(in_arcs, vertex, unvisited, stack, cursors, component_order,
+                                                   nb_in_components)
+            for id_member in range(first, nb_in_components):
+                components[component_order[id_member]] = nb_components
+            nb_components += 1
+    return components
+
+
+@jit_for_positions_types()
+def _corrections_of_co_ranked_pairs(ranking_offsets, ranked_elements, positions, weights, corrections_of_situations,
+                                    nb_elem, keys, corrections):
+    """
+    Computes, for each ranking and each pair elem1 < elem2 of elements ranked in it, the correction of the cost of the
+    pair due to this ranking, see SparseCostMatrix.
+
+    :param ranking_offsets: The ranked elements of ranking r are ranked_elements[ranking_offsets[r]:
+                            ranking_offsets[r + 1]]
+    :param ranked_elements: The IDs of the ranked elements of each ranking, sorted
+    :param positions: The 2D ndarray matrix where positions[i][j] is the position of element int id i in ranking j
+    :param weights: a float64 array that associates a weight for each ranking
+    :param corrections_of_situations: The (3, 3) corrections of the costs when elem1 is before, after or tied with
+                                      elem2 in a ranking
+    :param nb_elem: The number of elements
+    :param keys: The 1D array to fill with the keys elem1 * nb_elem + elem2 of the pairs, one per ranking and pair
+    :param corrections: The (len(keys), 3) array to fill with the corrections of the pairs
+    :return: None
+    """
+    index = 0
+    for id_ranking in range(ranking_offsets.shape[0] - 1):
+        weight = weights[id_ranking]
+        end = ranking_offsets[id_ranking + 1]
+        for i in range(ranking_offsets[id_ranking], end):
+            elem1 = ranked_elements[i]
+            pos_elem1 = positions[elem1, id_ranking]
+            for j in range(i + 1, end):
+                elem2 = ranked_elements[j]
+                pos_elem2 = positions[elem2, id_ranking]
+                if pos_elem1 < pos_elem2:
+                    situation = 0
+                elif pos_elem1 > pos_elem2:
+                    situation = 1
                 else:
-                    cost_elem1_elem2[0] += weighted_b_vector[id_ranking][5]
-                    cost_elem1_elem2[1] += weighted_b_vector[id_ranking][5]
-                    cost_elem1_elem2[2] += weighted_t_vector[id_ranking][5]
+                    situation = 2
+                keys[index] = elem1 * nb_elem + elem2
+                corrections[index, 0] = weight * corrections_of_situations[situation, 0]
+                corrections[index, 1] = weight * corrections_of_situations[situation, 1]
+                corrections[index, 2] = weight * corrections_of_situations[situation, 2]
+                index += 1
 
-            # matrix is symmetric
-            matrix[elem2][elem1][0] = cost_elem1_elem2[1]
-            matrix[elem2][elem1][1] = cost_elem1_elem2[0]
-            matrix[elem2][elem1][2] = cost_elem1_elem2[2]
 
-    return matrix
+@jit("void(float64[:, :], int64, float64, float64[:], float64[:, :], int64[:], int64[:], float64[:, :])",
+     nopython=True, cache=True)
+def _fill_costs_of_element(costs, elem1, total_weight, ranked_weights, costs_of_situations, row_offsets, columns,
+                           corrections):
+    """
+    Computes the costs of the pairs (elem1, elem2) for all the elements elem2 from a sparse cost matrix, see
+    SparseCostMatrix. costs[elem1] is not meaningful.
+
+    :param costs: The (nb_elem, 3) array to fill, costs[elem2] = cost to have elem1 before, after, tied with elem2
+    :param elem1: The element
+    :param total_weight: The sum of the weights of the rankings
+    :param ranked_weights: ranked_weights[x] = sum of the weights of the rankings where x is ranked
+    :param costs_of_situations: The (6, 3) costs of the situations, see PairwiseBasedAlgorithm._costs_of_situations
+    :param row_offsets: The corrections of the pairs (elem1, y) are corrections[row_offsets[elem1]:row_offsets[elem1+1]]
+    :param columns: The elements y of the corrections
+    :param corrections: The (nnz, 3) corrections of the co-ranked pairs
+    :return: None
+    """
+    weight_elem1 = ranked_weights[elem1]
+    for k in range(3):
+        default = total_weight * costs_of_situations[5, k]
+        only_elem1 = costs_of_situations[3, k] - costs_of_situations[5, k]
+        only_elem2 = costs_of_situations[4, k] - costs_of_situations[5, k]
+        for elem2 in range(costs.shape[0]):
+            # the element terms are summed first: if elem1 and elem2 are never ranked together, the costs to have
+            # elem1 before and after elem2 are then exactly equal when they are ranked in rankings of equal weights
+            costs[elem2, k] = default + (weight_elem1 * only_elem1 + ranked_weights[elem2] * only_elem2)
+    for index in range(row_offsets[elem1], row_offsets[elem1 + 1]):
+        elem2 = columns[index]
+        costs[elem2, 0] += corrections[index, 0]
+        costs[elem2, 1] += corrections[index, 1]
+        costs[elem2, 2] += corrections[index, 2]
+
+
+@jit(["void(float64, float64[:], float64[:, :], int64[:], int64[:], float64[:, :], float64[:, :])",
+      "void(float64, float64[:], float64[:, :], int64[:], int64[:], float64[:, :], float32[:, :])",
+      "void(float64, float64[:], float64[:, :], int64[:], int64[:], float64[:, :], int32[:, :])"],
+     nopython=True, cache=True)
+def _fill_packed_cost_matrix_of_sparse(total_weight, ranked_weights, costs_of_situations, row_offsets, columns,
+                                       corrections, packed):
+    """
+    Computes the packed cost matrix of a sparse cost matrix, see SparseCostMatrix.to_packed.
+
+    :param packed: The (nb_elem * (nb_elem - 1) / 2, 3) matrix to fill
+    :return: None
+    """
+    nb_elem = ranked_weights.shape[0]
+    costs = zeros((nb_elem, 3))
+    index = 0
+    for elem1 in range(nb_elem):
+        _fill_costs_of_element(costs, elem1, total_weight, ranked_weights, costs_of_situations, row_offsets, columns,
+                               corrections)
+        for elem2 in range(elem1 + 1, nb_elem):
+            packed[index, 0] = costs[elem2, 0]
+            packed[index, 1] = costs[elem2, 1]
+            packed[index, 2] = costs[elem2, 2]
+            index += 1
+
+
+@jit("void(float64, float64[:], float64[:, :], int64[:], int64[:], float64[:, :], uint64[:, :], uint64[:, :])",
+     nopython=True, cache=True)
+def _set_arcs_of_sparse(total_weight, ranked_weights, costs_of_situations, row_offsets, columns, corrections,
+                        out_arcs, in_arcs):
+    """
+    Sets the bits of the arcs of the graph of elements of a sparse cost matrix, see _set_arcs_of_tile.
+
+    :param out_arcs: The (nb_elem, nb_words) bitsets of the successors of each element
+    :param in_arcs: The (nb_elem, nb_words) bitsets of the predecessors of each element
+    :return: None
+    """
+    nb_elem = ranked_weights.shape[0]
+    costs = zeros((nb_elem, 3))
+    for elem1 in range(nb_elem):
+        _fill_costs_of_element(costs, elem1, total_weight, ranked_weights, costs_of_situations, row_offsets, columns,
+                               corrections)
+        for elem2 in range(elem1 + 1, nb_elem):
+            put_before = costs[elem2, 0]
+            put_after = costs[elem2, 1]
+            put_tied = costs[elem2, 2]
+            if put_after > put_before or put_after > put_tied:
+                out_arcs[elem1, elem2 >> 6] |= uint64(1) << uint64(elem2 & 63)
+                in_arcs[elem2, elem1 >> 6] |= uint64(1) << uint64(elem1 & 63)
+            if put_before > put_after or put_before > put_tied:
+                out_arcs[elem2, elem1 >> 6] |= uint64(1) << uint64(elem1 & 63)
+                in_arcs[elem1, elem2 >> 6] |= uint64(1) << uint64(elem2 & 63)
+
+
+def _run_with_threads(nb_threads: int, kernel, *args):
+    """
+    Calls a parallel numba kernel with at most nb_threads threads, the number of threads of numba being restored after
+    the call.
+
+    :param nb_threads: the maximal number of threads to use, capped by numba.config.NUMBA_NUM_THREADS
+    :param kernel: the numba kernel to call
+    :param args: the arguments of the kernel
+    :return: the value returned by the kernel
+    """
+    previous_nb_threads: int = get_num_threads()
+    set_num_threads(max(1, min(nb_threads, config.NUMBA_NUM_THREADS)))
+    try:
+        return kernel(*args)
+    finally:
+        set_num_threads(previous_nb_threads)
 
 
 class PairwiseBasedAlgorithm:
@@ -102,9 +852,34 @@ class PairwiseBasedAlgorithm:
     Class to gather several useful methods for pairwise based algorithms. Class for code factorisation.
     """
 
+    # cache of the pairwise matrices consulted by the helpers of the class, see set_matrix_cache
+    _matrix_cache: 'PairwiseMatrixCache' = None
+
+    @staticmethod
+    def set_matrix_cache(cache: 'PairwiseMatrixCache') -> 'PairwiseMatrixCache':
+        """
+        Installs a cache of the pairwise matrices: pairwise_cost_matrix, pairwise_cost_matrix_packed,
+        pairwise_situation_counts and the graph_of_elements methods then look for the matrix of the same rankings,
+        weights and scoring scheme in the cache before computing it, whichever algorithm calls them.
+
+        :param cache: the cache to install, None to remove the current one
+        :return: the cache previously installed, None if there was none
+        """
+        previous: PairwiseMatrixCache = PairwiseBasedAlgorithm._matrix_cache
+        PairwiseBasedAlgorithm._matrix_cache = cache
+        return previous
+
+    @staticmethod
+    def matrix_cache() -> 'PairwiseMatrixCache':
+        """
+        :return: the cache of the pairwise matrices installed with set_matrix_cache, None if there is none
+        """
+        return PairwiseBasedAlgorithm._matrix_cache
+
     @staticmethod
     def graph_of_elements_with_robust_arcs(positions: ndarray, scoring_scheme: ScoringScheme,
-                                           weights: ndarray = None) -> Tuple[Graph, ndarray, Set[Tuple[int, int]]]:
+                                           weights: ndarray = None,
+                                           packed: bool = False) -> Tuple[Graph, ndarray, Set[Tuple[int, int]]]:
         """
         Compute the graph of elements, the cost of pairwise relative positions and the set of robust arcs defined in the
         Future Generation Computer Systems article (as mentioned in the Class docstring)
@@ -117,20 +892,22 @@ class PairwiseBasedAlgorithm:
         :param positions: a matrix where pos[i][j] denotes the position of element i in ranking j (-1 if non-ranked)
         :param scoring_scheme: the scoring scheme to compute the cost matrix
         :param weights: a 1D float array that associates a weight for each ranking
+        :param packed: if True, the cost matrix is computed and returned in packed form, see
+        pairwise_cost_matrix_packed
         :return: A tuple containing the Graph of elements defined in the FGCS article, the 3D matrix of costs of
         pairwise relative positions, and the set of the robust arcs defined in the FGCS article
         """
         if weights is None:
             weights = ones(positions.shape[1], dtype=float)
         assert weights.shape[0] == positions.shape[1]
-        pairwise_matrix: ndarray = PairwiseBasedAlgorithm.pairwise_cost_matrix(positions, scoring_scheme, weights)
+        pairwise_matrix: ndarray = PairwiseBasedAlgorithm._cost_matrix(positions, scoring_scheme, weights, packed)
         return (PairwiseBasedAlgorithm._get_graph_of_elements_from_matrix(pairwise_matrix),
                 pairwise_matrix,
                 PairwiseBasedAlgorithm._get_robust_arcs_from_matrix(pairwise_matrix))
 
     @staticmethod
     def graph_of_elements(positions: ndarray, scoring_scheme: ScoringScheme,
-                          weights: ndarray = None) -> Tuple[Graph, ndarray]:
+                          weights: ndarray = None, packed: bool = False) -> Tuple[Graph, ndarray]:
         """
         Compute the graph of elements, the cost of pairwise relative positions and the set of robust arcs defined in the
         Future Generation Computer Systems article (as mentioned in the Class docstring)
@@ -143,6 +920,8 @@ class PairwiseBasedAlgorithm:
         :param positions: a matrix where pos[i][j] denotes the position of element i in ranking j (-1 if non-ranked)
         :param scoring_scheme: the Scoring Scheme to compute the cost matrix
         :param weights: a 1D float array that associates a weight for each ranking
+        :param packed: if True, the cost matrix is computed and returned in packed form, see
+        pairwise_cost_matrix_packed
         :return: A tuple containing the Graph of elements defined in the FGCS article, the 3D matrix of costs of
         pairwise relative positions
         """
@@ -150,83 +929,1248 @@ class PairwiseBasedAlgorithm:
             weights = ones(positions.shape[1], dtype=float)
         assert weights.shape[0] == positions.shape[1]
 
-        pairwise_matrix: ndarray = PairwiseBasedAlgorithm.pairwise_cost_matrix(positions, scoring_scheme, weights)
+        pairwise_matrix: ndarray = PairwiseBasedAlgorithm._cost_matrix(positions, scoring_scheme, weights, packed)
         return PairwiseBasedAlgorithm._get_graph_of_elements_from_matrix(pairwise_matrix), pairwise_matrix
 
     @staticmethod
-    def pairwise_cost_matrix(positions: ndarray, scoring_scheme: ScoringScheme, weights: ndarray = None) -> ndarray:
+    def components_of_graph_of_elements(cost_matrix: ndarray) -> List[List[int]]:
+        """
+        Strongly connected components of the graph of elements defined in the FGCS article, computed directly from the
+        cost matrix without building the graph: the arc (i, j) exists iff the cost of i after j is not the cheapest.
+        The arcs are stored in two bitsets, successors and predecessors of each element, that is nb_elements² / 4
+        bytes, and the components are found by Kosaraju's algorithm in O(nb_elements² / 64) word operations.
+
+        :param cost_matrix: a cost matrix, dense (see pairwise_cost_matrix) or packed (see pairwise_cost_matrix_packed)
+        :return: the list of the strongly connected components of the graph of elements, in a topological order, the
+                 IDs of the elements of a component being sorted
+        """
+        nb_elements: int = PairwiseBasedAlgorithm.nb_elements_of_cost_matrix(cost_matrix)
+        nb_words: int = (nb_elements + 63) // 64
+        out_arcs: ndarray = zeros((nb_elements, nb_words), dtype=uint64)
+        in_arcs: ndarray = zeros((nb_elements, nb_words), dtype=uint64)
+        if cost_matrix.ndim == 3:
+            _set_arcs_of_dense_cost_matrix(asarray(cost_matrix, dtype=float64), out_arcs, in_arcs)
+        else:
+            _set_arcs_of_tile(cost_matrix, 0, 1, nb_elements, out_arcs, in_arcs)
+        return PairwiseBasedAlgorithm._lists_of_components(
+            _strongly_connected_components(out_arcs, in_arcs, nb_elements))
+
+    @staticmethod
+    def robust_arcs(cost_matrix: ndarray) -> Set[Tuple[int, int]]:
+        """
+        :param cost_matrix: a cost matrix, dense (see pairwise_cost_matrix) or packed (see pairwise_cost_matrix_packed)
+        :return: the set of the robust arcs defined in the FGCS article, that is the pairs (i, j) such that i before j
+                 is strictly the cheapest
+        """
+        return PairwiseBasedAlgorithm._get_robust_arcs_from_matrix(cost_matrix)
+
+    @staticmethod
+    def _lists_of_components(components: ndarray) -> List[List[int]]:
+        """
+        :param components: the 1D array of the strongly connected component of each element, the components being
+                           numbered in a topological order, see _strongly_connected_components
+        :return: the list of the components in a topological order, the IDs of the elements of a component being sorted
+        """
+        # elements sorted by component, then by ID
+        elements: ndarray = argsort(components, kind="stable")
+        return [component.tolist() for component in split(elements, cumsum(bincount(components))[:-1])]
+
+    @staticmethod
+    def pairwise_cost_matrix(positions: ndarray, scoring_scheme: ScoringScheme, weights: ndarray = None,
+                             nb_threads: int = None, nb_processes: int = 1) -> ndarray:
         """
         Compute the cost of pairwise relative positions.
 
         This function computes the cost of pairwise relative positions.
         The latter is a 3D matrix where matrix[i][j][0], then [1], then [2] denote the cost to have i before j,
         i after j, i tied with j in the consensus according to the scoring scheme.
+        The matrix is computed with several threads when nb_elements² * nb_rankings / 2 is at least PARALLEL_THRESHOLD;
+        the result is exactly the same as with a single thread.
 
         :param positions: a matrix where pos[i][j] denotes the position of element i in ranking j (-1 if non-ranked)
         :param scoring_scheme: the scoring scheme to compute the cost matrix
         :param weights: a 1D float array that associates a weight for each ranking
-        :return: The 3D matrix of costs of pairwise relative positions.
+        :param nb_threads: the maximal number of threads to use, the number of threads of numba by default. Cannot
+                           exceed numba.config.NUMBA_NUM_THREADS.
+        :param nb_processes: if greater than 1, the rankings are split in nb_processes shards whose cost matrices are
+                             computed in worker processes then summed, see PartialPairwiseMatrix. The result is then
+                             the same up to floating point rounding.
+        :return: The 3D matrix of costs of pairwise relative positions. If a cache is installed (see set_matrix_cache),
+                 the matrix may come from the cache and must not be modified.
         """
         if weights is None:
             weights = ones(positions.shape[1], dtype=float)
         assert weights.shape[0] == positions.shape[1]
+        return PairwiseBasedAlgorithm._cached(
+            "dense", positions, weights, scoring_scheme.penalty_vectors,
+            lambda: PairwiseBasedAlgorithm._compute_pairwise_cost_matrix(positions, scoring_scheme, weights,
+                                                                         nb_threads, nb_processes))
+
+    @staticmethod
+    def _compute_pairwise_cost_matrix(positions: ndarray, scoring_scheme: ScoringScheme, weights: ndarray,
+                                      nb_threads: int, nb_processes: int = 1) -> ndarray:
+        """
+        :return: the cost matrix computed without consulting the cache, see pairwise_cost_matrix
+        """
+        if nb_processes > 1:
+            return PartialPairwiseMatrix.compute(positions, weights, scoring_scheme, nb_shards=nb_processes,
+                                                 nb_processes=nb_processes).cost_matrix()
         nb_elem = positions.shape[0]
         nb_rankings = positions.shape[1]
-        return _pairwise_cost_matrix_only(positions, asarray(scoring_scheme.penalty_vectors),
-                                          weights, nb_elem, nb_rankings)
+        kind: int = PairwiseBasedAlgorithm.kind_of_rankings(positions)
+        if nb_threads is None:
+            nb_threads = get_num_threads()
+        if min(nb_threads, config.NUMBA_NUM_THREADS) <= 1 or \
+                nb_elem * (nb_elem - 1) // 2 * nb_rankings < PARALLEL_THRESHOLD:
+            return _pairwise_cost_matrix_only(positions, asarray(scoring_scheme.penalty_vectors),
+                                              weights, nb_elem, nb_rankings, kind)
+        return _run_with_threads(nb_threads, _pairwise_cost_matrix_parallel, positions,
+                                 asarray(scoring_scheme.penalty_vectors), weights, nb_elem, nb_rankings, kind)
 
     @staticmethod
-    def _get_robust_arcs_from_matrix(matrix: ndarray) -> Set[Tuple[int, int]]:
-        # pairs i,j where matrix[i][j][1] > matrix[i, j, 0] i.e. i before j cheaper than i after j
-        before_cheaper_after = matrix[:, :, 1] > matrix[:, :, 0]
-        # pairs i,j where matrix[i][j][2] > matrix[i, j, 0] i.e. i before j cheaper than i tied with j
-        before_cheaper_tied = matrix[:, :, 2] > matrix[:, :, 0]
+    def pairwise_cost_matrix_packed(positions: ndarray, scoring_scheme: ScoringScheme, weights: ndarray = None,
+                                    dtype: type = float64, nb_threads: int = None) -> ndarray:
+        """
+        Compute the cost of pairwise relative positions in packed form: as the cost to have j before i is the cost to
+        have i before j, only the pairs i < j are stored, in a 2D matrix where packed[k][0], then [1], then [2] denote
+        the cost to have i before j, i after j, i tied with j in the consensus, k being the index of the pair (i, j) in
+        the row-major order of the upper triangle, see packed_index. The matrix can be stored in float32, halving again
+        the memory, or in int32 when all the costs are integers.
 
-        return {(elem1, elem2) for elem1, elem2 in
-                column_stack(where(logical_and(before_cheaper_after, before_cheaper_tied)))}
+        :param positions: a matrix where pos[i][j] denotes the position of element i in ranking j (-1 if non-ranked)
+        :param scoring_scheme: the scoring scheme to compute the cost matrix
+        :param weights: a 1D float array that associates a weight for each ranking
+        :param dtype: the type of the costs, float64, float32 or int32
+        :param nb_threads: the maximal number of threads to use, the number of threads of numba by default
+        :raise ValueError: if the dtype is not supported, or if dtype is int32 and the costs are not integers that fit
+                           in int32
+        :return: The (nb_elements * (nb_elements - 1) / 2, 3) matrix of costs of pairwise relative positions. If a cache
+                 is installed (see set_matrix_cache), the matrix may come from the cache and must not be modified.
+        """
+        if weights is None:
+            weights = ones(positions.shape[1], dtype=float)
+        assert weights.shape[0] == positions.shape[1]
+        dtype = PairwiseBasedAlgorithm._check_dtype_of_packed_cost_matrix(scoring_scheme, weights, dtype)
+        return PairwiseBasedAlgorithm._cached(
+            f"packed_{dtype.name}", positions, weights, scoring_scheme.penalty_vectors,
+            lambda: PairwiseBasedAlgorithm._compute_pairwise_cost_matrix_packed(positions, scoring_scheme, weights,
+                                                                                dtype, nb_threads))
 
     @staticmethod
-    def _get_graph_of_elements_from_matrix(matrix: ndarray) -> Graph:
-        graph_of_elements: Graph = Graph(directed=True)
+    def _compute_pairwise_cost_matrix_packed(positions: ndarray, scoring_scheme: ScoringScheme, weights: ndarray,
+                                             dtype: np_dtype, nb_threads: int) -> ndarray:
+        """
+        :return: the packed cost matrix computed without consulting the cache, see pairwise_cost_matrix_packed
+        """
+        nb_elem: int = positions.shape[0]
+        packed: ndarray = zeros((nb_elem * (nb_elem - 1) // 2, 3), dtype=dtype)
+        _run_with_threads(nb_threads if nb_threads is not None else get_num_threads(), _fill_packed_cost_matrix,
+                          positions, asarray(scoring_scheme.penalty_vectors, dtype=float64),
+                          weights.astype(float64, copy=False), nb_elem, positions.shape[1], packed,
+                          PairwiseBasedAlgorithm.kind_of_rankings(positions))
+        return packed
 
-        # add a vertex for each element
-        for i in range(shape(matrix)[0]):
-            graph_of_elements.add_vertex(name=str(i))
+    @staticmethod
+    def kind_of_rankings(positions: ndarray) -> int:
+        """
+        Finds which specialised kernel can compute the pairwise costs of the rankings. The costs are identical whatever
+        the kernel, the specialised ones skip the branches on non-ranked elements and on ties.
 
-        # pairs i,j where matrix[i][j][1] > matrix[i, j, 0] i.e. i before j cheaper than i after j
-        before_cheaper_after = matrix[:, :, 1] > matrix[:, :, 0]
-        # pairs i,j where matrix[i][j][1] > matrix[i, j, 2] i.e. i tied with j cheaper than i after j
-        tied_cheaper_after = matrix[:, :, 1] > matrix[:, :, 2]
-        after_not_cheapest = logical_or(before_cheaper_after, tied_cheaper_after)
-        # arcs of the graph: pairs (i, j) where cost of i after j is not the cheapest
-        # arcs should be added all at once, the impact on performances is clear
-        graph_of_elements.add_edges(list(column_stack(where(after_not_cheapest))))
+        :param positions: a matrix where pos[i][j] denotes the position of element i in ranking j (-1 if non-ranked)
+        :return: COMPLETE_RANKINGS_WITHOUT_TIES if each ranking is a permutation of the elements, COMPLETE_RANKINGS if
+                 all the elements are ranked in all the rankings, GENERIC_RANKINGS otherwise
+        """
+        nb_elem: int = positions.shape[0]
+        if positions.size == 0 or positions.min() < 0:
+            return GENERIC_RANKINGS
+        # the position of an element is the number of elements ranked before it: a complete ranking has no ties iff its
+        # positions are 0, 1, ..., nb_elem - 1, otherwise the sum of its positions is lower
+        if np_all(np_sum(positions, axis=0, dtype=int64) == nb_elem * (nb_elem - 1) // 2):
+            return COMPLETE_RANKINGS_WITHOUT_TIES
+        return COMPLETE_RANKINGS
 
-        return graph_of_elements
+    @staticmethod
+    def _check_dtype_of_packed_cost_matrix(scoring_scheme: ScoringScheme, weights: ndarray, dtype: type) -> np_dtype:
+        """
+        :param scoring_scheme: the scoring scheme to compute the cost matrix
+        :param weights: a 1D float array that associates a weight for each ranking
+        :param dtype: the type of the costs, float64, float32 or int32
+        :raise ValueError: if the dtype is not supported, or if dtype is int32 and the costs are not integers that fit
+                           in int32
+        :return: the numpy dtype of the packed cost matrix
+        """
+        dtype = np_dtype(dtype)
+        if dtype not in (np_dtype(float64), np_dtype(float32), np_dtype(int32)):
+            raise ValueError(f"Unsupported dtype for a packed cost matrix: {dtype}")
+        if dtype == int32:
+            penalties: ndarray = asarray(scoring_scheme.penalty_vectors, dtype=float64)
+            weighted_penalties: ndarray = penalties[:, :, newaxis] * weights
+            if not np_all(weighted_penalties == np_round(weighted_penalties)) or \
+                    np_sum(np_abs(weights)) * np_max(penalties) >= iinfo(int32).max:
+                raise ValueError("The costs must be integers that fit in int32 to be stored as int32")
+        return dtype
 
     @staticmethod
-    def can_be_all_tied(id_elements_to_check: Set[int], cost_matrix: ndarray) -> bool:
+    def packed_index(elem1: int, elem2: int, nb_elements: int) -> int:
         """
-        Check if all elements in a given set can be tied together with minimal cost.
+        :param elem1: the ID of an element
+        :param elem2: the ID of another element, elem1 < elem2
+        :param nb_elements: the number of elements
+        :return: the index of the pair (elem1, elem2) in a packed cost matrix, see pairwise_cost_matrix_packed
+        """
+        return elem1 * (2 * nb_elements - elem1 - 1) // 2 + elem2 - elem1 - 1
 
-        This method goes through all pairs of elements in the given set, checking the cost of tying them together.
-        If the cost of tying any pair is higher than placing one before or after the other, the function returns False,
-        indicating that not all elements in the set can be tied together with minimal cost.
+    @staticmethod
+    def nb_elements_of_cost_matrix(cost_matrix: ndarray) -> int:
+        """
+        :param cost_matrix: a cost matrix, dense (n, n, 3) or packed (n * (n - 1) / 2, 3)
+        :return: the number of elements n of the matrix. A packed matrix without any pair is considered to have one
+                 element
+        """
+        if cost_matrix.ndim == 3:
+            return cost_matrix.shape[0]
+        return (1 + isqrt(1 + 8 * cost_matrix.shape[0])) // 2
 
-        :param id_elements_to_check: a set of IDs of the elements to be checked.
-        :type id_elements_to_check: Set[int]
-        :param cost_matrix: a 3D matrix where cost_matrix[i][j][k] denotes the cost of placing i and j in
-                            k-th relative position in the consensus.
-        :type cost_matrix: ndarray
-        :return: True if all elements can be tied together with minimal cost, False otherwise.
-        :rtype: bool
+    @staticmethod
+    def costs_of_pair(cost_matrix: ndarray, elem1: int, elem2: int) -> ndarray:
         """
-        if len(id_elements_to_check) < 2:
-            return True
-        for el_1, el_2 in combinations(id_elements_to_check, 2):
-            cost_to_tie = cost_matrix[el_1][el_2][2]
-            cost_to_place_before = cost_matrix[el_1][el_2][0]
-            cost_to_place_after = cost_matrix[el_1][el_2][1]
-            if cost_to_tie > min(cost_to_place_before, cost_to_place_after):
-                return False
-        return True
+        :param cost_matrix: a cost matrix, dense (n, n, 3) or packed (n * (n - 1) / 2, 3)
+        :param elem1: the ID of an element
+        :param elem2: the ID of another element
+        :return: the 1D array of the costs to have elem1 before elem2, elem1 after elem2, elem1 tied with elem2 in the
+                 consensus
+        """
+        if cost_matrix.ndim == 3:
+            return cost_matrix[elem1][elem2]
+        nb_elements: int = PairwiseBasedAlgorithm.nb_elements_of_cost_matrix(cost_matrix)
+        if elem1 < elem2:
+            return cost_matrix[PairwiseBasedAlgorithm.packed_index(elem1, elem2, nb_elements)]
+        return cost_matrix[PairwiseBasedAlgorithm.packed_index(elem2, elem1, nb_elements)][[1, 0, 2]]
+
+    @staticmethod
+    def pack_cost_matrix(cost_matrix: ndarray, dtype: type = float64) -> ndarray:
+        """
+        :param cost_matrix: a dense (n, n, 3) cost matrix
+        :param dtype: the type of the packed matrix
+        :return: the packed form of the matrix, see pairwise_cost_matrix_packed
+        """
+        first, second = triu_indices(cost_matrix.shape[0], 1)
+        return cost_matrix[first, second].astype(dtype)
+
+    @staticmethod
+    def unpack_cost_matrix(packed: ndarray) -> ndarray:
+        """
+        :param packed: a packed cost matrix, see pairwise_cost_matrix_packed
+        :return: the dense (n, n, 3) float64 cost matrix
+        """
+        nb_elements: int = PairwiseBasedAlgorithm.nb_elements_of_cost_matrix(packed)
+        matrix: ndarray = zeros((nb_elements, nb_elements, 3))
+        first, second = triu_indices(nb_elements, 1)
+        matrix[first, second] = packed
+        matrix[second, first] = packed[:, [1, 0, 2]]
+        return matrix
+
+    @staticmethod
+    def _pairs_of_packed_indices(indices: ndarray, nb_elements: int) -> Tuple[ndarray, ndarray]:
+        """
+        :param indices: 1D array of indices of pairs in a packed cost matrix
+        :param nb_elements: the number of elements
+        :return: the two 1D arrays of the first and second elements of the pairs
+        """
+        rows: ndarray = arange(nb_elements, dtype=int64)
+        # index of the pair (i, i + 1) for each i
+        starts_of_rows: ndarray = rows * (2 * nb_elements - rows - 1) // 2
+        first: ndarray = searchsorted(starts_of_rows, indices, side="right") - 1
+        return first, indices - starts_of_rows[first] + first + 1
+
+    @staticmethod
+    def _cost_matrix(positions: ndarray, scoring_scheme: ScoringScheme, weights: ndarray, packed: bool) -> ndarray:
+        """
+        :return: the cost matrix, packed or not, see pairwise_cost_matrix and pairwise_cost_matrix_packed
+        """
+        if packed:
+            return PairwiseBasedAlgorithm.pairwise_cost_matrix_packed(positions, scoring_scheme, weights)
+        return PairwiseBasedAlgorithm.pairwise_cost_matrix(positions, scoring_scheme, weights)
+
+    @staticmethod
+    def pairwise_situation_counts(positions: ndarray, weights: ndarray = None, nb_threads: int = None) -> ndarray:
+        """
+        Compute the weighted counts of the relative positions of each pair of elements in the rankings. Contrary to the
+        pairwise cost matrix, the counts do not depend on the scoring scheme: once computed, the cost matrix of any
+        scoring scheme is obtained with cost_matrix_from_situation_counts, without reading the rankings again.
+
+        :param positions: a matrix where pos[i][j] denotes the position of element i in ranking j (-1 if non-ranked)
+        :param weights: a 1D float array that associates a weight for each ranking
+        :param nb_threads: the maximal number of threads to use, the number of threads of numba by default
+        :return: A 3D tensor where counts[x][y] is the total weight of the rankings where x is before y, x is after y,
+                 x is tied with y, only x is ranked, only y is ranked, and neither x nor y is ranked. If a cache is
+                 installed (see set_matrix_cache), the counts may come from the cache and must not be modified.
+        """
+        if weights is None:
+            weights = ones(positions.shape[1], dtype=float)
+        assert weights.shape[0] == positions.shape[1]
+        return PairwiseBasedAlgorithm._cached(
+            "situation_counts", positions, weights, None,
+            lambda: PairwiseBasedAlgorithm._compute_pairwise_situation_counts(positions, weights, nb_threads))
+
+    @staticmethod
+    def _compute_pairwise_situation_counts(positions: ndarray, weights: ndarray, nb_threads: int) -> ndarray:
+        """
+        :return: the situation counts computed without consulting the cache, see pairwise_situation_counts
+        """
+        return _run_with_threads(nb_threads if nb_threads is not None else get_num_threads(),
+                                 _pairwise_situation_counts, positions, weights.astype(float64, copy=False),
+                                 positions.shape[0], positions.shape[1])
+
+    @staticmethod
+    def _cached(form: str, positions: ndarray, weights: ndarray, penalty_vectors: List[List[float]],
+                compute: Callable[[], ndarray]) -> ndarray:
+        """
+        :param form: the form of the matrix, see PairwiseMatrixCache.key
+        :param positions: a matrix where pos[i][j] denotes the position of element i in ranking j (-1 if non-ranked)
+        :param weights: a 1D float array that associates a weight for each ranking
+        :param penalty_vectors: the penalty vectors of the scoring scheme, None for the situation counts
+        :param compute: the function that computes the matrix
+        :return: the matrix from the cache installed with set_matrix_cache if any, computed otherwise
+        """
+        cache: PairwiseMatrixCache = PairwiseBasedAlgorithm._matrix_cache
+        if cache is None:
+            return compute()
+        return cache.get_or_compute(PairwiseMatrixCache.key(form, positions, weights, penalty_vectors), compute)
+
+    @staticmethod
+    def cost_matrix_from_situation_counts(situation_counts: ndarray, scoring_scheme: ScoringScheme) -> ndarray:
+        """
+        Compute the cost of pairwise relative positions from the weighted counts of the situations of the pairs, see
+        pairwise_situation_counts. The result is the matrix returned by pairwise_cost_matrix, up to floating point
+        rounding.
+
+        :param situation_counts: the (n, n, 6) tensor returned by pairwise_situation_counts
+        :param scoring_scheme: the scoring scheme to compute the cost matrix
+        :return: The 3D matrix of costs of pairwise relative positions.
+        """
+        return situation_counts @ PairwiseBasedAlgorithm._costs_of_situations(scoring_scheme)
+
+    @staticmethod
+    def _costs_of_situations(scoring_scheme: ScoringScheme) -> ndarray:
+        """
+        :param scoring_scheme: a scoring scheme
+        :return: The (6, 3) matrix whose cell [s][k] is the cost for a pair (x, y) in situation s in an input ranking,
+                 see pairwise_situation_counts, to have x before y (k = 0), x after y (k = 1), x tied with y (k = 2)
+                 in the consensus
+        """
+        b_vector: ndarray = asarray(scoring_scheme.b_vector, dtype=float64)
+        t_vector: ndarray = asarray(scoring_scheme.t_vector, dtype=float64)
+        # x after y in the consensus is y before x: the situations of (y, x) are the ones of (x, y) with before / after
+        # and only x / only y swapped
+        return column_stack((b_vector, b_vector[[1, 0, 2, 4, 3, 5]], t_vector))
+
+    @staticmethod
+    def _get_robust_arcs_from_matrix(matrix: ndarray) -> Set[Tuple[int, int]]:
+        if matrix.ndim == 2:
+            return PairwiseBasedAlgorithm._get_robust_arcs_from_packed_matrix(matrix)
+        # pairs i,j where matrix[i][j][1] > matrix[i, j, 0] i.e. i before j cheaper than i after j
+        before_cheaper_after = matrix[:, :, 1] > matrix[:, :, 0]
+        # pairs i,j where matrix[i][j][2] > matrix[i, j, 0] i.e. i before j cheaper than i tied with j
+        before_cheaper_tied = matrix[:, :, 2] > matrix[:, :, 0]
+
+        return {(elem1, elem2) for elem1, elem2 in
+                column_stack(where(logical_and(before_cheaper_after, before_cheaper_tied)))}
+
+    @staticmethod
+    def _get_robust_arcs_from_packed_matrix(packed: ndarray) -> Set[Tuple[int, int]]:
+        nb_elements: int = PairwiseBasedAlgorithm.nb_elements_of_cost_matrix(packed)
+        before, after, tied = packed[:, 0], packed[:, 1], packed[:, 2]
+        # pairs i < j where i before j is strictly the cheapest
+        first, second = PairwiseBasedAlgorithm._pairs_of_packed_indices(
+            flatnonzero(logical_and(after > before, tied > before)), nb_elements)
+        robust_arcs: Set[Tuple[int, int]] = set(zip(first.tolist(), second.tolist()))
+        # pairs i < j where j before i, i.e. i after j, is strictly the cheapest
+        first, second = PairwiseBasedAlgorithm._pairs_of_packed_indices(
+            flatnonzero(logical_and(before > after, tied > after)), nb_elements)
+        robust_arcs.update(zip(second.tolist(), first.tolist()))
+        return robust_arcs
+
+    @staticmethod
+    def _arcs_of_graph_of_elements(matrix: ndarray, nb_elements: int = None, first_index: int = 0) -> ndarray:
+        """
+        :param matrix: a cost matrix, dense or packed, or a tile of a packed cost matrix
+        :param nb_elements: the number of elements, mandatory for a tile
+        :param first_index: the index in the packed cost matrix of the first pair of the tile
+        :return: a (nb_arcs, 2) matrix of the arcs (i, j) of the graph of elements, that is the pairs such that the
+                 cost of i after j is not the cheapest, in lexicographic order
+        """
+        if matrix.ndim == 3:
+            # pairs i,j where matrix[i][j][1] > matrix[i, j, 0] i.e. i before j cheaper than i after j
+            before_cheaper_after = matrix[:, :, 1] > matrix[:, :, 0]
+            # pairs i,j where matrix[i][j][1] > matrix[i, j, 2] i.e. i tied with j cheaper than i after j
+            tied_cheaper_after = matrix[:, :, 1] > matrix[:, :, 2]
+            return column_stack(where(logical_or(before_cheaper_after, tied_cheaper_after)))
+        if nb_elements is None:
+            nb_elements = PairwiseBasedAlgorithm.nb_elements_of_cost_matrix(matrix)
+        before, after, tied = matrix[:, 0], matrix[:, 1], matrix[:, 2]
+        # arcs (i, j) with i < j, then arcs (j, i) with i < j, where the cost of i after j (resp. j after i) is not the
+        # cheapest
+        first, second = PairwiseBasedAlgorithm._pairs_of_packed_indices(
+            flatnonzero(logical_or(after > before, after > tied)) + first_index, nb_elements)
+        first_rev, second_rev = PairwiseBasedAlgorithm._pairs_of_packed_indices(
+            flatnonzero(logical_or(before > after, before > tied)) + first_index, nb_elements)
+        sources: ndarray = concatenate((first, second_rev))
+        targets: ndarray = concatenate((second, first_rev))
+        order: ndarray = lexsort((targets, sources))
+        return column_stack((sources[order], targets[order]))
+
+    @staticmethod
+    def _get_graph_of_elements_from_matrix(matrix: ndarray) -> Graph:
+        graph_of_elements: Graph = Graph(directed=True)
+
+        # add a vertex for each element, all at once
+        nb_elements: int = PairwiseBasedAlgorithm.nb_elements_of_cost_matrix(matrix)
+        graph_of_elements.add_vertices(nb_elements, attributes={"name": [str(i) for i in range(nb_elements)]})
+
+        # arcs of the graph: pairs (i, j) where cost of i after j is not the cheapest
+        # arcs should be added all at once, the impact on performances is clear
+        graph_of_elements.add_edges(list(PairwiseBasedAlgorithm._arcs_of_graph_of_elements(matrix)))
+
+        return graph_of_elements
+
+    @staticmethod
+    def kemeny_score_of_buckets(cost_matrix: ndarray, buckets: ndarray) -> float:
+        """
+        Kemeny score of a consensus computed from a cost matrix, in O(nb_elements²) whatever the number of rankings:
+        the score is the sum over the pairs of elements of the cost of their relative position in the consensus.
+
+        :param cost_matrix: a cost matrix, dense (n, n, 3) or packed (n * (n - 1) / 2, 3), see pairwise_cost_matrix
+        :param buckets: 1D array of size n, buckets[i] = the bucket of the element of ID i in the consensus
+        :return: the Kemeny score of the consensus
+        """
+        buckets = ascontiguousarray(buckets, dtype=int64)
+        if cost_matrix.ndim == 3:
+            return _score_of_buckets_in_dense_cost_matrix(ascontiguousarray(cost_matrix, dtype=float64), buckets)
+        return _score_of_buckets_in_tile(cost_matrix, 0, 1, buckets)
+
+    @staticmethod
+    def kemeny_score_from_cost_matrix(cost_matrix: ndarray, ranking: Ranking, dataset: Dataset) -> float:
+        """
+        Kemeny score of a consensus computed from the cost matrix of a dataset, see kemeny_score_of_buckets.
+
+        :param cost_matrix: the cost matrix of the dataset, dense or packed
+        :param ranking: the consensus, whose elements are the ones of the dataset
+        :param dataset: the dataset
+        :raise InvalidRankingsForComputingDistance: if the elements of the consensus are not the ones of the dataset
+        :return: the Kemeny score of the consensus
+        """
+        buckets, absent_by_bucket = KemenyComputingFactory.consensus_buckets(ranking, dataset)
+        # the pairs with an element absent from the dataset are not in the cost matrix
+        if absent_by_bucket.any():
+            raise InvalidRankingsForComputingDistance("The consensus must only contain elements of the Dataset")
+        return PairwiseBasedAlgorithm.kemeny_score_of_buckets(cost_matrix, buckets)
+
+    @staticmethod
+    def can_be_all_tied(id_elements_to_check: Set[int], cost_matrix: ndarray) -> bool:
+        """
+        Check if all elements in a given set can be tied together with minimal cost.
+
+        This method goes through all pairs of elements in the given set, checking the cost of tying them together.
+        If the cost of tying any pair is higher than placing one before or after the other, the function returns False,
+        indicating that not all elements in the set can be tied together with minimal cost.
+
+        :param id_elements_to_check: a set of IDs of the elements to be checked.
+        :type id_elements_to_check: Set[int]
+        :param cost_matrix: a 3D matrix where cost_matrix[i][j][k] denotes the cost of placing i and j in
+                            k-th relative position in the consensus, or its packed form.
+        :type cost_matrix: ndarray
+        :return: True if all elements can be tied together with minimal cost, False otherwise.
+        :rtype: bool
+        """
+        if len(id_elements_to_check) < 2:
+            return True
+        for el_1, el_2 in combinations(id_elements_to_check, 2):
+            cost_to_place_before, cost_to_place_after, cost_to_tie = \
+                PairwiseBasedAlgorithm.costs_of_pair(cost_matrix, el_1, el_2)
+            if cost_to_tie > min(cost_to_place_before, cost_to_place_after):
+                return False
+        return True
+
+
+class TiledCostMatrix:
+    """
+    Packed pairwise cost matrix (see PairwiseBasedAlgorithm.pairwise_cost_matrix_packed) stored in a memory-mapped .npy
+    file. The matrix is computed and read by tiles of tile_size consecutive pairs, so that the memory used does not
+    depend on the size of the matrix: only one tile is held in memory at a time. The graph of elements, its strongly
+    connected components and the Copeland scores can be computed by streaming over the tiles.
+    """
+
+    # default number of pairs of elements in a tile, 24 MB in float64
+    DEFAULT_TILE_SIZE: int = 1 << 20
+
+    def __init__(self, path: str, tile_size: int = DEFAULT_TILE_SIZE, temporary: bool = False):
+        """
+        Opens a tiled cost matrix previously computed with TiledCostMatrix.compute.
+
+        :param path: the path of the .npy file of the packed cost matrix
+        :param tile_size: the number of pairs of elements in a tile
+        :param temporary: if True, the file is removed when the matrix is closed
+        """
+        if tile_size < 1:
+            raise ValueError(f"The size of the tiles must be positive, got {tile_size}")
+        self._path: str = path
+        self._tile_size: int = tile_size
+        self._temporary: bool = temporary
+        self._matrix: ndarray = load(path, mmap_mode="r")
+        if self._matrix.ndim != 2 or self._matrix.shape[1] != 3:
+            raise ValueError(f"{path} does not contain a packed cost matrix")
+        self._nb_elements: int = PairwiseBasedAlgorithm.nb_elements_of_cost_matrix(self._matrix)
+
+    @staticmethod
+    def compute(positions: ndarray, scoring_scheme: ScoringScheme, weights: ndarray = None, path: str = None,
+                tile_size: int = DEFAULT_TILE_SIZE, dtype: type = float64, nb_threads: int = None,
+                directory: str = None) -> 'TiledCostMatrix':
+        """
+        Computes the packed pairwise cost matrix tile by tile, each tile being written in the memory-mapped file before
+        the next one is computed.
+
+        :param positions: a matrix where pos[i][j] denotes the position of element i in ranking j (-1 if non-ranked)
+        :param scoring_scheme: the scoring scheme to compute the cost matrix
+        :param weights: a 1D float array that associates a weight for each ranking
+        :param path: the path of the .npy file to create. If None, a temporary file is created in directory, and
+                     removed when the matrix is closed
+        :param tile_size: the number of pairs of elements in a tile
+        :param dtype: the type of the costs, float64, float32 or int32, see pairwise_cost_matrix_packed
+        :param nb_threads: the maximal number of threads to use, the number of threads of numba by default
+        :param directory: the directory of the temporary file, the default temporary directory if None
+        :raise ValueError: if the dtype is not supported, see pairwise_cost_matrix_packed
+        :return: the tiled cost matrix
+        """
+        if weights is None:
+            weights = ones(positions.shape[1], dtype=float)
+        assert weights.shape[0] == positions.shape[1]
+        dtype = PairwiseBasedAlgorithm._check_dtype_of_packed_cost_matrix(scoring_scheme, weights, dtype)
+        temporary: bool = path is None
+        if temporary:
+            file_descriptor, path = mkstemp(suffix=".npy", dir=directory)
+            os.close(file_descriptor)
+        nb_elem: int = positions.shape[0]
+        matrix: ndarray = open_memmap(path, mode="w+", dtype=dtype, shape=(nb_elem * (nb_elem - 1) // 2, 3))
+        penalties: ndarray = asarray(scoring_scheme.penalty_vectors, dtype=float64)
+        weights = weights.astype(float64, copy=False)
+        kind: int = PairwiseBasedAlgorithm.kind_of_rankings(positions)
+        for first_index in range(0, matrix.shape[0], tile_size):
+            first_elem1, first_elem2 = TiledCostMatrix._first_pair_of_tile(first_index, nb_elem)
+            _run_with_threads(nb_threads if nb_threads is not None else get_num_threads(),
+                              _fill_tile_of_packed_cost_matrix, positions, penalties, weights, nb_elem,
+                              positions.shape[1], first_elem1, first_elem2,
+                              asarray(matrix[first_index:first_index + tile_size]), kind)
+            matrix.flush()
+        del matrix
+        return TiledCostMatrix(path, tile_size, temporary)
+
+    @property
+    def path(self) -> str:
+        """
+        :return: the path of the .npy file of the packed cost matrix
+        """
+        return self._path
+
+    @property
+    def nb_elements(self) -> int:
+        """
+        :return: the number of elements
+        """
+        return self._nb_elements
+
+    @property
+    def tile_size(self) -> int:
+        """
+        :return: the number of pairs of elements in a tile
+        """
+        return self._tile_size
+
+    @property
+    def nb_tiles(self) -> int:
+        """
+        :return: the number of tiles
+        """
+        return -(-self._matrix.shape[0] // self._tile_size)
+
+    @property
+    def dtype(self) -> np_dtype:
+        """
+        :return: the type of the costs
+        """
+        return self._matrix.dtype
+
+    def tiles(self) -> Iterator[Tuple[int, int, ndarray]]:
+        """
+        :return: an iterator over the tiles of the packed cost matrix, each tile being given with its first pair
+                 (first_elem1, first_elem2): the tile contains the costs of the consecutive pairs of the packed matrix
+                 from this pair, see PairwiseBasedAlgorithm.pairwise_cost_matrix_packed
+        """
+        for first_index in range(0, self._matrix.shape[0], self._tile_size):
+            first_elem1, first_elem2 = TiledCostMatrix._first_pair_of_tile(first_index, self._nb_elements)
+            yield first_elem1, first_elem2, asarray(self._matrix[first_index:first_index + self._tile_size])
+
+    def costs_of_pair(self, elem1: int, elem2: int) -> ndarray:
+        """
+        :param elem1: the ID of an element
+        :param elem2: the ID of another element
+        :return: the 1D array of the costs to have elem1 before elem2, elem1 after elem2, elem1 tied with elem2 in the
+                 consensus
+        """
+        return PairwiseBasedAlgorithm.costs_of_pair(self._matrix, elem1, elem2)
+
+    def to_packed(self) -> ndarray:
+        """
+        :return: the packed cost matrix, loaded in memory
+        """
+        return self._matrix.copy()
+
+    def graph_of_elements(self) -> Graph:
+        """
+        :return: the graph of elements, see PairwiseBasedAlgorithm.graph_of_elements, the arcs being computed tile by
+                 tile
+        """
+        graph_of_elements: Graph = Graph(directed=True)
+        graph_of_elements.add_vertices(self._nb_elements, attributes={"name": [str(i) for i in
+                                                                             range(self._nb_elements)]})
+        for first_index in range(0, self._matrix.shape[0], self._tile_size):
+            graph_of_elements.add_edges(list(PairwiseBasedAlgorithm._arcs_of_graph_of_elements(
+                asarray(self._matrix[first_index:first_index + self._tile_size]), self._nb_elements, first_index)))
+        return graph_of_elements
+
+    def components(self) -> List[List[int]]:
+        """
+        Strongly connected components of the graph of elements. The arcs are streamed tile by tile into two bitsets,
+        successors and predecessors of each element, that is nb_elements² / 4 bytes, far less than the cost matrix.
+
+        :return: the list of the strongly connected components of the graph of elements, in a topological order, the
+                 IDs of the elements of a component being sorted
+        """
+        nb_words: int = (self._nb_elements + 63) // 64
+        out_arcs: ndarray = zeros((self._nb_elements, nb_words), dtype=uint64)
+        in_arcs: ndarray = zeros((self._nb_elements, nb_words), dtype=uint64)
+        for first_elem1, first_elem2, tile in self.tiles():
+            _set_arcs_of_tile(tile, first_elem1, first_elem2, self._nb_elements, out_arcs, in_arcs)
+        return PairwiseBasedAlgorithm._lists_of_components(
+            _strongly_connected_components(out_arcs, in_arcs, self._nb_elements))
+
+    def kemeny_score_of_buckets(self, buckets: ndarray) -> float:
+        """
+        :param buckets: 1D array, buckets[i] = the bucket of the element of ID i in the consensus
+        :return: the Kemeny score of the consensus, summed tile by tile, see
+                 PairwiseBasedAlgorithm.kemeny_score_of_buckets
+        """
+        buckets = ascontiguousarray(buckets, dtype=int64)
+        return sum(_score_of_buckets_in_tile(tile, first_elem1, first_elem2, buckets)
+                   for first_elem1, first_elem2, tile in self.tiles())
+
+    def close(self):
+        """
+        Releases the memory-mapped file, and removes it if it is temporary.
+        """
+        if self._matrix is not None:
+            self._matrix = None
+            if self._temporary:
+                os.remove(self._path)
+
+    def __enter__(self) -> 'TiledCostMatrix':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @staticmethod
+    def _first_pair_of_tile(first_index: int, nb_elements: int) -> Tuple[int, int]:
+        """
+        :param first_index: the index of a pair in the packed cost matrix
+        :param nb_elements: the number of elements
+        :return: the pair of elements at this index
+        """
+        first, second = PairwiseBasedAlgorithm._pairs_of_packed_indices(asarray([first_index], dtype=int64),
+                                                                         nb_elements)
+        return int(first[0]), int(second[0])
+
+
+class PartialPairwiseMatrix:
+    """
+    Sum over a subset of the rankings of the pairwise situation counts (see PairwiseBasedAlgorithm.
+    pairwise_situation_counts), or of the pairwise costs for a given scoring scheme (see PairwiseBasedAlgorithm.
+    pairwise_cost_matrix). Both are sums over the rankings: the rankings can be split in shards whose partial matrices
+    are computed independently, in different processes or on different machines, then combined by summation. Partial
+    matrices are saved in and loaded from binary files, see corankco.utils.write_binary_arrays.
+    """
+
+    def __init__(self, matrix: ndarray, nb_rankings: int, scoring_scheme: ScoringScheme = None):
+        """
+        :param matrix: the (n, n, 6) situation counts if scoring_scheme is None, the (n, n, 3) cost matrix otherwise
+        :param nb_rankings: the number of rankings summed in the matrix
+        :param scoring_scheme: the scoring scheme of the cost matrix, None for situation counts
+        """
+        if matrix.ndim != 3 or matrix.shape[2] != (6 if scoring_scheme is None else 3):
+            raise ValueError(f"Unexpected shape for a partial pairwise matrix: {matrix.shape}")
+        self._matrix: ndarray = matrix
+        self._nb_rankings: int = nb_rankings
+        self._scoring_scheme: ScoringScheme = scoring_scheme
+
+    @property
+    def matrix(self) -> ndarray:
+        """
+        :return: the (n, n, 6) situation counts or the (n, n, 3) cost matrix
+        """
+        return self._matrix
+
+    @property
+    def nb_rankings(self) -> int:
+        """
+        :return: the number of rankings summed in the matrix
+        """
+        return self._nb_rankings
+
+    @property
+    def nb_elements(self) -> int:
+        """
+        :return: the number of elements
+        """
+        return self._matrix.shape[0]
+
+    @property
+    def scoring_scheme(self) -> ScoringScheme:
+        """
+        :return: the scoring scheme of the cost matrix, None if the matrix contains situation counts
+        """
+        return self._scoring_scheme
+
+    def __add__(self, other: 'PartialPairwiseMatrix') -> 'PartialPairwiseMatrix':
+        """
+        :param other: the partial matrix of another subset of rankings on the same elements
+        :raise ValueError: if the matrices do not have the same elements or the same scoring scheme
+        :return: the partial matrix of the union of the two subsets of rankings
+        """
+        self._check_combinable(other)
+        return PartialPairwiseMatrix(self._matrix + other.matrix, self._nb_rankings + other.nb_rankings,
+                                     self._scoring_scheme)
+
+    @staticmethod
+    def combine(partial_matrices: Iterable['PartialPairwiseMatrix']) -> 'PartialPairwiseMatrix':
+        """
+        :param partial_matrices: partial matrices of disjoint subsets of rankings on the same elements
+        :raise ValueError: if there is no partial matrix, or if they cannot be combined, see __add__
+        :return: the partial matrix of the union of the subsets of rankings
+        """
+        iterator: Iterator[PartialPairwiseMatrix] = iter(partial_matrices)
+        first: PartialPairwiseMatrix = next(iterator, None)
+        if first is None:
+            raise ValueError("No partial matrix to combine")
+        # the sum is accumulated in place, only one matrix is allocated whatever the number of partial matrices
+        matrix: ndarray = array(first.matrix, dtype=float64)
+        nb_rankings: int = first.nb_rankings
+        for partial_matrix in iterator:
+            first._check_combinable(partial_matrix)
+            matrix += partial_matrix.matrix
+            nb_rankings += partial_matrix.nb_rankings
+        return PartialPairwiseMatrix(matrix, nb_rankings, first.scoring_scheme)
+
+    def cost_matrix(self, scoring_scheme: ScoringScheme = None) -> ndarray:
+        """
+        :param scoring_scheme: the scoring scheme of the cost matrix, mandatory if the matrix contains situation counts
+        :raise ValueError: if the scoring scheme is missing, or differs from the one of the partial cost matrix
+        :return: the (n, n, 3) cost matrix, see PairwiseBasedAlgorithm.pairwise_cost_matrix
+        """
+        if self._scoring_scheme is None:
+            if scoring_scheme is None:
+                raise ValueError("A scoring scheme is needed to compute the costs from the situation counts")
+            return PairwiseBasedAlgorithm.cost_matrix_from_situation_counts(self._matrix, scoring_scheme)
+        if scoring_scheme is not None and scoring_scheme.penalty_vectors != self._scoring_scheme.penalty_vectors:
+            raise ValueError("The partial matrix contains the costs of another scoring scheme")
+        return asarray(self._matrix)
+
+    def save(self, path: str):
+        """
+        Saves the partial matrix in a binary file.
+
+        :param path: the path of the file
+        """
+        self._save(path, None)
+
+    @staticmethod
+    def load(path: str, mmap: bool = True) -> 'PartialPairwiseMatrix':
+        """
+        :param path: the path of a file written by save
+        :param mmap: if True, the matrix is memory-mapped, see corankco.utils.read_binary_arrays
+        :raise ValueError: if the file is not a binary file of the expected format
+        :return: the partial matrix
+        """
+        metadata, arrays = read_binary_arrays(path, mmap)
+        if metadata.get("kind") != "partial_pairwise_matrix":
+            raise ValueError(f"{path} does not contain a partial pairwise matrix")
+        penalty_vectors: List[List[float]] = metadata["penalty_vectors"]
+        return PartialPairwiseMatrix(arrays["matrix"], metadata["nb_rankings"],
+                                     None if penalty_vectors is None else ScoringScheme(penalty_vectors))
+
+    @staticmethod
+    def compute(positions: ndarray, weights: ndarray = None, scoring_scheme: ScoringScheme = None, nb_shards: int = 1,
+                nb_processes: int = 1, cache_path: str = None) -> 'PartialPairwiseMatrix':
+        """
+        Computes the partial matrix of the rankings: the columns of positions are split in nb_shards shards of
+        consecutive rankings, the partial matrices of the shards are computed in a pool of nb_processes processes and
+        summed. The result is the same as with a single shard, up to floating point rounding.
+
+        :param positions: a matrix where pos[i][j] denotes the position of element i in ranking j (-1 if non-ranked)
+        :param weights: a 1D float array that associates a weight for each ranking
+        :param scoring_scheme: the scoring scheme of the cost matrix, None to compute the situation counts
+        :param nb_shards: the number of shards of rankings
+        :param nb_processes: the number of worker processes, the shards are computed in the current process if 1
+        :param cache_path: if not None, the path of a binary file: if it contains the partial matrix of the same
+                           rankings, weights and scoring scheme, the matrix is loaded from the file. Otherwise, the
+                           matrix is computed then saved in the file
+        :return: the partial matrix of all the rankings
+        """
+        if weights is None:
+            weights = ones(positions.shape[1], dtype=float)
+        assert weights.shape[0] == positions.shape[1]
+        penalty_vectors: List[List[float]] = None if scoring_scheme is None else scoring_scheme.penalty_vectors
+        fingerprint: str = None
+        if cache_path is not None:
+            fingerprint = PartialPairwiseMatrix._fingerprint(positions, weights, penalty_vectors)
+            if os.path.isfile(cache_path) and is_binary_file(cache_path) and \
+                    read_binary_header(cache_path)[0]["metadata"].get("fingerprint") == fingerprint:
+                return PartialPairwiseMatrix.load(cache_path)
+
+        shards: List[ndarray] = [shard for shard in array_split(arange(positions.shape[1]), max(1, nb_shards))
+                                 if shard.shape[0] > 0] or [arange(0)]
+        arguments: List[Tuple[ndarray, ndarray, ScoringScheme]] = [
+            (ascontiguousarray(positions[:, shard]), weights[shard], scoring_scheme) for shard in shards]
+        result: PartialPairwiseMatrix
+        if nb_processes > 1 and len(shards) > 1:
+            # spawned workers, forking after the threads of numba have been started may deadlock
+            with ProcessPoolExecutor(max_workers=min(nb_processes, len(shards)),
+                                     mp_context=get_context("spawn")) as executor:
+                result = PartialPairwiseMatrix.combine(executor.map(_partial_pairwise_matrix_of_shard,
+                                                                    *zip(*arguments)))
+        else:
+            result = PartialPairwiseMatrix.combine(_partial_pairwise_matrix_of_shard(*shard_arguments)
+                                                   for shard_arguments in arguments)
+        if cache_path is not None:
+            result._save(cache_path, fingerprint)
+        return result
+
+    def _check_combinable(self, other: 'PartialPairwiseMatrix'):
+        """
+        :param other: another partial matrix
+        :raise ValueError: if the matrices do not have the same elements or the same scoring scheme
+        """
+        if self._matrix.shape != other.matrix.shape:
+            raise ValueError(f"Cannot combine partial matrices of shapes {self._matrix.shape} and {other.matrix.shape}")
+        if (self._scoring_scheme is None) != (other.scoring_scheme is None) or (
+                self._scoring_scheme is not None and
+                self._scoring_scheme.penalty_vectors != other.scoring_scheme.penalty_vectors):
+            raise ValueError("Cannot combine partial matrices of different scoring schemes")
+
+    def _save(self, path: str, fingerprint: str):
+        """
+        :param path: the path of the file
+        :param fingerprint: the fingerprint of the rankings, weights and scoring scheme of the matrix, see compute
+        """
+        write_binary_arrays(path, {"kind": "partial_pairwise_matrix",
+                                   "nb_rankings": self._nb_rankings,
+                                   "penalty_vectors": None if self._scoring_scheme is None else
+                                   self._scoring_scheme.penalty_vectors,
+                                   "fingerprint": fingerprint},
+                            {"matrix": self._matrix})
+
+    @staticmethod
+    def _fingerprint(positions: ndarray, weights: ndarray, penalty_vectors: List[List[float]]) -> str:
+        """
+        :return: a digest of the positions, the weights and the penalty vectors
+        """
+        digest = blake2b(digest_size=16)
+        digest.update(str((positions.shape, penalty_vectors)).encode())
+        digest.update(ascontiguousarray(positions, dtype=int32).data)
+        digest.update(ascontiguousarray(weights, dtype=float64).data)
+        return digest.hexdigest()
+
+
+def _partial_pairwise_matrix_of_shard(positions: ndarray, weights: ndarray,
+                                      scoring_scheme: ScoringScheme) -> PartialPairwiseMatrix:
+    """
+    Partial matrix of a shard of rankings, see PartialPairwiseMatrix.compute. Module-level so that it can be sent to
+    worker processes.
+
+    :param positions: the positions of the elements in the rankings of the shard
+    :param weights: the weights of the rankings of the shard
+    :param scoring_scheme: the scoring scheme of the cost matrix, None to compute the situation counts
+    :return: the partial matrix of the shard
+    """
+    # the matrices of the shards are not put in the cache of the pairwise matrices, only the matrix of all the rankings
+    if scoring_scheme is None:
+        return PartialPairwiseMatrix(
+            PairwiseBasedAlgorithm._compute_pairwise_situation_counts(positions, weights, None), positions.shape[1])
+    return PartialPairwiseMatrix(
+        PairwiseBasedAlgorithm._compute_pairwise_cost_matrix(positions, scoring_scheme, weights, None),
+        positions.shape[1], scoring_scheme)
+
+
+class SparseCostMatrix:
+    """
+    Pairwise cost matrix of datasets of short rankings over many elements, e.g. top-k lists. Let W be the total weight
+    of the rankings and W(x) the weight of the rankings where x is ranked. If x and y are never ranked in the same
+    ranking, the costs of the pair (x, y) only depend on W, W(x) and W(y):
+
+    cost(x, y) = W * C[5] + W(x) * (C[3] - C[5]) + W(y) * (C[4] - C[5])
+
+    where C[s] is the cost vector of the situation s of the pair in a ranking, see PairwiseBasedAlgorithm.
+    pairwise_situation_counts. Each ranking where x and y are both ranked adds a correction to these costs. The matrix
+    is stored as the default cost W * C[5], the ranked weights of the elements, and the corrections of the co-ranked
+    pairs in compressed sparse rows, so that the memory and the time to build the matrix are O(sum of k_i²), k_i being
+    the number of elements ranked in the i-th ranking, instead of O(n² * m).
+    """
+
+    def __init__(self, total_weight: float, ranked_weights: ndarray, costs_of_situations: ndarray,
+                 row_offsets: ndarray, columns: ndarray, corrections: ndarray):
+        """
+        Use SparseCostMatrix.compute to build a sparse cost matrix from rankings.
+
+        :param total_weight: the sum of the weights of the rankings
+        :param ranked_weights: ranked_weights[x] = sum of the weights of the rankings where x is ranked
+        :param costs_of_situations: the (6, 3) costs of the situations, see PairwiseBasedAlgorithm._costs_of_situations
+        :param row_offsets: the corrections of the pairs (x, y) are corrections[row_offsets[x]:row_offsets[x + 1]]
+        :param columns: the elements y of the corrections, sorted in each row
+        :param corrections: the (nnz, 3) corrections of the ordered pairs of co-ranked elements, both (x, y) and (y, x)
+                            being stored
+        """
+        self._total_weight: float = total_weight
+        self._ranked_weights: ndarray = ranked_weights
+        self._costs_of_situations: ndarray = costs_of_situations
+        self._row_offsets: ndarray = row_offsets
+        self._columns: ndarray = columns
+        self._corrections: ndarray = corrections
+
+    @staticmethod
+    def compute(positions: ndarray, scoring_scheme: ScoringScheme, weights: ndarray = None) -> 'SparseCostMatrix':
+        """
+        :param positions: a matrix where pos[i][j] denotes the position of element i in ranking j (-1 if non-ranked)
+        :param scoring_scheme: the scoring scheme to compute the cost matrix
+        :param weights: a 1D float array that associates a weight for each ranking
+        :return: the sparse cost matrix of the rankings
+        """
+        if weights is None:
+            weights = ones(positions.shape[1], dtype=float)
+        assert weights.shape[0] == positions.shape[1]
+        weights = weights.astype(float64, copy=False)
+        nb_elem: int = positions.shape[0]
+        costs_of_situations: ndarray = PairwiseBasedAlgorithm._costs_of_situations(scoring_scheme)
+        # correction of the costs of a pair for each ranking where both elements are ranked, before, after or tied
+        corrections_of_situations: ndarray = ascontiguousarray(
+            costs_of_situations[:3] - costs_of_situations[3] - costs_of_situations[4] + costs_of_situations[5])
+
+        # ranked elements of each ranking, sorted by ranking then by ID
+        ranking_of_ranked, ranked_elements = (positions.T != -1).nonzero()
+        nb_ranked: ndarray = bincount(ranking_of_ranked, minlength=positions.shape[1])
+        ranking_offsets: ndarray = concatenate((zeros(1, dtype=int64), cumsum(nb_ranked)))
+        keys: ndarray = zeros(int(np_sum(nb_ranked * (nb_ranked - 1) // 2)), dtype=int64)
+        corrections: ndarray = zeros((keys.shape[0], 3))
+        _corrections_of_co_ranked_pairs(ranking_offsets, ranked_elements.astype(int64), positions, weights,
+                                        corrections_of_situations, nb_elem, keys, corrections)
+
+        # sum of the corrections of each pair x < y, then the pairs (y, x)
+        keys, pair_of_key = unique(keys, return_inverse=True)
+        # bincount returns int64 counts when no pair is co-ranked, e.g. for top-1 lists
+        corrections = column_stack([bincount(pair_of_key, weights=corrections[:, k], minlength=keys.shape[0])
+                                    for k in range(3)]).astype(float64)
+        first, second = keys // max(nb_elem, 1), keys % max(nb_elem, 1)
+        rows: ndarray = concatenate((first, second))
+        order: ndarray = lexsort((concatenate((second, first)), rows))
+        return SparseCostMatrix(float(np_sum(weights)), (positions != -1) @ weights, costs_of_situations,
+                                concatenate((zeros(1, dtype=int64), cumsum(bincount(rows, minlength=nb_elem)))),
+                                concatenate((second, first))[order],
+                                ascontiguousarray(concatenate((corrections, corrections[:, [1, 0, 2]]))[order]))
+
+    @property
+    def nb_elements(self) -> int:
+        """
+        :return: the number of elements
+        """
+        return self._ranked_weights.shape[0]
+
+    @property
+    def nb_co_ranked_pairs(self) -> int:
+        """
+        :return: the number of pairs x < y of elements ranked together in at least one ranking
+        """
+        return self._columns.shape[0] // 2
+
+    @property
+    def total_weight(self) -> float:
+        """
+        :return: the sum of the weights of the rankings
+        """
+        return self._total_weight
+
+    @property
+    def ranked_weights(self) -> ndarray:
+        """
+        :return: the 1D array of the sum of the weights of the rankings where each element is ranked
+        """
+        return self._ranked_weights
+
+    @property
+    def costs_of_situations(self) -> ndarray:
+        """
+        :return: the (6, 3) costs of the situations of a pair in a ranking, see
+                 PairwiseBasedAlgorithm.cost_matrix_from_situation_counts
+        """
+        return self._costs_of_situations
+
+    @property
+    def default_costs(self) -> ndarray:
+        """
+        :return: the costs of a pair of elements never ranked, W * C[5]
+        """
+        return self._total_weight * self._costs_of_situations[5]
+
+    @property
+    def row_offsets(self) -> ndarray:
+        """
+        :return: the offsets of the rows of the corrections, see columns and corrections
+        """
+        return self._row_offsets
+
+    @property
+    def columns(self) -> ndarray:
+        """
+        :return: the elements y of the corrections of the pairs (x, y), x being given by row_offsets
+        """
+        return self._columns
+
+    @property
+    def corrections(self) -> ndarray:
+        """
+        :return: the (nnz, 3) corrections of the ordered pairs of co-ranked elements
+        """
+        return self._corrections
+
+    def costs_of_element(self, elem: int) -> ndarray:
+        """
+        :param elem: the ID of an element
+        :return: the (nb_elements, 3) array of the costs to have elem before, after, tied with each element. The row of
+                 elem itself is not meaningful
+        """
+        costs: ndarray = zeros((self.nb_elements, 3))
+        _fill_costs_of_element(costs, elem, self._total_weight, self._ranked_weights, self._costs_of_situations,
+                               self._row_offsets, self._columns, self._corrections)
+        return costs
+
+    def costs_of_pair(self, elem1: int, elem2: int) -> ndarray:
+        """
+        :param elem1: the ID of an element
+        :param elem2: the ID of another element
+        :return: the 1D array of the costs to have elem1 before elem2, elem1 after elem2, elem1 tied with elem2 in the
+                 consensus
+        """
+        situations: ndarray = self._costs_of_situations
+        costs: ndarray = self._total_weight * situations[5] + (
+                self._ranked_weights[elem1] * (situations[3] - situations[5]) +
+                self._ranked_weights[elem2] * (situations[4] - situations[5]))
+        first, end = self._row_offsets[elem1], self._row_offsets[elem1 + 1]
+        index: int = first + int(searchsorted(self._columns[first:end], elem2))
+        if index < end and self._columns[index] == elem2:
+            costs += self._corrections[index]
+        return costs
+
+    def to_packed(self, dtype: type = float64) -> ndarray:
+        """
+        :param dtype: the type of the costs, float64, float32 or int32
+        :return: the packed cost matrix, see PairwiseBasedAlgorithm.pairwise_cost_matrix_packed
+        """
+        packed: ndarray = zeros((self.nb_elements * (self.nb_elements - 1) // 2, 3), dtype=dtype)
+        _fill_packed_cost_matrix_of_sparse(self._total_weight, self._ranked_weights, self._costs_of_situations,
+                                           self._row_offsets, self._columns, self._corrections, packed)
+        return packed
+
+    def graph_of_elements(self) -> Graph:
+        """
+        :return: the graph of elements, see PairwiseBasedAlgorithm.graph_of_elements, with the same arcs in the same
+                 order. The arcs are computed from the sparse matrix, in O(nb_elements²) time
+        """
+        graph_of_elements: Graph = Graph(directed=True)
+        graph_of_elements.add_vertices(self.nb_elements, attributes={"name": [str(i) for i in
+                                                                            range(self.nb_elements)]})
+        out_arcs, _ = self._arcs()
+        # bits of out_arcs[x] in little endian order: bit y of the row is the arc (x, y), arcs in lexicographic order
+        adjacency: ndarray = unpackbits(out_arcs.view(uint8), axis=1, count=self.nb_elements, bitorder="little")
+        graph_of_elements.add_edges(list(column_stack(adjacency.nonzero())))
+        return graph_of_elements
+
+    def components(self) -> List[List[int]]:
+        """
+        :return: the list of the strongly connected components of the graph of elements, in a topological order, see
+                 TiledCostMatrix.components
+        """
+        out_arcs, in_arcs = self._arcs()
+        return PairwiseBasedAlgorithm._lists_of_components(
+            _strongly_connected_components(out_arcs, in_arcs, self.nb_elements))
+
+    def _arcs(self) -> Tuple[ndarray, ndarray]:
+        """
+        :return: the bitsets of the successors and of the predecessors of each element in the graph of elements
+        """
+        nb_words: int = (self.nb_elements + 63) // 64
+        out_arcs: ndarray = zeros((self.nb_elements, nb_words), dtype=uint64)
+        in_arcs: ndarray = zeros((self.nb_elements, nb_words), dtype=uint64)
+        _set_arcs_of_sparse(self._total_weight, self._ranked_weights, self._costs_of_situations, self._row_offsets,
+                            self._columns, self._corrections, out_arcs, in_arcs)
+        return out_arcs, in_arcs
+
+
+class PairwiseMatrixCache:
+    """
+    Cache of the pairwise matrices computed by PairwiseBasedAlgorithm, so that several algorithms run on the same
+    rankings and scoring scheme compute the cost matrix only once. The matrices are identified by a digest of the
+    positions, the weights and the penalty vectors, and by their form (dense, packed, situation counts), see key.
+
+    The matrices are kept in memory up to max_bytes, the least recently used ones being evicted first. If a directory
+    is given, each computed matrix is also written in a binary file of the directory (see corankco.utils.
+    write_binary_arrays), from which it is read back when it is no longer in memory, possibly by another process.
+
+    The cache is consulted by the helpers of PairwiseBasedAlgorithm once installed with PairwiseBasedAlgorithm.
+    set_matrix_cache. The matrices returned by the cache are shared by all the callers: they are read-only.
+    """
+
+    def __init__(self, max_bytes: int = 1 << 28, directory: str = None):
+        """
+        :param max_bytes: the maximal total size of the matrices kept in memory, 256 MiB by default
+        :param directory: if not None, the directory of the on-disk tier of the cache, created if needed
+        """
+        if max_bytes < 0:
+            raise ValueError(f"The maximal size of the cache must be non-negative, got {max_bytes}")
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        self._max_bytes: int = max_bytes
+        self._directory: str = directory
+        self._matrices: OrderedDict = OrderedDict()
+        self._nb_bytes: int = 0
+        self._lock: Lock = Lock()
+        self._hits: int = 0
+        self._disk_hits: int = 0
+        self._misses: int = 0
+        self._evictions: int = 0
+
+    @property
+    def max_bytes(self) -> int:
+        """
+        :return: the maximal total size of the matrices kept in memory
+        """
+        return self._max_bytes
+
+    @property
+    def directory(self) -> str:
+        """
+        :return: the directory of the on-disk tier of the cache, None if there is no on-disk tier
+        """
+        return self._directory
+
+    @property
+    def nb_bytes(self) -> int:
+        """
+        :return: the total size of the matrices kept in memory
+        """
+        return self._nb_bytes
+
+    def __len__(self) -> int:
+        """
+        :return: the number of matrices kept in memory
+        """
+        return len(self._matrices)
+
+    def statistics(self) -> Dict[str, int]:
+        """
+        :return: the number of hits in memory, of hits on disk, of misses (matrices computed) and of evictions from
+                 memory since the creation of the cache, the number of matrices and their total size in memory
+        """
+        with self._lock:
+            return {"hits": self._hits, "disk_hits": self._disk_hits, "misses": self._misses,
+                    "evictions": self._evictions, "nb_matrices": len(self._matrices), "nb_bytes": self._nb_bytes}
+
+    @staticmethod
+    def key(form: str, positions: ndarray, weights: ndarray, penalty_vectors: List[List[float]]) -> str:
+        """
+        :param form: the form of the matrix, e.g. "dense", "packed_float32" or "situation_counts"
+        :param positions: a matrix where pos[i][j] denotes the position of element i in ranking j (-1 if non-ranked)
+        :param weights: a 1D float array that associates a weight for each ranking
+        :param penalty_vectors: the penalty vectors of the scoring scheme, None for the situation counts
+        :return: the key of the matrix in the cache. The key does not depend on the integer type of the positions.
+        """
+        return f"{form}_{PartialPairwiseMatrix._fingerprint(positions, weights, penalty_vectors)}"
+
+    def get_or_compute(self, key: str, compute: Callable[[], ndarray]) -> ndarray:
+        """
+        :param key: the key of the matrix, see key
+        :param compute: the function that computes the matrix if it is neither in memory nor on disk
+        :return: the matrix, read-only since it is shared by all the callers
+        """
+        with self._lock:
+            matrix: ndarray = self._matrices.get(key)
+            if matrix is not None:
+                self._matrices.move_to_end(key)
+                self._hits += 1
+                return matrix
+        path: str = None if self._directory is None else os.path.join(self._directory, key + ".bin")
+        if path is not None and os.path.isfile(path) and is_binary_file(path):
+            metadata, arrays = read_binary_arrays(path, mmap=False)
+            if metadata.get("kind") == "pairwise_matrix_cache_entry" and metadata.get("key") == key:
+                matrix = arrays["matrix"]
+                matrix.flags.writeable = False
+                with self._lock:
+                    self._disk_hits += 1
+                self._store(key, matrix)
+                return matrix
+        # the lock is not held during the computation: two threads may compute the same matrix, the second one replaces
+        # the first one in the cache
+        matrix = compute()
+        matrix.flags.writeable = False
+        with self._lock:
+            self._misses += 1
+        if path is not None:
+            # written in a temporary file then renamed, so that other processes never read a partial file
+            descriptor, temporary_path = mkstemp(dir=self._directory, suffix=".tmp")
+            os.close(descriptor)
+            write_binary_arrays(temporary_path, {"kind": "pairwise_matrix_cache_entry", "key": key},
+                                {"matrix": matrix})
+            os.replace(temporary_path, path)
+        self._store(key, matrix)
+        return matrix
+
+    def clear(self, on_disk: bool = False):
+        """
+        Removes all the matrices from memory. The statistics are kept.
+
+        :param on_disk: if True, the files of the on-disk tier are removed as well
+        """
+        with self._lock:
+            self._matrices.clear()
+            self._nb_bytes = 0
+        if on_disk and self._directory is not None:
+            for name in os.listdir(self._directory):
+                if name.endswith(".bin") and name.split("_")[0] in ("dense", "packed", "situation"):
+                    os.remove(os.path.join(self._directory, name))
+
+    def _store(self, key: str, matrix: ndarray):
+        """
+        Keeps a matrix in memory, then evicts the least recently used matrices until the size of the cache is at most
+        max_bytes. A matrix larger than max_bytes is not kept.
+
+        :param key: the key of the matrix, see key
+        :param matrix: the matrix
+        """
+        if matrix.nbytes > self._max_bytes:
+            return
+        with self._lock:
+            previous: ndarray = self._matrices.pop(key, None)
+            if previous is not None:
+                self._nb_bytes -= previous.nbytes
+            self._matrices[key] = matrix
+            self._nb_bytes += matrix.nbytes
+            while self._nb_bytes > self._max_bytes:
+                _, evicted = self._matrices.popitem(last=False)
+                self._nb_bytes -= evicted.nbytes
+                self._evictions += 1
@@ -81,13 +81,13 @@ class ParCons(RankAggAlgorithm, PairwiseBasedAlgorithm):
         weak_partition: List[Set[Element]] = []
 
         # positions[i][j] = position of element of id i in ranking j, -1 if non-ranked
-        positions: ndarray = dataset.get_positions()
+        positions: ndarray = dataset.get_compact_positions()
 
-        # get the graph of elements and the cost matrix
-        gr1, mat_score = ParCons.graph_of_elements(positions, scoring_scheme)
+        # get the cost matrix
+        mat_score: ndarray = ParCons.pairwise_cost_matrix_packed(positions, scoring_scheme, dataset.weights)
 
-        # get the strongly connected components in a topological sort
-        scc = gr1.components()
+        # get the strongly connected components of the graph of elements in a topological sort
+        scc: List[List[int]] = ParCons.components_of_graph_of_elements(mat_score)
         
         # for each SCC (defining a sub-problem)
         for scc_i in scc:
@@ -112,12 +112,14 @@ class ParCons(RankAggAlgorithm, PairwiseBasedAlgorithm):
                         sub_problem, scoring_scheme, True).consensus_rankings[0]
                     res.extend(cons_ext)
 
+        consensus: Ranking = Ranking(res)
         hash_information = {
             ConsensusFeature.ASSOCIATED_ALGORITHM: self.get_full_name(),
             ConsensusFeature.NECESSARILY_OPTIMAL: optimal,
             ConsensusFeature.WEAK_PARTITIONING: weak_partition,
+            ConsensusFeature.KEMENY_SCORE: ParCons.kemeny_score_from_cost_matrix(mat_score, consensus, dataset),
         }
-        return Consensus(consensus_rankings=[Ranking(res)],
+        return Consensus(consensus_rankings=[consensus],
                          dataset=dataset,
                          scoring_scheme=scoring_scheme,
                          att=hash_information)
@@ -2,7 +2,8 @@
 Module for PickAPerm algorithm. More details in PickAPerm docstring class.
 """
 
-from typing import List, Dict
+from typing import List
+from numpy import ndarray
 from corankco.algorithms.rank_aggregation_algorithm import RankAggAlgorithm
 from corankco.dataset import Dataset
 from corankco.scoringscheme import ScoringScheme
@@ -54,24 +55,23 @@ class PickAPerm(RankAggAlgorithm):
         :raise ScoringSchemeNotHandledException when the algorithm cannot compute the consensus because the
         implementation of the algorithm does not fit with the scoring scheme
         """
+        candidates_dataset: Dataset = dataset
         if not dataset.is_complete:
             if not scoring_scheme.is_equivalent_to(ScoringScheme.get_unifying_scoring_scheme()):
                 raise InompleteRankingsIncompatibleWithScoringSchemeException
-            rankings_to_use = dataset.unified_rankings()
-        else:
-            rankings_to_use = dataset.rankings
+            # same elements, with the same IDs, as the dataset
+            candidates_dataset = dataset.unified_dataset()
+        rankings_to_use: List[Ranking] = candidates_dataset.rankings
 
-        mapping_ranking_score: Dict[str, float] = {}
-        kemeny_computation: KemenyComputingFactory = KemenyComputingFactory(scoring_scheme)
+        # the distinct rankings are scored all at once, the rankings which cannot be optimal are abandoned early
+        distinct_rankings_ids, id_distinct_ranking = candidates_dataset.distinct_rankings()
+        scores: ndarray = KemenyComputingFactory(scoring_scheme).prepare(dataset).scores(
+            candidates_dataset.get_bucket_ids()[:, distinct_rankings_ids].T, upper_bound=float('inf'))
 
         dst_min = float('inf')
         consensus: List[Ranking] = []
-        for ranking in rankings_to_use:
-            ranking_str: str = str(ranking)
-            if ranking_str not in mapping_ranking_score:
-                dist: float = kemeny_computation.get_kemeny_score(ranking, dataset)
-            else:
-                dist: float = mapping_ranking_score[ranking_str]
+        for ranking, id_distinct in zip(rankings_to_use, id_distinct_ranking):
+            dist: float = float(scores[id_distinct])
             if dist < dst_min:
                 dst_min = dist
                 consensus.clear()
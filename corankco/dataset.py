@@ -3,11 +3,14 @@ Module providing the Dataset class, and a DatasetSelector class to filter datase
 and/or elements. A Dataset is basically a list of rankings.
 """
 
-from typing import List, Dict, Set, Tuple, Union, Iterator
-from collections import Counter
-import copy
+from typing import List, Dict, Set, Tuple, Union, Iterator, Iterable, Optional, Sequence, Deque
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, Future
+from multiprocessing import get_context
+import os
 import numpy as np
-from corankco.utils import get_rankings_from_file, get_rankings_from_folder, write_rankings, name_file
+from corankco.utils import parse_rankings_file, write_rankings, name_file, join_paths, write_binary_arrays, \
+    read_binary_arrays, is_binary_file, rankings_file_statistics, positions_dtype, jit_for_positions_types
 from corankco.ranking import Ranking
 from corankco.element import Element
 
@@ -16,6 +19,52 @@ class EmptyDatasetException(Exception):
     """Custom exception for empty dataset"""
 
 
+@jit_for_positions_types()
+def _normalise_keys(keys: np.ndarray, positions: np.ndarray, bucket_ids: np.ndarray, counts: np.ndarray,
+                    first_position: np.ndarray) -> bool:
+    """
+    Computes the positions and the dense bucket ids of rankings given as a matrix of sort keys, by counting the number
+    of elements of each key in each ranking. The matrices are ranking-major, so that each ranking is read contiguously.
+
+    :param keys: (nb_rankings, nb_elements) matrix, -1 for non-ranked elements. In each row, the elements with the
+                 lowest values are ranked first, elements with the same value are tied.
+    :param positions: output matrix of positions, same shape as keys, of the type given by positions_dtype
+    :param bucket_ids: output matrix of bucket ids, same shape and type as positions
+    :param counts: scratch array of size max(keys) + 1
+    :param first_position: scratch array of size max(keys) + 1
+    :return: True iif no ranking has ties
+    """
+    nb_rankings, nb_elements = keys.shape
+    without_ties: bool = True
+    for id_ranking in range(nb_rankings):
+        counts[:] = 0
+        for id_element in range(nb_elements):
+            key = keys[id_ranking, id_element]
+            if key >= 0:
+                counts[key] += 1
+        # position of the first element of each key, and dense id of each key (stored in counts)
+        position: int = 0
+        id_bucket: int = 0
+        for key in range(len(counts)):
+            nb_with_key = counts[key]
+            if nb_with_key > 0:
+                if nb_with_key > 1:
+                    without_ties = False
+                first_position[key] = position
+                counts[key] = id_bucket
+                position += nb_with_key
+                id_bucket += 1
+        for id_element in range(nb_elements):
+            key = keys[id_ranking, id_element]
+            if key >= 0:
+                positions[id_ranking, id_element] = first_position[key]
+                bucket_ids[id_ranking, id_element] = counts[key]
+            else:
+                positions[id_ranking, id_element] = -1
+                bucket_ids[id_ranking, id_element] = -1
+    return without_ties
+
+
 class Dataset:
     """
     Class representing a dataset containing rankings.
@@ -34,7 +83,9 @@ class Dataset:
     Note:
         If both `repetitions` and `weights` are set, the ranking at index k is repeated `repetitions[k]` times with the
 
-        same weight `weights[k]`.
+        same weight `weights[k]`. The ranking at index k then counts as `repetitions[k] * weights[k]` rankings in all
+
+        the computations (Kemeny scores, pairwise costs, rank aggregation algorithms).
     """
 
     def __init__(self, rankings: List[Ranking], name: str = "None",
@@ -52,15 +103,321 @@ class Dataset:
         :param weights: A list of floats indicating the weight of each ranking.
                         Its length must match that of `rankings` if set.
         :type weights: List[float], optional
+        :raise ValueError: If the length of repetitions or weights does not match the number of rankings, or if a
+                           non-positive value is given.
         """
 
-        self._mapping_element_id: Dict[Element, int] = {}
-        self._mapping_id_element: Dict[int, Element] = {}
+        self._init_attributes(name)
 
         # analyze the input rankings
-        self._rankings, self._is_complete, self._without_ties = self._analyse_rankings(rankings)
+        self._rankings = self._analyse_rankings(rankings)
+        self._weights = Dataset._weights_of_rankings(len(self._rankings), repetitions, weights)
+        self._build_core()
+
+    def _init_attributes(self, name: str):
+        """
+        Initialize the attributes of the dataset, before its columnar core is set.
+
+        :param name: Name of the dataset.
+        :return: None
+        """
         self._name: str = name
 
+        # the rankings, and the mappings between elements and IDs, are only built when needed if the dataset has been
+        # created from its columnar core (see from_bucket_matrix)
+        self._rankings: Optional[List[Ranking]] = None
+        self._elements: Optional[List[Element]] = None
+        self._mapping_element_id: Optional[Dict[Element, int]] = None
+        self._mapping_id_element: Optional[Dict[int, Element]] = None
+
+        # columnar core of the dataset, see _set_core
+        # the elements as raw int64 values for integer datasets, as an object array of Elements otherwise
+        self._labels: np.ndarray = np.empty(0, dtype=np.int64)
+        self._positions: np.ndarray = np.empty((0, 0), dtype=np.int8)
+        self._bucket_ids: np.ndarray = np.empty((0, 0), dtype=np.int8)
+        # int32 copies of the two matrices above, only built when asked for, see get_positions and get_bucket_ids
+        self._positions_int32: Optional[np.ndarray] = None
+        self._bucket_ids_int32: Optional[np.ndarray] = None
+        self._is_complete: bool = True
+        self._without_ties: bool = True
+        self._weights: np.ndarray = np.empty(0, dtype=np.float64)
+        # for each ranking of the dataset the dataset was compressed from, the index of its representative
+        self._compression_mapping: Union[np.ndarray, None] = None
+
+    @classmethod
+    def from_bucket_matrix(cls, bucket_ids: np.ndarray, elements: Sequence = None, name: str = "None",
+                           repetitions: List[int] = None, weights: List[float] = None) -> 'Dataset':
+        """
+        Create a Dataset from a matrix of bucket ids, without building any ranking or element object. The rankings are
+        only built if they are asked for.
+
+        If the matrix is a matrix of dense bucket ids (the buckets of each ranking are numbered from 0 without gap) of
+        the type chosen for the dataset, see get_compact_bucket_ids, it is used as it is without any copy: it is then
+        shared with the dataset, which only sees it through a read-only view, and must not be modified.
+        Otherwise, the bucket ids are renumbered. The elements that are never ranked are removed.
+
+        :param bucket_ids: A (nb_elements, nb_rankings) int matrix, bucket_ids[i][j] = bucket id of element i in ranking
+                           j, -1 if element i is non-ranked in ranking j. Elements with the same bucket id are tied.
+        :param elements: The labels of the elements (int or str), element i being associated with row i. If None, the
+                         element of row i is the integer i.
+        :param name: Name of the dataset. Defaults to "None".
+        :param repetitions: A list of integers indicating the number of occurrences for each ranking.
+        :param weights: A list of floats indicating the weight of each ranking.
+        :raise ValueError: If the matrix is not a 2D int matrix with values >= -1, or if the labels are not distinct or
+                           do not match the number of rows.
+        :raise EmptyDatasetException: If there is no ranking or no ranked element.
+        :return: A new Dataset object.
+        :rtype: Dataset
+        """
+        return cls._from_keys_matrix(bucket_ids, elements, name, repetitions, weights, keys_are_positions=False)
+
+    @classmethod
+    def from_position_matrix(cls, positions: np.ndarray, elements: Sequence = None, name: str = "None",
+                             repetitions: List[int] = None, weights: List[float] = None) -> 'Dataset':
+        """
+        Create a Dataset from a matrix of positions, without building any ranking or element object. The rankings are
+        only built if they are asked for.
+
+        If the matrix is a matrix of consistent positions (the position of an element is the number of elements ranked
+        before it, starting from 0) of the type chosen for the dataset, see get_compact_positions, it is used as it is
+        without any copy: it is then shared with the dataset and must not be modified. Otherwise, the positions are
+        recomputed, elements with the same value being tied. The elements that are never ranked are removed.
+
+        :param positions: A (nb_elements, nb_rankings) int matrix, positions[i][j] = position of element i in ranking j,
+                          -1 if element i is non-ranked in ranking j.
+        :param elements: The labels of the elements (int or str), element i being associated with row i. If None, the
+                         element of row i is the integer i.
+        :param name: Name of the dataset. Defaults to "None".
+        :param repetitions: A list of integers indicating the number of occurrences for each ranking.
+        :param weights: A list of floats indicating the weight of each ranking.
+        :raise ValueError: If the matrix is not a 2D int matrix with values >= -1, or if the labels are not distinct or
+                           do not match the number of rows.
+        :raise EmptyDatasetException: If there is no ranking or no ranked element.
+        :return: A new Dataset object.
+        :rtype: Dataset
+        """
+        return cls._from_keys_matrix(positions, elements, name, repetitions, weights, keys_are_positions=True)
+
+    @classmethod
+    def _from_keys_matrix(cls, keys: np.ndarray, elements: Optional[Sequence], name: str,
+                          repetitions: Optional[List[int]], weights: Optional[List[float]],
+                          keys_are_positions: bool) -> 'Dataset':
+        """
+        Create a Dataset from a matrix of bucket ids or positions, see from_bucket_matrix and from_position_matrix.
+
+        :param keys: A (nb_elements, nb_rankings) int matrix, -1 for non-ranked elements. In each column, the elements
+                     with the lowest values are ranked first, elements with the same value are tied.
+        :param elements: The labels of the elements, or None.
+        :param name: Name of the dataset.
+        :param repetitions: A list of integers indicating the number of occurrences for each ranking, or None.
+        :param weights: A list of floats indicating the weight of each ranking, or None.
+        :param keys_are_positions: True iif the matrix is a matrix of positions, False for bucket ids.
+        :return: A new Dataset object.
+        """
+        keys = np.asarray(keys)
+        if keys.ndim != 2 or keys.dtype.kind not in "iu":
+            raise ValueError("The matrix must be a 2D int matrix")
+        if keys.shape[1] == 0:
+            raise EmptyDatasetException("There must be at least one ranking")
+        if keys.size > 0 and keys.min() < -1:
+            raise ValueError("The values of the matrix must be >= -1")
+        labels: np.ndarray = Dataset._labels_of_elements(elements, keys.shape[0])
+
+        # elements that are never ranked are not part of the dataset
+        is_ranked_somewhere: np.ndarray = np.any(keys >= 0, axis=1)
+        if not np.all(is_ranked_somewhere):
+            keys = keys[is_ranked_somewhere]
+            labels = labels[is_ranked_somewhere]
+        if keys.shape[0] == 0:
+            raise EmptyDatasetException("No elements found in input rankings")
+
+        positions, bucket_ids, without_ties = Dataset._normalised_core(keys)
+        # zero-copy if the input matrix is already the wanted one
+        if keys.dtype == positions.dtype:
+            if keys_are_positions and np.array_equal(positions, keys):
+                positions = keys
+            elif not keys_are_positions and np.array_equal(bucket_ids, keys):
+                bucket_ids = keys
+
+        dataset: Dataset = cls.__new__(cls)
+        dataset._init_attributes(name)
+        dataset._weights = Dataset._weights_of_rankings(keys.shape[1], repetitions, weights)
+        dataset._set_core(labels, positions, bucket_ids, without_ties)
+        return dataset
+
+    @classmethod
+    def from_scores(cls, scores: np.ndarray, ascending: bool = True, tie_tolerance: float = 0.,
+                    elements: Sequence = None, name: str = "None", repetitions: List[int] = None,
+                    weights: List[float] = None) -> 'Dataset':
+        """
+        Create a Dataset from a matrix of scores, one ranking by column (for instance, one p-value for each gene in each
+        study), without building any ranking or element object. In each column, the elements are sorted by score, the
+        elements whose scores are equal, or differ by at most tie_tolerance from the previous score in sorted order,
+        being tied. Elements with a NaN score are non-ranked.
+
+        :param scores: A (nb_elements, nb_sources) float matrix, scores[i][j] = score of element i in source j, NaN if
+                       element i has no score in source j.
+        :param ascending: If True, elements with the lowest scores are ranked first, otherwise the highest scores are
+                          ranked first.
+        :param tie_tolerance: Maximal difference between two consecutive scores, in sorted order, to tie the
+                              associated elements. Defaults to 0, that is only equal scores are tied.
+        :param elements: The labels of the elements (int or str), element i being associated with row i. If None, the
+                         element of row i is the integer i.
+        :param name: Name of the dataset. Defaults to "None".
+        :param repetitions: A list of integers indicating the number of occurrences for each ranking.
+        :param weights: A list of floats indicating the weight of each ranking.
+        :raise ValueError: If the scores are not a 2D matrix, if tie_tolerance is negative, or if the labels are not
+                           distinct or do not match the number of rows.
+        :raise EmptyDatasetException: If there is no source or no element with a score.
+        :return: A new Dataset object.
+        :rtype: Dataset
+        """
+        scores = np.asarray(scores, dtype=np.float64)
+        if scores.ndim != 2:
+            raise ValueError("The scores must be a 2D matrix")
+        if tie_tolerance < 0:
+            raise ValueError("The tie tolerance must be a non-negative value")
+        if not ascending:
+            scores = -scores
+
+        # each source is sorted contiguously, NaN scores being sorted after all the others
+        scores_sources: np.ndarray = np.ascontiguousarray(scores.T)
+        order: np.ndarray = np.argsort(scores_sources, axis=1)
+        sorted_scores: np.ndarray = np.take_along_axis(scores_sources, order, axis=1)
+        # a new bucket starts each time the score increases by more than the tolerance
+        new_bucket: np.ndarray = np.zeros(scores_sources.shape, dtype=np.int32)
+        new_bucket[:, 1:] = np.diff(sorted_scores, axis=1) > tie_tolerance
+        sorted_bucket_ids: np.ndarray = np.cumsum(new_bucket, axis=1, dtype=np.int32)
+        sorted_bucket_ids[np.isnan(sorted_scores)] = -1
+
+        bucket_ids_sources: np.ndarray = np.empty(scores_sources.shape, dtype=np.int32)
+        np.put_along_axis(bucket_ids_sources, order, sorted_bucket_ids, axis=1)
+        bucket_ids: np.ndarray = np.ascontiguousarray(bucket_ids_sources.T)
+        return cls._from_keys_matrix(bucket_ids, elements, name, repetitions, weights, keys_are_positions=False)
+
+    def to_bucket_matrix(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Export the dataset as a matrix of bucket ids and the labels of the elements, without any copy, so that
+        Dataset.from_bucket_matrix(*dataset.to_bucket_matrix()) is the same dataset. Note that the arrays are shared:
+        they must not be modified, the matrix being read-only.
+
+        :return: A tuple with the (nb_elements, nb_rankings) matrix of bucket ids (-1 for non-ranked elements), of the
+                 narrow type of get_compact_bucket_ids, and the 1D array of the labels of the elements, int64 for
+                 integer datasets, of Elements otherwise.
+        :rtype: Tuple[np.ndarray, np.ndarray]
+        """
+        return self._bucket_ids, self._labels
+
+    @staticmethod
+    def _labels_of_elements(elements: Optional[Sequence], nb_elements: int) -> np.ndarray:
+        """
+        Get the array of labels of the elements: int64 array if all the elements can be integers, object array of str
+        Elements otherwise.
+
+        :param elements: The labels of the elements, or None for 0 ... nb_elements - 1
+        :param nb_elements: The expected number of elements
+        :raise ValueError: If the labels are not distinct or do not match the number of elements
+        :return: The 1D array of the labels
+        """
+        if elements is None:
+            return np.arange(nb_elements, dtype=np.int64)
+        labels: np.ndarray = np.asarray(elements)
+        if labels.shape != (nb_elements,):
+            raise ValueError(f"The number of elements must match the number of rows of the matrix: "
+                             f"{len(labels)} found, {nb_elements} expected")
+        # unsigned labels beyond the range of int64 are handled as Python ints below
+        fits_in_int64: bool = labels.dtype.kind == "i" or \
+            labels.dtype.kind == "u" and (labels.size == 0 or int(labels.max()) <= np.iinfo(np.int64).max)
+        if fits_in_int64:
+            labels = labels.astype(np.int64, copy=False)
+        else:
+            values: List[Element] = [Element(value if isinstance(value, (int, Element)) else str(value))
+                                     for value in labels.tolist()]
+            if all(value.can_be_int() for value in values):
+                # ints beyond 64 bits are kept as Elements, as in Ranking
+                int_values: List[int] = [int(str(value)) for value in values]
+                labels = Ranking._int_array(int_values)
+                if labels is None:
+                    labels = Ranking._object_array([Element(value) for value in int_values])
+            else:
+                labels = np.empty(nb_elements, dtype=object)
+                labels[:] = [Element(str(value)) for value in values]
+        if len(set(labels.tolist())) != nb_elements:
+            raise ValueError("The elements must be distinct")
+        return labels
+
+    @staticmethod
+    def _normalised_core(keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray, bool]:
+        """
+        Compute the matrices of positions and dense bucket ids of rankings given as a matrix of sort keys.
+
+        :param keys: A (nb_elements, nb_rankings) int matrix, -1 for non-ranked elements. In each column, the elements
+                     with the lowest values are ranked first, elements with the same value are tied.
+        :return: A tuple with the matrix of positions, the matrix of bucket ids (-1 for non-ranked elements), both of
+                 the narrowest type for the number of elements (see utils.positions_dtype), and a boolean which is True
+                 iif no ranking has ties.
+        """
+        nb_keys: int = int(keys.max()) + 1
+        if nb_keys > keys.size:
+            # sparse keys are first replaced by their rank among the distinct keys, -1 staying the lowest one
+            distinct_keys, inverse = np.unique(keys, return_inverse=True)
+            keys = inverse.reshape(keys.shape) - int(distinct_keys[0] == -1)
+            nb_keys = int(keys.max()) + 1
+        # the kernel works on ranking-major copies, the results are transposed back
+        keys_rankings: np.ndarray = np.ascontiguousarray(keys.T, dtype=np.int32)
+        positions: np.ndarray = np.empty(keys_rankings.shape, dtype=positions_dtype(keys.shape[0]))
+        bucket_ids: np.ndarray = np.empty(keys_rankings.shape, dtype=positions.dtype)
+        without_ties: bool = _normalise_keys(keys_rankings, positions, bucket_ids, np.zeros(nb_keys, dtype=np.int64),
+                                             np.zeros(nb_keys, dtype=np.int64))
+        positions = np.ascontiguousarray(positions.T)
+        bucket_ids = np.ascontiguousarray(bucket_ids.T)
+        return positions, bucket_ids, without_ties
+
+    def _set_core(self, labels: np.ndarray, positions: np.ndarray, bucket_ids: np.ndarray, without_ties: bool,
+                  is_complete: Optional[bool] = None):
+        """
+        Set the columnar core of the dataset. The rankings, if any, must be set by the caller; the mappings between
+        elements and IDs are reset and will be built when needed.
+
+        :param labels: The 1D array of the labels of the elements, element i being associated with row i
+        :param positions: The (nb_elements, nb_rankings) matrix of positions, -1 for non-ranked elements, of a type of
+                          utils.POSITIONS_TYPES
+        :param bucket_ids: The (nb_elements, nb_rankings) matrix of bucket ids, -1 for non-ranked elements, of the same
+                           type
+        :param without_ties: True iif no ranking has ties
+        :param is_complete: True iif each element is ranked in each ranking, computed from bucket_ids if None
+        :return: None
+        """
+        self._labels = labels
+        # the matrices are shared with the callers of get_compact_positions and get_compact_bucket_ids and with the
+        # cached pairwise matrices, they are seen through read-only views, which does not change the flags of matrices
+        # given by a user
+        self._positions = positions.view()
+        self._positions.flags.writeable = False
+        self._bucket_ids = bucket_ids.view()
+        self._bucket_ids.flags.writeable = False
+        self._positions_int32 = None
+        self._bucket_ids_int32 = None
+        self._elements = None
+        self._mapping_element_id = None
+        self._mapping_id_element = None
+        # dataset is complete iif each element is ranked in each ranking
+        self._is_complete = bool(np.all(bucket_ids >= 0)) if is_complete is None else is_complete
+        self._without_ties = without_ties
+
+    def _element_list(self) -> List[Element]:
+        """
+        Get the list of the elements of the dataset, element i being at index i. The list and the mappings between
+        elements and IDs are built at first call.
+
+        :return: The list of the Elements of the dataset
+        """
+        if self._elements is None:
+            self._elements = [Element(value) for value in self._labels.tolist()]
+            self._mapping_element_id = {element: id_element for id_element, element in enumerate(self._elements)}
+            self._mapping_id_element = dict(enumerate(self._elements))
+        return self._elements
+
     @classmethod
     def from_file(cls, path: str) -> 'Dataset':
         """
@@ -71,9 +428,7 @@ class Dataset:
         :return: A new Dataset object.
         :rtype: Dataset
         """
-        dataset = cls([Ranking(ranking) for ranking in get_rankings_from_file(path)])
-        dataset.name = name_file(path)
-        return dataset
+        return cls._from_entries(*parse_rankings_file(path), name=name_file(path))
 
     @classmethod
     def from_raw_list(cls, rankings: List[Union[List[Set[int]], List[Set[str]], List[Set[Element]]]],
@@ -105,64 +460,218 @@ class Dataset:
         dataset.name = name
         return dataset
 
-    def _analyse_rankings(self, rankings: List[Ranking]) -> Tuple[List[Ranking], bool, bool]:
+    def _analyse_rankings(self, rankings: List[Ranking]) -> List[Ranking]:
         """
-        Analyze the input rankings to check if they are complete, with or without ties.
+        Analyze the input rankings to check if all the elements can be seen as integers. If yes, all the elements are
+        converted into integers, otherwise, all the elements are converted into str.
 
         :param rankings: Rankings to be analyzed.
         :type rankings: list of Ranking
-        :return: A tuple containing the final list of rankings, a boolean indicating if the rankings are complete,
-                 and another boolean indicating if the rankings are without ties.
-        :rtype: tuple
+        :return: The final list of rankings
+        :rtype: List[Ranking]
         """
         if len(rankings) == 0:
             raise EmptyDatasetException("There must be at least one ranking")
 
-        # check if all elements are integers. If yes, all str are converted to integers
+        # check if all elements are integers. If yes, all str are converted to integers. The rankings whose elements
+        # already have the target type are kept as they are
+        all_integers: bool = Dataset._all_integers(rankings)
         rankings_final: List[Ranking] = []
+        for ranking in rankings:
+            if ranking.is_of_int == all_integers and \
+                    (all_integers or all(element.type is str for element in ranking.elements_array.tolist())):
+                rankings_final.append(ranking)
+                continue
+            values: list = ranking.elements_array.tolist()
+            if all_integers:
+                # ints beyond 64 bits are kept as Elements, as in Ranking
+                int_values: List[int] = [int(str(value)) for value in values]
+                elements: Optional[np.ndarray] = Ranking._int_array(int_values)
+                if elements is None:
+                    elements = Ranking._object_array([Element(value) for value in int_values])
+            else:
+                elements = np.empty(len(values), dtype=object)
+                elements[:] = [Element(str(value)) for value in values]
+            rankings_final.append(Ranking.from_arrays(elements, ranking.bucket_offsets))
+        return rankings_final
+
+    def _build_core(self):
+        """
+        Build the columnar core of the dataset from the arrays of its rankings: the element-id table (unique int ID of
+        each element, in order of first appearance), and the two (nb_elements, nb_rankings) matrices of positions and
+        bucket ids. The core is built once at construction and rebuilt each time the rankings of the dataset change, so
+        that all the rank aggregation algorithms run on the same dataset share the same matrices.
+
+        :raise EmptyDatasetException: If no element is ranked in the rankings of the dataset.
+        :return: None
+        """
+        # forbidden to have no element
+        if all(len(ranking.elements_array) == 0 for ranking in self._rankings):
+            raise EmptyDatasetException("No elements found in input rankings")
 
-        if Dataset._all_integers(rankings):
-            for ranking in rankings:
-                ranking_final: List[Set[Element]] = []
-                for bucket in ranking:
-                    ranking_final.append({Element(int(str(e))) for e in bucket})
-                rankings_final.append(Ranking(ranking_final))
-        else:
-            for ranking in rankings:
-                ranking_final: List[Set[Element]] = []
-                for bucket in ranking:
-                    ranking_final.append({Element(str(e)) for e in bucket})
-                rankings_final.append(Ranking(ranking_final))
-        # check if rankings are complete or not, and with or without ties
-
-        # now, checking if dataset is complete or not, with or without ties
-        without_ties: bool = True
-        complete: bool = True
-
-        # dataset is complete iif each element is present as many times as the nb of rankings
-        nb_occur_elements_in_rankings: Dict[Element, int] = {}
-        for ranking in rankings_final:
-            for bucket in ranking:
-                if len(bucket) > 1:
-                    without_ties = False
-                for element in bucket:
-                    if element not in nb_occur_elements_in_rankings:
-                        nb_occur_elements_in_rankings[element] = 1
-                    else:
-                        nb_occur_elements_in_rankings[element] += 1
+        offsets_rankings: List[np.ndarray] = [ranking.bucket_offsets for ranking in self._rankings]
+        nb_buckets: np.ndarray = np.asarray([len(offsets) - 1 for offsets in offsets_rankings], dtype=np.int64)
+        sizes_buckets: np.ndarray = np.concatenate([np.diff(offsets) for offsets in offsets_rankings])
+        ids_elements, labels = Dataset._ids_of_elements([ranking.elements_array for ranking in self._rankings])
+        self._set_core_of_entries(ids_elements, labels, sizes_buckets, nb_buckets)
 
+    def _set_core_of_entries(self, ids_elements: np.ndarray, labels: np.ndarray, sizes_buckets: np.ndarray,
+                             nb_buckets: np.ndarray) -> bool:
+        """
+        Set the columnar core of the dataset from the flat description of its rankings: the IDs of the elements in
+        bucket order, all the rankings being concatenated, the size of each bucket and the number of buckets of each
+        ranking.
+
+        :param ids_elements: The 1D int array of the IDs of the elements in bucket order
+        :param labels: The 1D array of the labels of the elements, element i being associated with ID i
+        :param sizes_buckets: The 1D int array of the size of each bucket
+        :param nb_buckets: The 1D int array of the number of buckets of each ranking
+        :raise EmptyDatasetException: If no element is ranked in the rankings of the dataset.
+        :return: False iif an element is found more than once in a ranking, the core being then not set
+        """
         # forbidden to have no element
-        if len(nb_occur_elements_in_rankings) == 0:
+        nb_entries: int = len(ids_elements)
+        if nb_entries == 0:
             raise EmptyDatasetException("No elements found in input rankings")
 
-        id_element: int = 0
-        for key, _ in nb_occur_elements_in_rankings.items():
-            self._mapping_element_id[key] = id_element
-            self._mapping_id_element[id_element] = key
-            id_element += 1
-            if nb_occur_elements_in_rankings[key] != len(rankings_final):
-                complete = False
-        return rankings_final, complete, without_ties
+        # for each bucket: id of its ranking, id in its ranking and position
+        first_buckets: np.ndarray = np.repeat(np.cumsum(nb_buckets) - nb_buckets, nb_buckets)
+        ids_buckets: np.ndarray = np.arange(len(sizes_buckets)) - first_buckets
+        ids_rankings: np.ndarray = np.repeat(np.arange(len(nb_buckets)), nb_buckets)
+        first_entries: np.ndarray = np.cumsum(sizes_buckets) - sizes_buckets
+        positions_buckets: np.ndarray = first_entries - first_entries[first_buckets]
+
+        shape: Tuple[int, int] = (len(labels), len(nb_buckets))
+        positions: np.ndarray = np.full(shape, -1, dtype=positions_dtype(len(labels)))
+        bucket_ids: np.ndarray = np.full(shape, -1, dtype=positions.dtype)
+        entries_rankings: np.ndarray = np.repeat(ids_rankings, sizes_buckets)
+        positions[ids_elements, entries_rankings] = np.repeat(positions_buckets, sizes_buckets)
+        bucket_ids[ids_elements, entries_rankings] = np.repeat(ids_buckets, sizes_buckets)
+
+        if np.count_nonzero(bucket_ids >= 0) != nb_entries:
+            return False
+        self._set_core(labels, positions, bucket_ids, bool(np.all(sizes_buckets <= 1)))
+        return True
+
+    @classmethod
+    def _from_entries(cls, ids_elements: np.ndarray, elements: list, sizes_buckets: np.ndarray, nb_buckets: np.ndarray,
+                      name: str) -> 'Dataset':
+        """
+        Create a Dataset from the flat description of its rankings (see _set_core_of_entries), without building any
+        ranking. The rankings are only built if an element is found more than once in a ranking, so that the usual
+        checks apply.
+
+        :param ids_elements: The 1D int array of the IDs of the elements in bucket order
+        :param elements: The distinct elements, int or str, element i being associated with ID i
+        :param sizes_buckets: The 1D int array of the size of each bucket
+        :param nb_buckets: The 1D int array of the number of buckets of each ranking
+        :param name: Name of the dataset.
+        :raise EmptyDatasetException: If there is no ranking or no ranked element.
+        :raise ValueError: If an element is found in several buckets of a ranking.
+        :return: A new Dataset object.
+        """
+        if len(nb_buckets) == 0:
+            raise EmptyDatasetException("There must be at least one ranking")
+        labels: np.ndarray = Dataset._labels_of_elements(elements, len(elements))
+        dataset: Dataset = cls.__new__(cls)
+        dataset._init_attributes(name)
+        dataset._weights = np.ones(len(nb_buckets), dtype=np.float64)
+        if dataset._set_core_of_entries(ids_elements, labels, sizes_buckets, nb_buckets):
+            return dataset
+
+        rankings: List[Ranking] = []
+        offsets_buckets: List[int] = np.concatenate(([0], np.cumsum(sizes_buckets))).tolist()
+        id_bucket: int = 0
+        for nb_buckets_ranking in nb_buckets.tolist():
+            rankings.append(Ranking([set(labels[ids_elements[offsets_buckets[i]:offsets_buckets[i + 1]]].tolist())
+                                     for i in range(id_bucket, id_bucket + nb_buckets_ranking)]))
+            id_bucket += nb_buckets_ranking
+        return cls(rankings, name=name)
+
+    @staticmethod
+    def _ids_of_elements(elements_rankings: List[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Associate to each element of the rankings a unique int ID, in order of first appearance. Integer elements are
+        handled as raw ints with numpy, without hashing any Python object; other elements go through a dict.
+
+        :param elements_rankings: For each ranking, the array of its elements in bucket order
+        :return: A tuple with the 1D int array of the IDs of the concatenated elements, and the array of the distinct
+                 elements, so that the element with ID i is at index i
+        """
+        if all(elements.dtype != object for elements in elements_rankings):
+            values: np.ndarray = np.concatenate(elements_rankings)
+            min_value: int = int(values.min())
+            range_values: int = int(values.max()) - min_value + 1
+            if range_values <= 2 * len(values):
+                # dense values: the first occurrence of each value is found with a direct table instead of sorting
+                shifted: np.ndarray = values - min_value
+                first_index: np.ndarray = np.full(range_values, len(values), dtype=np.int64)
+                np.minimum.at(first_index, shifted, np.arange(len(values)))
+                distinct: np.ndarray = np.flatnonzero(first_index < len(values))
+                order: np.ndarray = np.argsort(first_index[distinct], kind="stable")
+                id_of_value: np.ndarray = np.empty(range_values, dtype=np.int64)
+                id_of_value[distinct[order]] = np.arange(len(order))
+                return id_of_value[shifted], distinct[order] + min_value
+
+            distinct, first_index, inverse = np.unique(values, return_index=True, return_inverse=True)
+            # np.unique sorts the values, IDs are re-assigned in order of first appearance
+            order = np.argsort(first_index, kind="stable")
+            id_of_distinct: np.ndarray = np.empty(len(order), dtype=np.int64)
+            id_of_distinct[order] = np.arange(len(order))
+            return id_of_distinct[inverse.ravel()], distinct[order]
+
+        mapping_element_id: Dict[Element, int] = {}
+        ids: List[int] = [mapping_element_id.setdefault(Element(element), len(mapping_element_id))
+                          for elements in elements_rankings for element in elements.tolist()]
+        labels: np.ndarray = np.empty(len(mapping_element_id), dtype=object)
+        labels[:] = list(mapping_element_id)
+        return np.asarray(ids, dtype=np.int64), labels
+
+    @staticmethod
+    def _rankings_of_bucket_ids(bucket_ids: np.ndarray, labels: np.ndarray) -> List[Ranking]:
+        """
+        Build the rankings whose elements are given by labels, and whose bucket ids are the columns of bucket_ids.
+        Gaps between bucket ids are ignored.
+
+        :param bucket_ids: A 2D int matrix, bucket_ids[i][j] = bucket id of element i in ranking j, -1 if non-ranked
+        :param labels: The 1D array of the elements associated with the rows of bucket_ids
+        :return: The list of rankings, one for each column of bucket_ids, possibly empty
+        """
+        rankings: List[Ranking] = []
+        for bucket_ids_ranking in bucket_ids.T:
+            present: np.ndarray = np.flatnonzero(bucket_ids_ranking >= 0)
+            order: np.ndarray = present[np.argsort(bucket_ids_ranking[present], kind="stable")]
+            sorted_bucket_ids: np.ndarray = bucket_ids_ranking[order]
+            # a new bucket starts each time the bucket id changes
+            starts: np.ndarray = np.flatnonzero(sorted_bucket_ids[1:] != sorted_bucket_ids[:-1]) + 1
+            offsets: np.ndarray = np.concatenate(([0], starts, [len(order)])) if len(order) > 0 else [0]
+            rankings.append(Ranking.from_arrays(labels[order], offsets))
+        return rankings
+
+    @staticmethod
+    def _weights_of_rankings(nb_rankings: int, repetitions: List[int] = None,
+                             weights: List[float] = None) -> np.ndarray:
+        """
+        Compute the weight of each ranking of the dataset, that is its number of repetitions times its weight.
+
+        :param nb_rankings: The number of rankings of the dataset.
+        :param repetitions: The number of occurrences of each ranking. If None, each ranking occurs once.
+        :param weights: The weight of each ranking. If None, each ranking has weight 1.
+        :raise ValueError: If the length of repetitions or weights does not match the number of rankings, or if a
+                           non-positive value is given.
+        :return: A 1D float64 array of nb_rankings values, the final weight of each ranking.
+        """
+        final_weights: np.ndarray = np.ones(nb_rankings, dtype=np.float64)
+        for values, description in ((repetitions, "repetitions"), (weights, "weights")):
+            if values is not None:
+                values_array: np.ndarray = np.asarray(values, dtype=np.float64)
+                if values_array.shape != (nb_rankings,):
+                    raise ValueError(f"The number of {description} must match the number of rankings: "
+                                     f"{values_array.size} found, {nb_rankings} expected")
+                if np.any(values_array <= 0):
+                    raise ValueError(f"The {description} must be positive values")
+                final_weights *= values_array
+        return final_weights
 
     @staticmethod
     def _all_integers(rankings: List[Ranking]) -> bool:
@@ -170,15 +679,56 @@ class Dataset:
 
         :return: True iif all the elements of the dataset can be integers
         """
-        for ranking in rankings:
-            for bucket in ranking:
-                for element in bucket:
-                    if isinstance(element, str) and not element.isdigit():
-                        return False
-                    if isinstance(element, Element) and not element.can_be_int():
-                        return False
-        # If we have checked all elements and none have returned False, then we can return True
-        return True
+        # rankings stored as int arrays do not need to be checked
+        return all(ranking.can_be_of_int() for ranking in rankings)
+
+    def distinct_rankings(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the distinct rankings of the dataset, by hashing the bucket ids column of each ranking.
+
+        :return: A tuple of two 1D int arrays. The first one contains the index of the first occurrence of each distinct
+                 ranking, in order of first appearance. The second one associates to each ranking of the dataset the
+                 index of its distinct ranking in the first array.
+        :rtype: Tuple[np.ndarray, np.ndarray]
+        """
+        # one contiguous row of bucket ids for each ranking, to hash the rankings as bytes
+        bucket_ids_rankings: np.ndarray = np.ascontiguousarray(self._bucket_ids.T)
+        id_distinct_ranking: Dict[bytes, int] = {}
+        first_occurrences: List[int] = []
+        mapping: np.ndarray = np.empty(self.nb_rankings, dtype=np.int64)
+        for id_ranking, bucket_ids_ranking in enumerate(bucket_ids_rankings):
+            key: bytes = bucket_ids_ranking.tobytes()
+            id_distinct: int = id_distinct_ranking.get(key, -1)
+            if id_distinct == -1:
+                id_distinct = len(first_occurrences)
+                id_distinct_ranking[key] = id_distinct
+                first_occurrences.append(id_ranking)
+            mapping[id_ranking] = id_distinct
+        return np.asarray(first_occurrences, dtype=np.int64), mapping
+
+    def compressed(self) -> 'Dataset':
+        """
+        Get a new Dataset where the identical rankings are collapsed into one representative, whose weight is the sum of
+        the weights of the rankings it represents. The Kemeny score of any consensus and the output of the rank
+        aggregation algorithms are the same for both datasets, but the pairwise computations of the compressed
+        dataset only consider the distinct rankings.
+
+        :return: A new Dataset, with one ranking for each distinct ranking of the dataset, in order of first
+                 appearance. Its compression_mapping associates to each ranking of the current dataset the index of its
+                 representative.
+        :rtype: Dataset
+        """
+        first_occurrences, mapping = self.distinct_rankings()
+        # the distinct rankings have the same elements as the whole dataset, the core only needs to be sliced
+        dataset: Dataset = Dataset.__new__(Dataset)
+        dataset._init_attributes(self._name)
+        dataset._weights = np.bincount(mapping, weights=self._weights)
+        dataset._set_core(self._labels, self._positions[:, first_occurrences], self._bucket_ids[:, first_occurrences],
+                          self._without_ties)
+        if self._rankings is not None:
+            dataset._rankings = [self._rankings[id_ranking] for id_ranking in first_occurrences]
+        dataset._compression_mapping = mapping
+        return dataset
 
     def remove_empty_rankings(self):
         """
@@ -186,8 +736,7 @@ class Dataset:
 
         :return: None
         """
-        rankings_new: List[Ranking] = [ranking for ranking in self.rankings if len(ranking) > 0]
-        self._rankings, self._is_complete, self._without_ties = self._analyse_rankings(rankings_new)
+        self._project_in_place(np.arange(self.nb_elements))
 
     def remove_elements_rate_presence_lower_than(self, rate_presence: float):
         """
@@ -197,21 +746,11 @@ class Dataset:
         :type rate_presence: float
         :return: None
         """
-        # associate for each element e the nb of rankings r of the dataset such that e in dom(r)
-        presence: Dict[Element, int] = {}
-        for element in self.universe:
-            presence[element] = 0
-        for ranking in self._rankings:
-            for bucket in ranking:
-                for element in bucket:
-                    presence[element] += 1
-        elements_to_remove = set()
+        # for each element e, the total weight of the rankings r of the dataset such that e in dom(r)
+        presence: np.ndarray = (self._positions >= 0) @ self._weights
         # all the elements whose rate of presence is lower than the minimal rate of presence
         # required will be removed
-        for element, nb_rankings_present in presence.items():
-            if nb_rankings_present / self.nb_rankings < rate_presence:
-                elements_to_remove.add(element)
-        self.remove_elements(elements_to_remove)
+        self._project_in_place(np.flatnonzero(presence / self._weights.sum() >= rate_presence))
 
     def remove_elements(self, elements_to_remove: Set):
         """
@@ -222,24 +761,49 @@ class Dataset:
         :return: None
         """
 
-        # operation of projection
-        new_rankings: List[Ranking] = []
-        for old_ranking in self.rankings:
-            new_ranking = []
-            for old_bucket in old_ranking:
-                new_bucket: Set[Element] = set()
-                for old_element in old_bucket:
-                    if old_element not in elements_to_remove:
-                        new_bucket.add(old_element)
-                if len(new_bucket) > 0:
-                    new_ranking.append(new_bucket)
-            if len(new_ranking) > 0:
-                new_rankings.append(Ranking(new_ranking))
-        # the mapping element / id must be updated by removing the elements that should be removed
-        for element_to_remove in elements_to_remove:
-            self._mapping_element_id.pop(element_to_remove)
-        # the features of the dataset must be re-computed after removing some elements
-        self._rankings, self._is_complete, self._without_ties = self._analyse_rankings(new_rankings)
+        ids_to_keep: np.ndarray = np.asarray([id_element for id_element, element in enumerate(self._element_list())
+                                             if element not in elements_to_remove], dtype=np.int64)
+        # the features of the dataset and the columnar core (including the mapping element / id)
+        # must be re-computed after removing some elements
+        self._project_in_place(ids_to_keep)
+
+    def _projection(self, ids_to_keep: np.ndarray) -> 'Dataset':
+        """
+        Project the rankings of the dataset on the elements of given IDs, by slicing and renumbering the columnar core.
+        The rankings that become empty are removed, with their weight, and the compression mapping of the dataset, if
+        any, is renumbered accordingly: the rankings represented by a removed ranking are mapped to -1.
+
+        :param ids_to_keep: The 1D int array of the IDs of the elements to keep
+        :raise EmptyDatasetException: If no element is kept
+        :return: A new Dataset object, whose rankings are the non-empty projected rankings
+        """
+        bucket_ids: np.ndarray = self._bucket_ids[ids_to_keep]
+        non_empty: np.ndarray = np.flatnonzero(np.any(bucket_ids >= 0, axis=0))
+        if len(non_empty) == 0:
+            raise EmptyDatasetException("No elements found in input rankings")
+        positions, bucket_ids, without_ties = Dataset._normalised_core(bucket_ids[:, non_empty])
+        dataset: Dataset = Dataset.__new__(Dataset)
+        dataset._init_attributes(self._name)
+        dataset._weights = self._weights[non_empty]
+        dataset._set_core(self._labels[ids_to_keep], positions, bucket_ids, without_ties)
+        if self._compression_mapping is not None:
+            new_index_of_ranking: np.ndarray = np.full(self.nb_rankings, -1, dtype=np.int64)
+            new_index_of_ranking[non_empty] = np.arange(len(non_empty))
+            dataset._compression_mapping = new_index_of_ranking[self._compression_mapping]
+        return dataset
+
+    def _project_in_place(self, ids_to_keep: np.ndarray):
+        """
+        Project the rankings of the dataset on the elements of given IDs, see _projection.
+
+        :param ids_to_keep: The 1D int array of the IDs of the elements to keep
+        :return: None
+        """
+        projection: Dataset = self._projection(ids_to_keep)
+        self._rankings = None
+        self._weights = projection.weights
+        self._compression_mapping = projection._compression_mapping
+        self._set_core(projection._labels, projection._positions, projection._bucket_ids, projection._without_ties)
 
     @staticmethod
     def get_dataset_from_file(path: str) -> 'Dataset':
@@ -251,9 +815,7 @@ class Dataset:
         :return: A Dataset object containing the read rankings.
         :rtype: Dataset
         """
-        dataset: Dataset = Dataset([Ranking(ranking) for ranking in get_rankings_from_file(path)])
-        dataset.name = name_file(path)
-        return dataset
+        return Dataset.from_file(path)
 
     @property
     def rankings(self) -> List[Ranking]:
@@ -263,6 +825,8 @@ class Dataset:
         :return: The list of rankings in this Dataset object.
         :rtype: List[Ranking]
         """
+        if self._rankings is None:
+            self._rankings = Dataset._rankings_of_bucket_ids(self._bucket_ids, self._labels)
         return self._rankings
 
     @property
@@ -273,7 +837,7 @@ class Dataset:
         :return: The total number of elements in the Dataset.
         :rtype: int
         """
-        return len(self._mapping_element_id)
+        return self._positions.shape[0]
 
     @property
     def name(self) -> str:
@@ -293,7 +857,33 @@ class Dataset:
         :return: Returns the number of rankings.
         :rtype: int
         """
-        return len(self._rankings)
+        return self._bucket_ids.shape[1]
+
+    @property
+    def weights(self) -> np.ndarray:
+        """
+        Method to get the weight of each ranking of the dataset, that is its number of repetitions times its weight.
+        Note that the array is shared: it must not be modified.
+
+        :return: Returns a 1D float64 array whose i-th value is the weight of the i-th ranking.
+        :rtype: np.ndarray
+        """
+        return self._weights
+
+    @property
+    def compression_mapping(self) -> np.ndarray:
+        """
+        Method to get, if the dataset has been obtained by compressing another dataset (see compressed method), the
+        index in this dataset of the representative of each ranking of the original dataset.
+
+        :return: Returns a 1D int array whose i-th value is the index of the ranking that represents the i-th ranking of
+                 the original dataset, -1 if this representative has since been removed, e.g. by remove_empty_rankings.
+                 If the dataset has not been compressed, the identity mapping is returned.
+        :rtype: np.ndarray
+        """
+        if self._compression_mapping is None:
+            return np.arange(self.nb_rankings)
+        return self._compression_mapping
 
     @property
     def is_complete(self) -> bool:
@@ -322,7 +912,7 @@ class Dataset:
         :return: Returns a set of elements.
         :rtype: Set
         """
-        return set(self._mapping_element_id)
+        return set(self._element_list())
 
     @property
     def mapping_elem_id(self) -> Dict[Element, int]:
@@ -332,6 +922,7 @@ class Dataset:
         :return: Returns a dictionary that associates for each element of the universe a unique int ID.
         :rtype: Dict[Element, int]
         """
+        self._element_list()
         return self._mapping_element_id
 
     @property
@@ -342,6 +933,7 @@ class Dataset:
         :return: Returns a dictionary that associates for each element of the universe a unique int ID.
         :rtype: Dict[Element, int]
         """
+        self._element_list()
         return self._mapping_id_element
 
     @name.setter
@@ -378,34 +970,62 @@ class Dataset:
 
         return description
 
-    # returns a numpy ndarray where positions[i][j] is the position of element i in ranking j. Missing: element: -1
     def get_positions(self) -> np.ndarray:
         """
+        Note that the matrix is computed once and shared by all the callers: it is read-only, use copy() to modify it.
 
-        :return: A (nb_elements, nb_rankings) numpy matrix where m[i][j] denotes the position of element i in ranking j
-                 position = -1 if element i is non-ranked in ranking j
+        :return: A (nb_elements, nb_rankings) int32 numpy matrix where m[i][j] denotes the position of element i in
+                 ranking j, position = -1 if element i is non-ranked in ranking j
         """
-        positions: np.ndarray = np.full((self.nb_elements, self.nb_rankings), -1, dtype=np.int32)
-        id_ranking: int = 0
-        for ranking in self.rankings:
-            for elem, pos in ranking.positions.items():
-                positions[self.mapping_elem_id.get(elem)][id_ranking] = pos - 1
-            id_ranking += 1
-        return positions
+        if self._positions_int32 is None:
+            self._positions_int32 = Dataset._int32_view(self._positions)
+        return self._positions_int32
 
     def get_bucket_ids(self) -> np.ndarray:
         """
-        :return: A (nb_elements, nb_rankings) numpy matrix where m[i][j] denotes the bucket id of element i in ranking j
+        Note that the matrix is computed once and shared by all the callers: it is read-only, use copy() to modify it.
+
+        :return: A (nb_elements, nb_rankings) int32 numpy matrix where m[i][j] denotes the bucket id of element i in
+                 ranking j, bucket id = -1 if element i is non-ranked in ranking j
+        """
+        if self._bucket_ids_int32 is None:
+            self._bucket_ids_int32 = Dataset._int32_view(self._bucket_ids)
+        return self._bucket_ids_int32
+
+    def get_compact_positions(self) -> np.ndarray:
+        """
+        The matrix of get_positions, as it is stored by the dataset: its type is the narrowest signed int type for the
+        number of elements, that is int8 up to 128 elements, int16 up to 32768 elements and int32 otherwise (see
+        utils.positions_dtype), so that the numba kernels read as few bytes as possible. The matrix is read-only and
+        shared, without any copy.
+        Warning: arithmetic on this matrix is done in its narrow type and may silently wrap around, e.g. a position
+        + 1 in an int8 matrix of 128 elements. Use get_positions to compute on the positions.
+
+        :return: A (nb_elements, nb_rankings) numpy matrix where m[i][j] denotes the position of element i in ranking j
                  position = -1 if element i is non-ranked in ranking j
         """
-        bucket_ids: np.ndarray = np.full((self.nb_elements, self.nb_rankings), -1, dtype=np.int32)
+        return self._positions
 
-        for ranking_idx, ranking in enumerate(self.rankings):
-            for bucket_id, bucket in enumerate(ranking):
-                for elem in bucket:
-                    bucket_ids[self.mapping_elem_id.get(elem)][ranking_idx] = bucket_id
+    def get_compact_bucket_ids(self) -> np.ndarray:
+        """
+        The matrix of get_bucket_ids, as it is stored by the dataset: its type is the one of get_compact_positions, see
+        the warning on arithmetic there. Use get_bucket_ids to compute on the bucket ids.
 
-        return bucket_ids
+        :return: A (nb_elements, nb_rankings) numpy matrix where m[i][j] denotes the bucket id of element i in ranking j
+                 bucket id = -1 if element i is non-ranked in ranking j
+        """
+        return self._bucket_ids
+
+    @staticmethod
+    def _int32_view(matrix: np.ndarray) -> np.ndarray:
+        """
+        :param matrix: a matrix of positions or bucket ids, of a type of utils.POSITIONS_TYPES
+        :return: the matrix as a read-only int32 matrix, the matrix itself if it is already an int32 matrix
+        """
+        res: np.ndarray = matrix.astype(np.int32, copy=False)
+        if res is not matrix:
+            res.flags.writeable = False
+        return res
 
     def unified_rankings(self) -> List[Ranking]:
         """
@@ -415,15 +1035,17 @@ class Dataset:
         :return: the unified rankings of the Dataset within a new Ranking List
 
         """
-        copy_rankings: List[Ranking] = copy.deepcopy(self.rankings)
-        all_elements: Set[Element] = set(self._mapping_element_id.keys())
-
-        for ranking in copy_rankings:
-            missing_elements: Set[Element] = all_elements - ranking.domain
-            if missing_elements:
-                ranking.buckets.append(missing_elements)
+        return Dataset._rankings_of_bucket_ids(self._unified_bucket_ids(), self._labels)
 
-        return copy_rankings
+    def _unified_bucket_ids(self) -> np.ndarray:
+        """
+        :return: The matrix of bucket ids of the unified rankings, where the non-ranked elements of each ranking are
+                 placed in a new bucket after the last one
+        """
+        bucket_ids: np.ndarray = self._bucket_ids.copy()
+        ids_missing, ids_rankings = np.nonzero(bucket_ids < 0)
+        bucket_ids[ids_missing, ids_rankings] = (np.max(self._bucket_ids, axis=0) + 1)[ids_rankings]
+        return bucket_ids
 
     def unified_dataset(self):
         """
@@ -432,7 +1054,7 @@ class Dataset:
         in a unifying bucket at the end of r.
         :return: a new Dataset object representing the unified version of the current instance
         """
-        return Dataset(self.unified_rankings())
+        return Dataset.from_bucket_matrix(self._unified_bucket_ids(), self._labels, weights=self._weights)
 
     def sub_problem_from_elements(self, elements_to_keep: Set[Element]) -> 'Dataset':
         """
@@ -449,16 +1071,9 @@ class Dataset:
         :rtype: Dataset
         """
 
-        projected_rankings = [
-            Ranking([
-                bucket.intersection(elements_to_keep)
-                for bucket in ranking
-                if bucket.intersection(elements_to_keep)
-            ])
-            for ranking in self.rankings
-            if any(bucket.intersection(elements_to_keep) for bucket in ranking)
-        ]
-        return Dataset(projected_rankings)
+        ids_to_keep: np.ndarray = np.asarray([id_element for id_element, element in enumerate(self._element_list())
+                                             if element in elements_to_keep], dtype=np.int64)
+        return self._projection(ids_to_keep)
 
     def sub_problem_from_ids(self, id_elements_to_keep: Set[int]) -> 'Dataset':
         """
@@ -475,7 +1090,7 @@ class Dataset:
         :rtype: Dataset
         """
 
-        return self.sub_problem_from_elements(set(self._mapping_id_element[id_elem] for id_elem in id_elements_to_keep))
+        return self._projection(np.asarray(sorted(id_elements_to_keep), dtype=np.int64))
 
     def write(self, path) -> None:
         """
@@ -486,6 +1101,72 @@ class Dataset:
         rankings_as_list_of_sets = [ranking.buckets for ranking in self.rankings]
         write_rankings(rankings_as_list_of_sets, path)
 
+    def save_binary(self, path: str) -> None:
+        """
+        Stores the dataset in a binary file: the matrices of positions and bucket ids, the labels of the elements,
+        the weights of the rankings and the metadata of the dataset. Contrary to write, the file can be opened
+        without any parsing, see open_binary.
+
+        :param path: the path to store the dataset
+        :raise ValueError: If the elements of the dataset are neither int nor str
+        :return: None
+        """
+        arrays: Dict[str, np.ndarray] = {"positions": self._positions, "bucket_ids": self._bucket_ids,
+                                         "weights": self._weights}
+        if self._labels.dtype == np.int64:
+            labels_kind: str = "int"
+            arrays["labels"] = self._labels
+        else:
+            labels_kind = "str"
+            if not all(isinstance(element.value, str) for element in self._labels):
+                raise ValueError("Only datasets of int or str elements can be stored in a binary file")
+            # str labels are stored as one utf-8 blob and the offsets of each label in the blob
+            encoded: List[bytes] = [element.value.encode() for element in self._labels]
+            offsets: np.ndarray = np.zeros(len(encoded) + 1, dtype=np.int64)
+            np.cumsum([len(label) for label in encoded], out=offsets[1:])
+            arrays["labels"] = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+            arrays["labels_offsets"] = offsets
+        if self._compression_mapping is not None:
+            arrays["compression_mapping"] = self._compression_mapping
+        metadata: Dict[str, Union[str, int, bool]] = {"name": self._name, "nb_elements": self.nb_elements,
+                                                      "nb_rankings": self.nb_rankings, "labels": labels_kind,
+                                                      "is_complete": self._is_complete,
+                                                      "without_ties": self._without_ties}
+        write_binary_arrays(path, metadata, arrays)
+
+    @classmethod
+    def open_binary(cls, path: str, mmap: bool = True) -> 'Dataset':
+        """
+        Open a dataset stored with save_binary.
+
+        :param path: The path to the binary file
+        :param mmap: If True, the matrices of positions and bucket ids are memory-mapped rather than read: opening is
+                     immediate whatever the size of the dataset, the pages of the file are only loaded when accessed,
+                     and several processes opening the same file share them through the page cache. The mapping is
+                     copy-on-write, the file is never modified.
+        :raise ValueError: If the file is not a binary dataset file
+        :return: The Dataset stored in the file
+        """
+        metadata, arrays = read_binary_arrays(path, mmap)
+        nb_elements: int = metadata["nb_elements"]
+        nb_rankings: int = metadata["nb_rankings"]
+        if metadata["labels"] == "int":
+            labels: np.ndarray = np.array(arrays["labels"], dtype=np.int64)
+        else:
+            blob: bytes = arrays["labels"].tobytes()
+            offsets: List[int] = arrays["labels_offsets"].tolist()
+            labels = np.empty(nb_elements, dtype=object)
+            labels[:] = [Element(blob[offsets[i]:offsets[i + 1]].decode()) for i in range(nb_elements)]
+        dataset: Dataset = cls.__new__(cls)
+        dataset._init_attributes(metadata["name"])
+        dataset._weights = np.array(arrays["weights"], dtype=np.float64)
+        dataset._set_core(labels, arrays["positions"].reshape(nb_elements, nb_rankings),
+                          arrays["bucket_ids"].reshape(nb_elements, nb_rankings), metadata["without_ties"],
+                          metadata["is_complete"])
+        if "compression_mapping" in arrays:
+            dataset._compression_mapping = np.array(arrays["compression_mapping"], dtype=np.int64)
+        return dataset
+
     @staticmethod
     def get_uniform_permutation_dataset(nb_elem: int, nb_rankings: int):
         """
@@ -513,14 +1194,41 @@ class Dataset:
         return Dataset(Ranking.generate_rankings(nb_elem, nb_rankings, steps, complete))
 
     @staticmethod
-    def get_datasets_from_folder(path_folder: str) -> List['Dataset']:
+    def get_datasets_from_folder(path_folder: str, selector: Optional['DatasetSelector'] = None,
+                                 nb_processes: int = 1) -> List['Dataset']:
         """
         Get a List of Dataset, one by file of the folder path
         :param path_folder: the path of the folder containing the datasets
-        :return: a List containing one Dataset by dataset file in the input folder path
+        :param selector: if not None, only the datasets selected by the DatasetSelector are kept, see
+        iter_datasets_from_folder
+        :param nb_processes: the number of processes parsing the files, see iter_datasets_from_folder
+        :return: a List containing one Dataset by dataset file in the input folder path, in sorted order of the names
+        of the files
         """
-        return [Dataset._from_raw_list_with_elements
-                (rankings, name=file_path) for rankings, file_path in get_rankings_from_folder(path_folder)]
+        return list(Dataset.iter_datasets_from_folder(path_folder, selector, nb_processes))
+
+    @staticmethod
+    def iter_datasets_from_folder(path_folder: str, selector: Optional['DatasetSelector'] = None,
+                                  nb_processes: int = 1, prefetch: Optional[int] = None) -> Iterator['Dataset']:
+        """
+        Iterate over the datasets of a folder, one by file, in sorted order of the names of the files. The files can be
+        text files of rankings or binary files written by save_binary. Only the datasets being parsed and the ones
+        parsed in advance are in memory at the same time.
+
+        :param path_folder: the path of the folder containing the datasets
+        :param selector: if not None, only the datasets selected by the DatasetSelector are yielded. Binary files are
+                         selected from their header before being read, see DatasetSelector.select_file, text files once
+                         parsed, by the process that parses them
+        :param nb_processes: if greater than 1, the files are parsed in parallel by a pool of nb_processes processes
+        :param prefetch: the maximal number of files parsed in advance by the pool of processes, 2 * nb_processes by
+                         default
+        :return: an iterator over the Datasets of the folder
+        """
+        paths: Iterator[str] = (join_paths(path_folder, file_name) for file_name in sorted(os.listdir(path_folder)))
+        if selector is not None:
+            paths = filter(selector.select_file, paths)
+        datasets: Iterator[Optional[Dataset]] = _datasets_of_files(paths, selector, nb_processes, prefetch)
+        yield from (dataset for dataset in datasets if dataset is not None)
 
     def __repr__(self):
         """
@@ -545,7 +1253,7 @@ class Dataset:
         yielding each ranking in turn.
         :return: An iterator over the rankings in the Dataset.        """
 
-        return iter(self._rankings)
+        return iter(self.rankings)
 
     def __getitem__(self, index: int) -> Ranking:
         """
@@ -560,7 +1268,8 @@ class Dataset:
 
     def __eq__(self, other):
         """
-        Check if this Dataset is equivalent to another Dataset, regardless of the order of the Rankings.
+        Check if this Dataset is equivalent to another Dataset, regardless of the order of the Rankings. A ranking
+        repeated k times is equivalent to the same ranking with weight k.
 
         :param other: Other Dataset to compare with.
         :returns: True if both Datasets are equivalent, False otherwise.
@@ -569,10 +1278,70 @@ class Dataset:
         if not isinstance(other, Dataset):
             return NotImplemented
 
-        self_str_rankings: List[str] = [str(ranking).strip().replace(" ", "") for ranking in self.rankings]
-        other_str_rankings: List[str] = [str(ranking).strip().replace(" ", "") for ranking in other.rankings]
+        return self._weighted_str_rankings() == other._weighted_str_rankings()
 
-        return Counter(self_str_rankings) == Counter(other_str_rankings)
+    def _weighted_str_rankings(self) -> Counter:
+        """
+        :return: A Counter that associates to each distinct ranking its total weight in the dataset, the rankings being
+                 compared as the sequences of the sets of the str of their elements, whatever the order of iteration
+                 of the buckets.
+        """
+        res: Counter = Counter()
+        for ranking, weight in zip(self.rankings, self._weights):
+            res[tuple(frozenset(map(str, bucket)) for bucket in ranking.buckets)] += weight
+        return res
+
+
+def _dataset_of_file(path: str, mmap: bool, selector: Optional['DatasetSelector']) -> Optional[Dataset]:
+    """
+    Get the Dataset of a file, named after the file. Module-level so that it can be sent to worker processes.
+
+    :param path: The path of the file, text file of rankings or binary file written by Dataset.save_binary
+    :param mmap: For binary files, whether the arrays are memory-mapped, see Dataset.open_binary
+    :param selector: if not None, the DatasetSelector that the dataset of a text file must fit with. Binary files are
+                     selected from their header before, see DatasetSelector.select_file
+    :return: The Dataset of the file, None if it does not fit with the selector
+    """
+    if is_binary_file(path):
+        dataset: Dataset = Dataset.open_binary(path, mmap)
+        dataset.name = name_file(path)
+        return dataset
+    dataset = Dataset._from_entries(*parse_rankings_file(path), name=name_file(path))
+    if selector is not None and not selector.is_selected(dataset.nb_elements, dataset.nb_rankings):
+        return None
+    return dataset
+
+
+def _datasets_of_files(paths: Iterable[str], selector: Optional['DatasetSelector'], nb_processes: int,
+                       prefetch: Optional[int]) -> Iterator[Optional[Dataset]]:
+    """
+    Iterate over the datasets of files, in order, see Dataset.iter_datasets_from_folder.
+
+    :param paths: The paths of the files
+    :param selector: if not None, the DatasetSelector that the datasets of text files must fit with, see
+                     _dataset_of_file
+    :param nb_processes: if greater than 1, the files are parsed in parallel by a pool of nb_processes processes
+    :param prefetch: the maximal number of files parsed in advance by the pool of processes, 2 * nb_processes by
+                     default
+    :return: an iterator over the Datasets of the files, None for the datasets that do not fit with the selector
+    """
+    if nb_processes <= 1:
+        for path in paths:
+            yield _dataset_of_file(path, True, selector)
+        return
+
+    max_pending: int = max(1, prefetch if prefetch is not None else 2 * nb_processes)
+    # the workers are spawned rather than forked: forking a process whose numba threads are running is unsafe
+    with ProcessPoolExecutor(max_workers=nb_processes, mp_context=get_context("spawn")) as executor:
+        pending: Deque[Future] = deque()
+        for path in paths:
+            # the datasets are yielded in order, so the oldest pending file is waited for first
+            if len(pending) == max_pending:
+                yield pending.popleft().result()
+            # the binary files are read in memory, as mapped arrays cannot be sent back by the workers
+            pending.append(executor.submit(_dataset_of_file, path, False, selector))
+        while pending:
+            yield pending.popleft().result()
 
 
 class DatasetSelector:
@@ -637,12 +1406,26 @@ class DatasetSelector:
         * self.nb_elem_min <= d.nb_elements <= self.nb_elem_max
         * self.nb_rankings_min <= d.nb_rankings <= self.nb_rankings_max
         """
-        res: List[Dataset] = []
-        for dataset in list_datasets:
-            if self._nb_elem_min <= dataset.nb_elements <= self._nb_elem_max:
-                if self._nb_rankings_min <= dataset.nb_rankings <= self._nb_rankings_max:
-                    res.append(dataset)
-        return res
+        return [dataset for dataset in list_datasets if self.is_selected(dataset.nb_elements, dataset.nb_rankings)]
+
+    def is_selected(self, nb_elements: int, nb_rankings: int) -> bool:
+        """
+        :param nb_elements: the number of elements of a dataset
+        :param nb_rankings: the number of rankings of a dataset
+        :return: True iif a dataset with such numbers of elements and rankings fits with the filter
+        """
+        return self._nb_elem_min <= nb_elements <= self._nb_elem_max and \
+            self._nb_rankings_min <= nb_rankings <= self._nb_rankings_max
+
+    def select_file(self, path: str) -> bool:
+        """
+        Check whether the dataset of a file fits with the filter from the header of the file, without reading the
+        rankings. Only binary files have a header with the numbers of elements and rankings: text files are accepted
+        here, their datasets are to be checked with is_selected once parsed.
+        :param path: the path of a file of rankings, text or binary
+        :return: False iif the file is a binary file whose dataset does not fit with the filter
+        """
+        return not is_binary_file(path) or self.is_selected(*rankings_file_statistics(path))
 
     def __str__(self) -> str:
         """
@@ -3,36 +3,78 @@ This module contains the Element class used to encapsulate an element to be rank
 An element is defined as an int or a string.
 """
 
-from typing import Union, Type
+from typing import Union, Type, Tuple
+from weakref import WeakValueDictionary
 
 
 class Element:
     """
     A class to represent an element of a ranking.
 
+    Elements are interned: building an Element from a value returns the canonical Element of this value, so that all the
+    rankings and datasets share the same instances, and that equal elements are most often compared by identity. The
+    interning table only keeps weak references: an Element no longer used by any ranking or dataset is freed.
+
     :param value: the value of the element, either an integer or a string
     :type value: Union[int, str]
     """
 
-    def __init__(self, value: Union[int, str, 'Element']):
+    __slots__ = ("_type", "_value", "__weakref__")
+
+    # interning table: the canonical Element of each (type, value) pair, as long as this Element is alive
+    _pool: 'WeakValueDictionary[Tuple[Type, Union[int, str]], Element]' = WeakValueDictionary()
+
+    def __new__(cls, value: Union[int, str, 'Element']) -> 'Element':
         """
-        Constructs an Element instance with the given value.
+        Returns the canonical Element instance of the given value, creating it the first time the value is seen.
 
         :param value: The value of the element, either an integer or a string
         :type value: Union[int, str]
         :raises TypeError: If value is not an integer or a string
+        :return: The canonical Element of the value
+        :rtype: Element
         """
+        if isinstance(value, Element):
+            return value
         if isinstance(value, int):
-            self._type = int
-            self._value = value
+            value_type: Type = int
         elif isinstance(value, str):
-            self._type = str
-            self._value = value
-        elif isinstance(value, Element):
-            self._type = value.type
-            self._value = value.value
+            value_type = str
         else:
             raise TypeError("Value must be int, str or Element ", type(value), " found")
+        key: Tuple[Type, Union[int, str]] = (value_type, value)
+        element: Element = cls._pool.get(key)
+        if element is None:
+            element = super().__new__(cls)
+            element._type = value_type
+            element._value = value
+            element = cls._pool.setdefault(key, element)
+        return element
+
+    def __reduce__(self) -> Tuple[Type, Tuple[Union[int, str]]]:
+        """
+        Pickles an Element as its value, so that unpickling goes through the interning table.
+
+        :return: The callable and the arguments to rebuild the Element
+        """
+        return Element, (self._value,)
+
+    def __copy__(self) -> 'Element':
+        """
+        Elements are immutable and interned, a copy is the element itself.
+
+        :return: The element itself
+        """
+        return self
+
+    def __deepcopy__(self, memo: dict) -> 'Element':
+        """
+        Elements are immutable and interned, a deep copy is the element itself.
+
+        :param memo: The memo dict of deepcopy
+        :return: The element itself
+        """
+        return self
 
     @property
     def value(self) -> Union[int, str]:
@@ -68,6 +110,8 @@ class Element:
         :return: True if both elements have the same value, False otherwise.
         :rtype: bool
         """
+        if other is self:
+            return True
         if isinstance(other, Element):
             return self.type == other.type and self.value == other.value
         if isinstance(other, str):
@@ -3,12 +3,315 @@ Module for computation of Kemeny scores. The algorithme of score computation is
 elements and m the number of rankings. The algorithm is based on the number of inversion counting.
 """
 
-from typing import Dict, List, Tuple, Set
-from numpy import zeros, vdot, ndarray, sort, asarray, cumsum, concatenate
+from typing import Dict, List, Tuple
+from numba import jit, prange
+from numpy import zeros, vdot, ndarray, asarray, empty, int64, float64, full, bincount, argmin, inf, concatenate, \
+    cumsum, lexsort, nonzero, ascontiguousarray
 from corankco.scoringscheme import ScoringScheme
 from corankco.ranking import Ranking
 from corankco.element import Element
 from corankco.dataset import Dataset
+from corankco.utils import jit_for_positions_types
+
+
+@jit("int64(int64[:], int64[:])", nopython=True, cache=True)
+def _count_inversions(sequence, buffer):
+    """
+    Sorts the sequence with a bottom-up merge sort, and counts its inversions on the way.
+
+    :param sequence: The 1D array to sort, sorted in place
+    :param buffer: A scratch array of the same size
+    :return: The number of pairs i < j such that sequence[i] > sequence[j]
+    """
+    nb_values = sequence.shape[0]
+    nb_inversions = 0
+    width = 1
+    while width < nb_values:
+        for left in range(0, nb_values - width, 2 * width):
+            middle = left + width
+            right = min(left + 2 * width, nb_values)
+            cursor_left = left
+            cursor_right = middle
+            cursor_merge = left
+            while cursor_left < middle and cursor_right < right:
+                # equal values are not an inversion: the left one is taken first
+                if sequence[cursor_right] < sequence[cursor_left]:
+                    nb_inversions += middle - cursor_left
+                    buffer[cursor_merge] = sequence[cursor_right]
+                    cursor_right += 1
+                else:
+                    buffer[cursor_merge] = sequence[cursor_left]
+                    cursor_left += 1
+                cursor_merge += 1
+            while cursor_left < middle:
+                buffer[cursor_merge] = sequence[cursor_left]
+                cursor_left += 1
+                cursor_merge += 1
+            sequence[left:cursor_merge] = buffer[left:cursor_merge]
+        width *= 2
+    return nb_inversions
+
+
+@jit_for_positions_types()
+def _inversions_of_permutations(positions, consensus_buckets):
+    """
+    Counts, for each input ranking, the pairs of elements placed in distinct buckets of the consensus and in the reverse
+    order in the ranking. The input rankings must be complete and without ties, so that the positions in a ranking are
+    a permutation of the elements.
+
+    :param positions: The 2D ndarray matrix where positions[i][j] is the position of element int id i in ranking j
+    :param consensus_buckets: The bucket of each element in the consensus
+    :return: The number of inversions of each input ranking
+    """
+    nb_elem, nb_rankings = positions.shape
+    inversions = zeros(nb_rankings, dtype=int64)
+    sequence = empty(nb_elem, dtype=int64)
+    buffer = empty(nb_elem, dtype=int64)
+    for id_ranking in range(nb_rankings):
+        # buckets of the consensus, elements being in the order of the input ranking
+        for elem in range(nb_elem):
+            sequence[positions[elem][id_ranking]] = consensus_buckets[elem]
+        inversions[id_ranking] = _count_inversions(sequence, buffer)
+    return inversions
+
+
+@jit("void(int64[:], int64, int64[:], int64[:], int64[:], int64[:], int64[:])", nopython=True, cache=True)
+def _count_situations_of_ranking(ranked_keys, nb_buckets, missing_by_bucket, size_of_bucket, sequence, buffer,
+                                 counts):
+    """
+    Adds to counts the pairs of elements of the consensus in each situation in a ranking, see
+    _situation_counts_of_rankings, in O(nb_ranked * log(nb_ranked) + nb_buckets).
+
+    :param ranked_keys: The keys position * nb_buckets + bucket in the consensus of the elements ranked in the ranking,
+                        sorted in place
+    :param nb_buckets: The number of buckets of the consensus
+    :param missing_by_bucket: The number of elements of each bucket of the consensus that are non-ranked in the ranking
+    :param size_of_bucket: The number of elements of each bucket of the consensus
+    :param sequence: A scratch array with at least as many values as ranked_keys
+    :param buffer: A scratch array with at least as many values as ranked_keys
+    :param counts: The 12 counts of the situations to increment
+    :return: None
+    """
+    nb_ranked = ranked_keys.shape[0]
+    # pairs with at least one non-ranked element, and pairs of ranked elements tied in the consensus
+    nb_missing = missing_by_bucket.sum()
+    missing_before = 0
+    tied_in_consensus = 0
+    for bucket in range(nb_buckets):
+        nb_missing_in_bucket = missing_by_bucket[bucket]
+        nb_ranked_in_bucket = size_of_bucket[bucket] - nb_missing_in_bucket
+        missing_after = nb_missing - missing_before - nb_missing_in_bucket
+        counts[3] += nb_ranked_in_bucket * missing_after
+        counts[4] += nb_ranked_in_bucket * missing_before
+        counts[5] += nb_missing_in_bucket * missing_after
+        counts[9] += nb_ranked_in_bucket * nb_missing_in_bucket
+        counts[11] += nb_missing_in_bucket * (nb_missing_in_bucket - 1) // 2
+        tied_in_consensus += nb_ranked_in_bucket * (nb_ranked_in_bucket - 1) // 2
+        missing_before += nb_missing_in_bucket
+
+    # pairs of ranked elements: ties of the ranking are runs of equal positions, ties of both rankings are runs of
+    # equal keys
+    ranked_keys.sort()
+    tied_in_ranking = 0
+    tied_in_both = 0
+    first_of_position = 0
+    first_of_key = 0
+    for index in range(1, nb_ranked + 1):
+        if index == nb_ranked or ranked_keys[index] != ranked_keys[first_of_key]:
+            nb_same_key = index - first_of_key
+            tied_in_both += nb_same_key * (nb_same_key - 1) // 2
+            first_of_key = index
+        if index == nb_ranked or ranked_keys[index] // nb_buckets != ranked_keys[first_of_position] // nb_buckets:
+            nb_same_position = index - first_of_position
+            tied_in_ranking += nb_same_position * (nb_same_position - 1) // 2
+            first_of_position = index
+    for index in range(nb_ranked):
+        sequence[index] = ranked_keys[index] % nb_buckets
+    # within a bucket of the ranking, the buckets of the consensus are sorted: no inversion between tied elements
+    inversions = _count_inversions(sequence[:nb_ranked], buffer[:nb_ranked])
+    tied_in_consensus_only = tied_in_consensus - tied_in_both
+    counts[0] += nb_ranked * (nb_ranked - 1) // 2 - tied_in_ranking - inversions - tied_in_consensus_only
+    counts[1] += inversions
+    counts[2] += tied_in_ranking - tied_in_both
+    counts[6] += tied_in_consensus_only
+    counts[8] += tied_in_both
+
+
+@jit_for_positions_types()
+def _situation_counts_of_rankings(positions, consensus_buckets, absent_by_bucket):
+    """
+    Counts, for each input ranking, the pairs of elements of the consensus in each situation. For a pair (x, y) with x
+    before y in the consensus, the situations are x before y, x after y, x tied with y in the ranking, only x ranked,
+    only y ranked, none of them ranked (columns 0 to 5). The same situations are counted in columns 6 to 11 for the
+    pairs tied in the consensus, a pair tied in the consensus only being counted in column 6 if x and y are in distinct
+    buckets of the ranking, and in column 9 if only one of them is ranked.
+
+    Each ranking costs O(nb_elem * log(nb_elem) + nb_buckets): the ranked elements are sorted by position in the ranking
+    then by bucket in the consensus, and the pairs in the reverse order in the consensus are the inversions of the
+    buckets of the consensus in this order.
+
+    :param positions: The 2D ndarray matrix where positions[i][j] is the position of element int id i in ranking j
+    :param consensus_buckets: The bucket of each element in the consensus
+    :param absent_by_bucket: The number of elements of each bucket of the consensus that are not elements of the
+                             dataset, and thus non-ranked in all the rankings
+    :return: The (nb_rankings, 12) matrix of the counts of the situations
+    """
+    nb_elem, nb_rankings = positions.shape
+    nb_buckets = absent_by_bucket.shape[0]
+    size_of_bucket = absent_by_bucket.copy()
+    for elem in range(nb_elem):
+        size_of_bucket[consensus_buckets[elem]] += 1
+    counts = zeros((nb_rankings, 12), dtype=int64)
+    missing_by_bucket = empty(nb_buckets, dtype=int64)
+    keys = empty(nb_elem, dtype=int64)
+    sequence = empty(nb_elem, dtype=int64)
+    buffer = empty(nb_elem, dtype=int64)
+    for id_ranking in range(nb_rankings):
+        missing_by_bucket[:] = absent_by_bucket
+        nb_ranked = 0
+        for elem in range(nb_elem):
+            position = positions[elem][id_ranking]
+            if position < 0:
+                missing_by_bucket[consensus_buckets[elem]] += 1
+            else:
+                keys[nb_ranked] = position * nb_buckets + consensus_buckets[elem]
+                nb_ranked += 1
+        _count_situations_of_ranking(keys[:nb_ranked], nb_buckets, missing_by_bucket, size_of_bucket, sequence, buffer,
+                                     counts[id_ranking])
+    return counts
+
+
+@jit("float64(int64[:], int64, int64[:], int64[:], int64[:], int64[:], int64[:], int64[:], int64[:], int64[:], "
+     "float64[:])", nopython=True, cache=True)
+def _cost_of_candidate_in_ranking(candidate, nb_buckets, size_of_bucket, ranked_elements, ranked_positions,
+                                  missing_by_bucket, keys, sequence, buffer, counts, penalties):
+    """
+    Cost of a candidate consensus ranking for one input ranking, that is the generalized Kendall-tau distance between
+    the ranking and the candidate.
+
+    :param candidate: The bucket of each element in the candidate
+    :param nb_buckets: The number of buckets of the candidate
+    :param size_of_bucket: The number of elements of each bucket of the candidate
+    :param ranked_elements: The IDs of the elements ranked in the input ranking
+    :param ranked_positions: The positions of these elements in the input ranking
+    :param missing_by_bucket: A scratch array of nb_buckets values
+    :param keys: A scratch array with at least as many values as ranked_elements
+    :param sequence: A scratch array with at least as many values as ranked_elements
+    :param buffer: A scratch array with at least as many values as ranked_elements
+    :param counts: A scratch array of 12 values
+    :param penalties: The 12 penalties of the situations, the b vector then the t vector of the scoring scheme
+    :return: The cost of the candidate for the input ranking
+    """
+    nb_ranked = ranked_elements.shape[0]
+    missing_by_bucket[:] = size_of_bucket
+    for index in range(nb_ranked):
+        bucket = candidate[ranked_elements[index]]
+        missing_by_bucket[bucket] -= 1
+        keys[index] = ranked_positions[index] * nb_buckets + bucket
+    counts[:] = 0
+    _count_situations_of_ranking(keys[:nb_ranked], nb_buckets, missing_by_bucket, size_of_bucket, sequence, buffer,
+                                 counts)
+    cost = 0.
+    for situation in range(12):
+        cost += counts[situation] * penalties[situation]
+    return cost
+
+
+@jit("float64[:](int64[:, :], int64[:], int64[:], int64[:], float64[:], float64[:], float64, boolean, int64)",
+     nopython=True, parallel=True, cache=True)
+def _kemeny_scores_of_candidates(candidates, ranking_offsets, ranked_elements, ranked_positions, weights, penalties,
+                                 upper_bound, tighten_bound, block_size):
+    """
+    Kemeny scores of candidate consensus rankings, see PreparedKemenyComputation.scores. The candidates are scored in
+    parallel, by blocks of block_size candidates. The score of a candidate is accumulated ranking by ranking: as the
+    penalties and the weights are non-negative, the candidate is abandoned as soon as its partial score exceeds the
+    upper bound, and its score is then infinite.
+
+    :param candidates: The (nb_candidates, nb_elem) matrix of the bucket of each element in each candidate
+    :param ranking_offsets: The ranked elements of ranking r are ranked_elements[ranking_offsets[r]:
+                            ranking_offsets[r + 1]]
+    :param ranked_elements: The IDs of the ranked elements of each ranking
+    :param ranked_positions: The positions of the ranked elements in their ranking
+    :param weights: a float64 array that associates a weight for each ranking
+    :param penalties: The 12 penalties of the situations, the b vector then the t vector of the scoring scheme
+    :param upper_bound: The upper bound of the scores, infinite for no bound
+    :param tighten_bound: if True, after each block, the upper bound becomes the best score found so far if lower
+    :param block_size: The number of candidates scored with the same upper bound
+    :return: The score of each candidate, infinite if it exceeds the upper bound
+    """
+    nb_candidates, nb_elem = candidates.shape
+    nb_rankings = weights.shape[0]
+    scores = empty(nb_candidates, dtype=float64)
+    bound = upper_bound
+    for first_candidate in range(0, nb_candidates, block_size):
+        last_candidate = min(first_candidate + block_size, nb_candidates)
+        for id_candidate in prange(first_candidate, last_candidate):
+            candidate = candidates[id_candidate]
+            nb_buckets = 0
+            for elem in range(nb_elem):
+                nb_buckets = max(nb_buckets, candidate[elem] + 1)
+            size_of_bucket = zeros(nb_buckets, dtype=int64)
+            for elem in range(nb_elem):
+                size_of_bucket[candidate[elem]] += 1
+            missing_by_bucket = empty(nb_buckets, dtype=int64)
+            keys = empty(nb_elem, dtype=int64)
+            sequence = empty(nb_elem, dtype=int64)
+            buffer = empty(nb_elem, dtype=int64)
+            counts = zeros(12, dtype=int64)
+            score = 0.
+            for id_ranking in range(nb_rankings):
+                first = ranking_offsets[id_ranking]
+                last = ranking_offsets[id_ranking + 1]
+                score += weights[id_ranking] * _cost_of_candidate_in_ranking(
+                    candidate, nb_buckets, size_of_bucket, ranked_elements[first:last], ranked_positions[first:last],
+                    missing_by_bucket, keys, sequence, buffer, counts, penalties)
+                if score > bound:
+                    score = inf
+                    break
+            scores[id_candidate] = score
+        if tighten_bound:
+            for id_candidate in range(first_candidate, last_candidate):
+                bound = min(bound, scores[id_candidate])
+    return scores
+
+
+@jit("float64[:, :](int64[:, :], int64[:], int64[:], int64[:], float64[:])", nopython=True, parallel=True, cache=True)
+def _costs_of_candidates_by_ranking(candidates, ranking_offsets, ranked_elements, ranked_positions, penalties):
+    """
+    Costs of candidate consensus rankings for each input ranking, see PreparedKemenyComputation.scores_by_ranking. The
+    candidates are processed in parallel.
+
+    :param candidates: The (nb_candidates, nb_elem) matrix of the bucket of each element in each candidate
+    :param ranking_offsets: The ranked elements of ranking r are ranked_elements[ranking_offsets[r]:
+                            ranking_offsets[r + 1]]
+    :param ranked_elements: The IDs of the ranked elements of each ranking
+    :param ranked_positions: The positions of the ranked elements in their ranking
+    :param penalties: The 12 penalties of the situations, the b vector then the t vector of the scoring scheme
+    :return: The (nb_candidates, nb_rankings) matrix of the costs
+    """
+    nb_candidates, nb_elem = candidates.shape
+    nb_rankings = ranking_offsets.shape[0] - 1
+    costs = empty((nb_candidates, nb_rankings), dtype=float64)
+    for id_candidate in prange(nb_candidates):
+        candidate = candidates[id_candidate]
+        nb_buckets = 0
+        for elem in range(nb_elem):
+            nb_buckets = max(nb_buckets, candidate[elem] + 1)
+        size_of_bucket = zeros(nb_buckets, dtype=int64)
+        for elem in range(nb_elem):
+            size_of_bucket[candidate[elem]] += 1
+        missing_by_bucket = empty(nb_buckets, dtype=int64)
+        keys = empty(nb_elem, dtype=int64)
+        sequence = empty(nb_elem, dtype=int64)
+        buffer = empty(nb_elem, dtype=int64)
+        counts = zeros(12, dtype=int64)
+        for id_ranking in range(nb_rankings):
+            first = ranking_offsets[id_ranking]
+            last = ranking_offsets[id_ranking + 1]
+            costs[id_candidate][id_ranking] = _cost_of_candidate_in_ranking(
+                candidate, nb_buckets, size_of_bucket, ranked_elements[first:last], ranked_positions[first:last],
+                missing_by_bucket, keys, sequence, buffer, counts, penalties)
+    return costs
 
 
 class InvalidRankingsForComputingDistance(Exception):
@@ -36,242 +339,221 @@ class KemenyComputingFactory:
         """
         return self.__scoring_scheme
 
+    def prepare(self, dataset: Dataset) -> 'PreparedKemenyComputation':
+        """
+        :param dataset: the dataset
+        :return: an object that scores many candidate consensus rankings against the dataset, the arrays of the dataset
+                 being computed once, see PreparedKemenyComputation
+        """
+        return PreparedKemenyComputation(self.__scoring_scheme, dataset)
+
     def get_kemeny_score(self, ranking: Ranking, dataset: Dataset) -> float:
         """
         Note that a Consensus object can be defined by several consensus rankings. Only the first one will be considered
         to compute the score. All consensus rankings of a Consensus object should be equivalent in quality
         """
-        # dict : keys = elements of dom(consensus) and values = bucket id of associated element
-        mapping_elem_consensus_id_bucket: Dict[Element, int] = {}
-        id_bucket: int = 0
+        consensus_buckets, absent_by_bucket = KemenyComputingFactory.consensus_buckets(ranking, dataset)
+        return self.get_kemeny_score_of_buckets(consensus_buckets, dataset, absent_by_bucket)
+
+    def get_kemeny_score_by_ranking(self, ranking: Ranking, dataset: Dataset) -> ndarray:
+        """
+        Generalized Kendall-tau distance between each input ranking and a consensus, computed in a single compiled pass
+        over the rankings. The Kemeny score of the consensus is the dot product of the distances and dataset.weights.
+
+        :param ranking: the consensus ranking, complete towards the dataset
+        :param dataset: the dataset
+        :raise InvalidRankingsForComputingDistance: if an element of the dataset is not in the consensus
+        :return: the 1D array of the distance between each ranking of the dataset and the consensus
+        """
+        consensus_buckets, absent_by_bucket = KemenyComputingFactory.consensus_buckets(ranking, dataset)
+        counts: ndarray = _situation_counts_of_rankings(dataset.get_compact_positions(), consensus_buckets,
+                                                        absent_by_bucket)
+        return counts @ asarray(self.__scoring_scheme.b_vector + self.__scoring_scheme.t_vector, dtype=float64)
+
+    def get_distance_matrix(self, dataset: Dataset) -> ndarray:
+        """
+        Generalized Kendall-tau distances between the rankings of the dataset, computed in parallel. The distance
+        d[i][j] is the cost of the ranking j, taken as a consensus, for the ranking i. The consensus must be complete:
+        if the ranking j is incomplete, its non-ranked elements are placed in a unifying bucket at its end, as in
+        Dataset.unified_rankings. Note that d[i][j] = d[j][i] for complete rankings only if the cost of having x and y
+        tied in the ranking i and not in the ranking j (b_vector[2]) is the cost of the reverse situation
+        (t_vector[0]).
+
+        :param dataset: the dataset
+        :return: the (nb_rankings, nb_rankings) matrix of the distances
+        """
+        candidates_dataset: Dataset = dataset if dataset.is_complete else dataset.unified_dataset()
+        return self.prepare(dataset).scores_by_ranking(candidates_dataset.get_bucket_ids().T).T
+
+    def get_kemeny_score_of_buckets(self, consensus_buckets: ndarray, dataset: Dataset,
+                                    absent_by_bucket: ndarray = None) -> float:
+        """
+        Kemeny score of a consensus given as the bucket of each element of the dataset, computed in
+        O(nb_rankings * nb_elements * log(nb_elements)) compiled time from the positions of the dataset.
+
+        :param consensus_buckets: consensus_buckets[i] = the bucket of the element of ID i in the consensus, the buckets
+                                  being numbered from 0 without gap
+        :param dataset: the dataset
+        :param absent_by_bucket: the number of elements of each bucket of the consensus which are not elements of the
+                                 dataset, see consensus_buckets. None if the consensus only has elements of the dataset
+        :return: the Kemeny score of the consensus
+        """
+        consensus_buckets = asarray(consensus_buckets, dtype=int64)
+        if absent_by_bucket is None:
+            absent_by_bucket = zeros(consensus_buckets.max() + 1 if consensus_buckets.shape[0] > 0 else 0, dtype=int64)
+        # complete rankings without ties, on the same elements as the consensus: inversion counting only
+        if dataset.is_complete and dataset.without_ties and absent_by_bucket.sum() == 0:
+            return self.__kemeny_score_of_permutations(consensus_buckets, dataset)
+        counts: ndarray = _situation_counts_of_rankings(dataset.get_compact_positions(), consensus_buckets,
+                                                        absent_by_bucket)
+        # each ranking counts as many times as its weight in the dataset
+        weighted_counts: ndarray = dataset.weights @ counts
+        return vdot(weighted_counts[:6], asarray(self.__scoring_scheme.b_vector)) + \
+            vdot(weighted_counts[6:], asarray(self.__scoring_scheme.t_vector))
 
-        for bucket_consensus in ranking:
+    @staticmethod
+    def consensus_buckets(ranking: Ranking, dataset: Dataset) -> Tuple[ndarray, ndarray]:
+        """
+        :param ranking: a consensus ranking, complete towards the dataset
+        :param dataset: the dataset
+        :raise InvalidRankingsForComputingDistance: if an element of the dataset is not in the consensus
+        :return: a tuple with the bucket of each element of the dataset in the consensus (by ID of element), and the
+                 number of elements of each bucket of the consensus which are not elements of the dataset
+        """
+        consensus_buckets: ndarray = full(dataset.nb_elements, -1, dtype=int64)
+        absent_by_bucket: ndarray = zeros(len(ranking), dtype=int64)
+        mapping_elem_id: Dict[Element, int] = dataset.mapping_elem_id
+        for id_bucket, bucket_consensus in enumerate(ranking):
             for elem_consensus in bucket_consensus:
-                mapping_elem_consensus_id_bucket[elem_consensus] = id_bucket
-            id_bucket += 1
+                id_element: int = mapping_elem_id.get(elem_consensus, -1)
+                if id_element < 0:
+                    absent_by_bucket[id_bucket] += 1
+                else:
+                    consensus_buckets[id_element] = id_bucket
         # check if consensus is complete towards dataset
-        for ranking_dataset in dataset:
-            for bucket_ranking_dataset in ranking_dataset:
-                for element in bucket_ranking_dataset:
-                    if element not in mapping_elem_consensus_id_bucket:
-                        raise InvalidRankingsForComputingDistance("The consensus must be compete towards the Dataset."
-                                                                  "Elem " + str(element) + "found in Dataset and "
-                                                                                           "not in consensus")
-
-        # initialisation of sums s_1 and s_2.
-        # s_1 is the cost due to pairs x, y of elements such that x < y in the target consensus
-        # s_2 is the cost due to pairs x, y of elements such that x and y are tied in the consensus
-        # s_1 (resp. s_2) must contain the number of pairs of elements (x,y) such that x < y
-        # (resp. x is tied with y) in the consensus and
-        # rank 0: x < y in input rankings
-        # rank 1: x > y in input rankings
-        # rank 2: x is tied with y in input rankings
-        # rank 3: x is present and y is missing in input rankings
-        # rank 4: x is missing and y is present in input rankings
-        # rank 5: x and y are missing in input rankings
-
-        s_1: ndarray = zeros(6, dtype=int)
-        s_2: ndarray = zeros(6, dtype=int)
-
-        # the cost induced by each ranking
-        for input_ranking in dataset:
-            cost_ranking: Tuple[float, float] = self.__cost_by_ranking(
-                ranking, mapping_elem_consensus_id_bucket, input_ranking)
-            s_1 += cost_ranking[0]
-            s_2 += cost_ranking[1]
-
-        return vdot(s_1, asarray(self.__scoring_scheme.b_vector)) + vdot(s_2, asarray(self.__scoring_scheme.t_vector))
+        if (consensus_buckets < 0).any():
+            element: Element = dataset.mapping_id_elem[int(argmin(consensus_buckets))]
+            raise InvalidRankingsForComputingDistance("The consensus must be compete towards the Dataset."
+                                                      "Elem " + str(element) + "found in Dataset and not in consensus")
+        return consensus_buckets, absent_by_bucket
 
-    @staticmethod
-    def __cost_by_ranking(ranking_consensus: Ranking,
-                          mapping_elem_consensus_id_bucket: Dict[Element, int],
-                          r_input: Ranking) -> tuple:
-        nb_buckets_consensus: int = len(ranking_consensus)
-
-        s_1: ndarray = zeros(6, dtype=int)
-        s_2: ndarray = zeros(6, dtype=int)
-
-        # t_3[i] is the number of elements in consensus[i] missing in input ranking r
-        t_3: ndarray = zeros(nb_buckets_consensus, dtype=int)
-
-        missing_elements: Set[Element] = set(mapping_elem_consensus_id_bucket.keys())
-        domain_ranking: Set[Element] = set()
-        # r_prime is the following list of arrays : each element of each bucket of r becomes the
-        # number of the bucket where this element is in the consensus ranking (mapping dict)
-        r_prime: List[ndarray] = []
-
-        for bucket in r_input:
-            bucket_mapped: List[int] = []
-
-            for element in bucket:
-                bucket_mapped.append(mapping_elem_consensus_id_bucket.get(element))
-                missing_elements.remove(element)
-                domain_ranking.add(element)
-            # the arrays must be sorted for the merging procedure
-            r_prime.append(sort(asarray(bucket_mapped), kind='mergesort'))
-        # getting values of t_1, t_2 and t_3.
-        # t_1[i] is the number of elements missing in r and before the bucket i in the consensus
-        # t_2[i] is the number of elements missing in r and after the bucket i in the consensus
-        for element in missing_elements:
-            id_bucket_consensus = mapping_elem_consensus_id_bucket[element]
-            t_3[id_bucket_consensus] += 1
-
-        # t_1 is the cumulated sum of (t_3 with a 0 added as first element and without the last element)
-        t_1 = cumsum(concatenate((zeros(1), t_3[:-1])))
-        # t_2[i] = nb of missing elements in r - sum on j < i (t_3[j])
-        t_2 = len(missing_elements) - cumsum(t_3)
-
-        # computation of s_1[3]
-        # To get the number of pairs of elements (x,y) such that x < y in consensus and x is
-        # present and y missing in r, we use t_2 : each integer k of r_prime is the bucket id
-        # of a present element x in ranking. As the number of missing elements of r placed
-        # after x in consensus is t_2[k], we increment the value of s_1[3] by t_2[k] for each
-        # k of r_prime.
-
-        # computation of s_1[4]
-        # To get the number of pairs of elements (x,y) such that x < y in consensus and x is
-        # missing and y present in r, we use t_1 : each integer k of r_prime is the bucket
-        # id of a present element x in ranking. As the number of missing elements of ranking
-        # placed before x in consensus is t_1[k], we increment the value of s_1[4] by t_1[k]
-        # for each k of r_prime.
-
-        for bucket in r_prime:
-            for elem_r_prime in bucket:
-                s_1[3] += t_2[elem_r_prime]
-                s_1[4] += t_1[elem_r_prime]
-
-        nb_missing_remaining: int = len(missing_elements)
-
-        # computation of s_1[2]
-        # To get the number of pairs of elements (x,y) such that x < y in consensus and x is tied
-        # with y in r, we use r_prime. The value of s_1[2] is the number of distinct pairs of
-        # r_prime that is the sum of the product ( cardinal of each distinct value x in r_prime *
-        # the number of elements higher than x in r_prime).
-
-        for _, r_prime_i in enumerate(r_prime):
-            # increments s_1[2]
-            s_1_2: int = 0
-            cursor: int = 0
-            bucket_i_r: ndarray = r_prime_i
-            bucket_size_r: int = len(bucket_i_r)
-            while cursor < bucket_size_r - 1:
-                repetition: int = 1
-                while cursor < bucket_size_r - 1 and bucket_i_r[cursor] == bucket_i_r[cursor + 1]:
-                    repetition += 1
-                    cursor += 1
-                cursor += 1
-                s_1_2 += repetition * (bucket_size_r - cursor)
-            s_1[2] += s_1_2
-
-        # computation of s_1[5] induced by ranking
-        # To get the number of pairs of elements (x,y) such that x < y in consensus and x and y are
-        # both missing in r, we use t_3 : t_3[i] gives the number of elements in bucket i of
-        # consensus that are not in r. This number must be multiplied by the sum of t_3[j], j > i
-        ###
-        # computation of s_2[5] induced by ranking
-        # To get the number of pairs of elements (x,y) such that x is tied with y in consensus and
-        # x and y are both missing in r, we use t_3 again. This number is the sum on i of the number
-        # of pairs of t_3[i] elements
-
-        # computation of s_2[3] + s_2[4] induced by ranking (s_2[3] and s_2[4] induce same costs).
-        # To get the number of pairs of elements (x,y) such that x is tied with y in consensus
-        # and (x is present whereas y is missing or x is missing whereas y is present in r),
-        # we use t_3 again. This number is the sum on i of the number of pairs (x,y) of elements
-        # in the bucket i of consensus such that x is present and y is missing.
-
-        for i, consensus_i in enumerate(ranking_consensus):
-            # increments s_1[5], s_2[3] + s_2[4], s_2[5]
-            nb_missing_elements_in_bucket_i_consensus: int = t_3[i]
-            if nb_missing_elements_in_bucket_i_consensus > 0:
-                # increments s_1[5]
-                nb_missing_remaining -= nb_missing_elements_in_bucket_i_consensus
-
-                s_1[5] += nb_missing_remaining * nb_missing_elements_in_bucket_i_consensus
-
-                # increments s_2[3] (could be s_2[4] as well, they represent the same
-                # cases / same penalty)
-
-                s_2[3] += (len(consensus_i) -
-                           nb_missing_elements_in_bucket_i_consensus) * nb_missing_elements_in_bucket_i_consensus
-                if nb_missing_elements_in_bucket_i_consensus > 1:
-                    # increments s_2[5]
-                    s_2[5] += nb_missing_elements_in_bucket_i_consensus * (
-                            nb_missing_elements_in_bucket_i_consensus - 1) / 2
-
-        KemenyComputingFactory.__mergesortlike(r_prime, 0, len(r_prime) - 1, s_1, s_2)
-
-        return s_1, s_2
+    def __kemeny_score_of_permutations(self, consensus_buckets: ndarray, dataset: Dataset) -> float:
+        """
+        Kemeny score of a consensus when the input rankings are complete and without ties. Each pair of elements is
+        then either in the same order in the consensus and in a ranking, or inverted, or tied in the consensus only:
+        the score only depends on the number of inversions of each ranking.
+
+        :param consensus_buckets: the bucket of each element in the consensus, whose elements are the elements of the
+                                  dataset
+        :param dataset: the dataset, complete and without ties
+        :return: the Kemeny score of the consensus
+        """
+        inversions: ndarray = _inversions_of_permutations(dataset.get_compact_positions(), consensus_buckets)
 
-    @staticmethod
-    def __mergesortlike(r_prime: List[ndarray], left: int, right: int, s_1: ndarray,
-                        s_2: ndarray) -> ndarray:
-        # if input ranking is empty
-        if not r_prime:
-            return asarray([])
-        # case end of recursion
-        if right <= left:
-            return r_prime[right]
-        # divide problem into two sub-problems of same size and merge
-        middle: int = (right - left) // 2
-        begin: int = middle + left + 1
-        return KemenyComputingFactory.__merge(KemenyComputingFactory.__mergesortlike(
-            r_prime, left, middle + left, s_1, s_2),
-            KemenyComputingFactory.__mergesortlike(
-                r_prime, begin, right, s_1, s_2),
-            s_1, s_2)
+        nb_elements: int = dataset.nb_elements
+        sizes_of_buckets: ndarray = bincount(consensus_buckets)
+        nb_tied_pairs: int = int((sizes_of_buckets * (sizes_of_buckets - 1) // 2).sum())
+        nb_ordered_pairs: int = nb_elements * (nb_elements - 1) // 2 - nb_tied_pairs
+        weights: ndarray = dataset.weights
+        b_vector: List[float] = self.__scoring_scheme.b_vector
+        # the pairs tied in the consensus are x before y in each ranking, see _situation_counts_of_rankings
+        return b_vector[0] * vdot(weights, nb_ordered_pairs - inversions) + b_vector[1] * vdot(weights, inversions) \
+            + self.__scoring_scheme.t_vector[0] * nb_tied_pairs * weights.sum()
 
-    @staticmethod
-    def __merge(left: ndarray, right: ndarray, s_1: ndarray, s_2: ndarray):
-        res = zeros(len(left) + len(right), dtype=int)
-        nb_elem_left: int = len(left)
-        nb_elem_right: int = len(right)
-        cursor_left: int = 0
-        cursor_right: int = 0
-        cursor_merge: int = 0
-        while cursor_left < nb_elem_left and cursor_right < nb_elem_right:
-            nb1: int = left[cursor_left]
-            nb2: int = right[cursor_right]
-
-            # no inversion
-            if nb1 < nb2:
-                res[cursor_merge] = nb1
-                cursor_merge += 1
-                cursor_left += 1
-            # inversion
-            elif nb1 > nb2:
-                s_1[1] += nb_elem_left - cursor_left
-                res[cursor_merge] = nb2
-                cursor_merge += 1
-                cursor_right += 1
 
-            # here, case where two elements were tied in the consensus and not tied in r
-            else:
-                cpt1: int = 0
-                cpt2: int = 0
-                while cursor_left < nb_elem_left and left[cursor_left] == nb1:
-                    res[cursor_merge] = nb1
-                    cursor_merge += 1
-                    cursor_left += 1
-                    cpt1 += 1
-                while cursor_right < nb_elem_right and right[cursor_right] == nb1:
-                    res[cursor_merge] = nb1
-                    cursor_merge += 1
-                    cursor_right += 1
-                    cpt2 += 1
-                # cpt1 repetitions of nb and cpt2 repetitions of nb2 with nb1 = nb2 :
-                # nb1 * nb2 number of pairs of elements (x,y) such that x tied with y in
-                # consensus and not tied in r
-                s_2[0] += cpt1 * cpt2
-                # number of added inversions
-                s_1[1] += cpt2 * (nb_elem_left - cursor_left)
-
-        while cursor_left < nb_elem_left:
-            res[cursor_merge] = left[cursor_left]
-            cursor_merge += 1
-            cursor_left += 1
-        while cursor_right < nb_elem_right:
-            res[cursor_merge] = right[cursor_right]
-            cursor_merge += 1
-            cursor_right += 1
-
-        return res
+class PreparedKemenyComputation:
+    """
+    Kemeny scores of many candidate consensus rankings against the same dataset, see KemenyComputingFactory.prepare. The
+    ranked elements of each ranking, sorted by position, are computed once, then the candidates are scored in parallel.
+    """
+
+    # number of candidates scored with the same upper bound, see scores
+    BLOCK_SIZE: int = 64
+
+    def __init__(self, scoring_scheme: ScoringScheme, dataset: Dataset):
+        """
+        :param scoring_scheme: the scoring scheme of the Kemeny scores
+        :param dataset: the dataset
+        """
+        self._scoring_scheme: ScoringScheme = scoring_scheme
+        self._dataset: Dataset = dataset
+        # ranking-major order: the ranked elements of each ranking are consecutive, sorted by position
+        positions_rankings: ndarray = dataset.get_compact_positions().T
+        ranking_of_ranked, ranked_elements = nonzero(positions_rankings >= 0)
+        ranked_positions: ndarray = positions_rankings[ranking_of_ranked, ranked_elements].astype(int64)
+        order: ndarray = lexsort((ranked_positions, ranking_of_ranked))
+        self._ranked_elements: ndarray = ascontiguousarray(ranked_elements[order], dtype=int64)
+        self._ranked_positions: ndarray = ascontiguousarray(ranked_positions[order])
+        nb_ranked: ndarray = bincount(ranking_of_ranked, minlength=dataset.nb_rankings)
+        self._ranking_offsets: ndarray = concatenate((zeros(1, dtype=int64), cumsum(nb_ranked))).astype(int64)
+        self._weights: ndarray = asarray(dataset.weights, dtype=float64)
+        self._penalties: ndarray = asarray(scoring_scheme.b_vector + scoring_scheme.t_vector, dtype=float64)
+
+    @property
+    def dataset(self) -> Dataset:
+        """
+        :return: the dataset of the scores
+        """
+        return self._dataset
+
+    @property
+    def scoring_scheme(self) -> ScoringScheme:
+        """
+        :return: the scoring scheme of the scores
+        """
+        return self._scoring_scheme
+
+    def scores_by_ranking(self, candidates: ndarray) -> ndarray:
+        """
+        Costs of candidate consensus rankings for each ranking of the dataset, without the weights of the rankings,
+        that is the generalized Kendall-tau distances between the candidates and the rankings, in parallel.
+
+        :param candidates: the (nb_candidates, nb_elements) matrix of the bucket of each element in each candidate, see
+                           scores
+        :raise InvalidRankingsForComputingDistance: if an element of the dataset is not in a candidate
+        :return: the (nb_candidates, nb_rankings) matrix of the distances. The Kemeny scores of the candidates are the
+                 product of this matrix and dataset.weights
+        """
+        return _costs_of_candidates_by_ranking(self._checked_candidates(candidates), self._ranking_offsets,
+                                               self._ranked_elements, self._ranked_positions, self._penalties)
+
+    def scores(self, candidates: ndarray, upper_bound: float = None) -> ndarray:
+        """
+        Kemeny scores of candidate consensus rankings, in parallel. Each candidate is given as the bucket of each
+        element of the dataset, see KemenyComputingFactory.consensus_buckets, the buckets being numbered from 0 (gaps
+        are allowed).
+
+        If an upper bound is given, the score of a candidate is infinite as soon as its partial score exceeds the
+        lowest among the upper bound and the scores of the previous blocks of BLOCK_SIZE candidates: the candidates
+        which can be optimal among the given ones keep their exact score, the others may be abandoned early. The result
+        does not depend on the number of threads.
+
+        :param candidates: the (nb_candidates, nb_elements) matrix of the bucket of each element in each candidate, or
+                           a 1D array for a single candidate
+        :param upper_bound: if not None, the scores greater than the upper bound or than the best score so far are
+                            not computed, and are infinite
+        :raise InvalidRankingsForComputingDistance: if an element of the dataset is not in a candidate
+        :return: the 1D array of the Kemeny scores of the candidates
+        """
+        return _kemeny_scores_of_candidates(self._checked_candidates(candidates), self._ranking_offsets,
+                                            self._ranked_elements, self._ranked_positions, self._weights,
+                                            self._penalties,
+                                            inf if upper_bound is None else float(upper_bound),
+                                            upper_bound is not None, PreparedKemenyComputation.BLOCK_SIZE)
+
+    def _checked_candidates(self, candidates: ndarray) -> ndarray:
+        """
+        :param candidates: a matrix of candidates, or a single candidate, see scores
+        :raise ValueError: if the candidates do not have the number of elements of the dataset
+        :raise InvalidRankingsForComputingDistance: if an element of the dataset is not in a candidate
+        :return: the candidates as a contiguous (nb_candidates, nb_elements) int64 matrix
+        """
+        candidates = ascontiguousarray(candidates, dtype=int64)
+        if candidates.ndim == 1:
+            candidates = candidates.reshape(1, -1)
+        if candidates.shape[1] != self._dataset.nb_elements:
+            raise ValueError(f"The candidates must have {self._dataset.nb_elements} elements, got "
+                             f"{candidates.shape[1]}")
+        if (candidates < 0).any():
+            raise InvalidRankingsForComputingDistance("The consensus must be complete towards the Dataset")
+        return candidates
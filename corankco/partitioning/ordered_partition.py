@@ -6,14 +6,14 @@ More precisely, this module defines an ordered partition, and gives two static m
 partitions of the above article.
 """
 
-from typing import List, Set, Dict, Iterator
+from typing import List, Set, Dict, Iterator, Tuple
 from numpy import ndarray
 from corankco.consensus import Consensus
 from corankco.element import Element
 from corankco.ranking import Ranking
 from corankco.dataset import Dataset
 from corankco.scoringscheme import ScoringScheme
-from corankco.algorithms.pairwisebasedalgorithm import PairwiseBasedAlgorithm
+from corankco.algorithms.pairwisebasedalgorithm import PairwiseBasedAlgorithm, TiledCostMatrix
 
 
 class OrderedPartition:
@@ -173,10 +173,11 @@ class OrderedPartition:
         """
         id_elements: Dict[int, Element] = dataset.mapping_id_elem
 
-        positions: ndarray = dataset.get_positions()
-        gr1, _, robust_arcs = \
-            PairwiseBasedAlgorithm.graph_of_elements_with_robust_arcs(positions, scoring_scheme)
-        sccs = gr1.components()
+        positions: ndarray = dataset.get_compact_positions()
+        cost_matrix: ndarray = PairwiseBasedAlgorithm.pairwise_cost_matrix_packed(positions, scoring_scheme,
+                                                                                  dataset.weights)
+        robust_arcs: Set[Tuple[int, int]] = PairwiseBasedAlgorithm.robust_arcs(cost_matrix)
+        sccs: List[List[int]] = PairwiseBasedAlgorithm.components_of_graph_of_elements(cost_matrix)
 
         # initialization of the partition
         # initially, the partition is a topological sort of the scc of the graph of elements
@@ -216,23 +217,37 @@ class OrderedPartition:
         return OrderedPartition([set(id_elements[elem] for elem in group) for group in partition])
 
     @staticmethod
-    def parcons_partition(dataset: Dataset, scoring_scheme: ScoringScheme) -> 'OrderedPartition':
+    def parcons_partition(dataset: Dataset, scoring_scheme: ScoringScheme, tile_size: int = None,
+                          tiles_directory: str = None) -> 'OrderedPartition':
         """
         :param dataset: A dataset containing the rankings to aggregate
         :type dataset: Dataset (class Dataset in package 'datasets')
         :param scoring_scheme: The ScoringScheme to consider (see ScoringScheme class)
         :type scoring_scheme: ScoringScheme
+        :param tile_size: if not None, the cost matrix is computed on disk by tiles of tile_size pairs of elements and
+                          the graph of elements is never built, so that the memory used is about nb_elements² / 4
+                          bytes, see TiledCostMatrix
+        :type tile_size: int
+        :param tiles_directory: the directory of the temporary file of the tiled cost matrix, the default temporary
+                                directory if None
+        :type tiles_directory: str
         :return a list of sets of elements such that there exists an exact consensus ranking which is consistent with
         the obtained partitioning
         """
         # mapping between the unique ID of elements and the related element
         id_elements: Dict[int, Element] = dataset.mapping_id_elem
         # 2D matrix ndarray, position[i][j] = position of element whose unique ID is i in ranking j, -1 if non-ranked
-        positions: ndarray = dataset.get_positions()
-        # computes the graph of element presented in the article of the docstring class
-        gr1, _ = PairwiseBasedAlgorithm.graph_of_elements(positions, scoring_scheme)
-        # the partition is a topological sort of the scc of the graph of elements
-        sccs = gr1.components()
+        positions: ndarray = dataset.get_compact_positions()
+        if tile_size is not None:
+            # the scc of the graph of elements are computed tile by tile, in a topological sort
+            with TiledCostMatrix.compute(positions, scoring_scheme, dataset.weights, tile_size=tile_size,
+                                         directory=tiles_directory) as tiled_matrix:
+                sccs = tiled_matrix.components()
+        else:
+            # the partition is a topological sort of the scc of the graph of element presented in the article of the
+            # docstring class, computed from the cost matrix without building the graph
+            sccs = PairwiseBasedAlgorithm.components_of_graph_of_elements(
+                PairwiseBasedAlgorithm.pairwise_cost_matrix_packed(positions, scoring_scheme, dataset.weights))
 
         # initialization of the partition
         partition: List[Set[Element]] = []
@@ -3,7 +3,7 @@ Module Ranking, containing one class (Ranking). A Ranking is defined as List of
 disjoint sets of elements.
 """
 
-from typing import List, Set, Union, Dict, Iterator
+from typing import List, Set, Union, Dict, Iterator, Optional
 from random import shuffle, randint
 import numpy as np
 from corankco.element import Element
@@ -14,6 +14,10 @@ class Ranking:
     """
     A class to represent a ranking, defined as a List of disjoint Set of Elements
 
+    A ranking is stored as two NumPy arrays: the elements in bucket order, and the offsets of the buckets in this array,
+    so that bucket i holds the elements elements_array[bucket_offsets[i]:bucket_offsets[i+1]]. The elements of integer
+    rankings are stored as raw int64 values, the others as an object array of Elements. The view of the ranking as
+    buckets, positions and domain is only materialized when asked, and then kept.
     """
 
     def __init__(self, buckets: Union[List[Set[int]], List[Set[str]], List[Set[Element]]]):
@@ -25,20 +29,95 @@ class Ranking:
         :raises ValueError: If buckets are not disjoint
 
         """
-        self._buckets: List[Set[Element]] = [{Element(x) for x in bucket} for bucket in buckets]
+        values: list = []
+        sizes: List[int] = []
+        for bucket in buckets:
+            size_before: int = len(values)
+            values.extend(bucket)
+            sizes.append(len(values) - size_before)
+
+        # raw integers are stored as they are, without building any Element
+        elements: Optional[np.ndarray] = None
+        if all(type(value) is int for value in values):
+            elements = Ranking._int_array(values)
+        if elements is None:
+            elements_enc: List[Element] = [Element(value) for value in values]
+            if all(element.type is int for element in elements_enc):
+                elements = Ranking._int_array([element.value for element in elements_enc])
+            if elements is None:
+                elements = Ranking._object_array(elements_enc)
+
+        offsets: np.ndarray = np.zeros(len(sizes) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=offsets[1:])
+        self._set_arrays(elements, offsets)
 
-        # Initialize element_positions
-        self._positions: Dict[Element, int] = {}
+    @classmethod
+    def from_arrays(cls, elements: np.ndarray, offsets: np.ndarray) -> 'Ranking':
+        """
+        Constructs a Ranking instance from its array representation, without building any bucket.
 
-        # Check if buckets are disjoint and populate element_positions
-        position: int = 1
-        for bucket in buckets:
-            for element in bucket:
-                element_enc: Element = Element(element)
-                if element_enc in self._positions:
+        :param elements: A 1D array of the elements in bucket order: an int array for rankings of integers, or an object
+                         array of Elements
+        :param offsets: A 1D int array of size nb_buckets + 1, such that bucket i holds the elements
+                        elements[offsets[i]:offsets[i+1]]
+        :raises ValueError: If an element is found more than once
+        :return: A Ranking instance
+        :rtype: Ranking
+        """
+        ranking: Ranking = cls.__new__(cls)
+        if elements.dtype.kind in "iu":
+            elements = elements.astype(np.int64, copy=False)
+        elif elements.dtype != object:
+            elements = Ranking._object_array([Element(value) for value in elements.tolist()])
+        ranking._set_arrays(elements, np.asarray(offsets, dtype=np.int64))
+        return ranking
+
+    def _set_arrays(self, elements: np.ndarray, offsets: np.ndarray):
+        """
+        Sets the array representation of the ranking, after checking that the buckets are disjoint. The lazy views are
+        reset.
+
+        :param elements: The 1D array of the elements in bucket order, int64 or object array of Elements
+        :param offsets: The 1D int64 array of the offsets of the buckets
+        :raises ValueError: If an element is found more than once
+        :return: None
+        """
+        if elements.dtype == object:
+            nb_distinct: int = len(set(elements.tolist()))
+        else:
+            nb_distinct = len(np.unique(elements))
+        if nb_distinct != len(elements):
+            seen: Set = set()
+            for element in elements.tolist():
+                if element in seen:
                     raise ValueError(f"Element {element} found in multiple buckets. Buckets must be disjoint.")
-                self._positions[element_enc] = position
-            position += len(bucket)
+                seen.add(element)
+
+        self._elements: np.ndarray = elements
+        self._offsets: np.ndarray = offsets
+        self._buckets: Optional[List[Set[Element]]] = None
+        self._positions: Optional[Dict[Element, int]] = None
+
+    @staticmethod
+    def _int_array(values: list) -> Optional[np.ndarray]:
+        """
+        :param values: A list of int values
+        :return: The values as an int64 array, or None if a value does not fit in 64 bits
+        """
+        try:
+            return np.asarray(values, dtype=np.int64)
+        except OverflowError:
+            return None
+
+    @staticmethod
+    def _object_array(elements: List[Element]) -> np.ndarray:
+        """
+        :param elements: A list of Elements
+        :return: The Elements as a 1D object array
+        """
+        array: np.ndarray = np.empty(len(elements), dtype=object)
+        array[:] = elements
+        return array
 
     @classmethod
     def from_string(cls, ranking_str: str) -> 'Ranking':
@@ -79,25 +158,72 @@ class Ranking:
             ranking_str: str = file.read()
         return cls.from_string(ranking_str)
 
+    @property
+    def elements_array(self) -> np.ndarray:
+        """
+        Returns the elements of the ranking in bucket order. Note that the array is shared: it must not be modified.
+
+        :return: A 1D array, int64 for a ranking of integers, of Elements otherwise
+        :rtype: np.ndarray
+        """
+        return self._elements
+
+    @property
+    def bucket_offsets(self) -> np.ndarray:
+        """
+        Returns the offsets of the buckets in elements_array. Note that the array is shared: it must not be modified.
+
+        :return: A 1D int64 array of size nb_buckets + 1, bucket i holds elements_array[offsets[i]:offsets[i+1]]
+        :rtype: np.ndarray
+        """
+        return self._offsets
+
+    @property
+    def is_of_int(self) -> bool:
+        """
+        Returns true iif the elements of the ranking are stored as raw integers.
+
+        :return: True iif elements_array is an int array
+        :rtype: bool
+        """
+        return self._elements.dtype != object
+
+    def _elements_enc(self) -> List[Element]:
+        """
+        :return: The elements of the ranking in bucket order, as a list of Elements
+        """
+        if self._elements.dtype == object:
+            return self._elements.tolist()
+        return [Element(value) for value in self._elements.tolist()]
+
     @property
     def buckets(self) -> List[Set[Element]]:
         """
-        Returns the buckets of the ranking.
+        Returns the buckets of the ranking, built at first call.
 
         :return: The buckets of the ranking
         :rtype: List[Set[Element]]
 
         """
+        if self._buckets is None:
+            elements: List[Element] = self._elements_enc()
+            offsets: List[int] = self._offsets.tolist()
+            self._buckets = [set(elements[offsets[i]:offsets[i + 1]]) for i in range(len(offsets) - 1)]
         return self._buckets
 
     @property
     def positions(self) -> Dict[Element, int]:
         """
-        Returns the positions of the elements in the ranking.
+        Returns the positions of the elements in the ranking, built at first call.
 
         :return: The positions of the elements in the ranking
         :rtype: Dict[Element, int]
         """
+        if self._positions is None:
+            sizes: np.ndarray = np.diff(self._offsets)
+            # position (starting from 1) of the bucket of each element
+            positions: List[int] = np.repeat(self._offsets[:-1] + 1, sizes).tolist()
+            self._positions = dict(zip(self._elements_enc(), positions))
         return self._positions
 
     @property
@@ -108,7 +234,7 @@ class Ranking:
         :return: A set of Elements which are the unique elements in the Ranking.
 
         """
-        return set(self._positions.keys())
+        return set(self._elements_enc())
 
     @property
     def nb_elements(self) -> int:
@@ -119,7 +245,7 @@ class Ranking:
         :return: An integer which is the number of unique elements in the Ranking.
 
         """
-        return len(self.domain)
+        return len(self._elements)
 
     def can_be_of_int(self) -> bool:
         """
@@ -129,11 +255,9 @@ class Ranking:
         :rtype: bool
 
         """
-        for bucket in self._buckets:
-            for element in bucket:
-                if not element.can_be_int():
-                    return False
-        return True
+        if self._elements.dtype != object:
+            return True
+        return all(element.can_be_int() for element in self._elements.tolist())
 
     def __len__(self) -> int:
         """
@@ -145,7 +269,7 @@ class Ranking:
         Returns:
             An integer representing the number of buckets in the Ranking.
         """
-        return len(self._buckets)
+        return len(self._offsets) - 1
 
     def __iter__(self) -> Iterator[Set[Element]]:
         """
@@ -156,7 +280,7 @@ class Ranking:
         return: An iterator over the buckets in the Ranking.
 
         """
-        return iter(self._buckets)
+        return iter(self.buckets)
 
     def __str__(self) -> str:
         """
@@ -166,7 +290,7 @@ class Ranking:
         :rtype: str
 
         """
-        return str([set(bucket) for bucket in self._buckets])
+        return str([set(bucket) for bucket in self.buckets])
 
     def __repr__(self) -> str:
         """
@@ -176,7 +300,7 @@ class Ranking:
         :rtype: str
 
         """
-        return str([set(bucket) for bucket in self._buckets])
+        return str([set(bucket) for bucket in self.buckets])
 
     def __getitem__(self, index: int) -> Set[Element]:
         """
@@ -202,8 +326,20 @@ class Ranking:
         if not isinstance(other, Ranking):
             return NotImplemented
 
+        if not np.array_equal(self._offsets, other._offsets):
+            return False
+        if self.is_of_int and other.is_of_int:
+            # same buckets iif same elements once sorted within each bucket
+            return np.array_equal(self._sorted_within_buckets(), other._sorted_within_buckets())
         return self.buckets == other.buckets
 
+    def _sorted_within_buckets(self) -> np.ndarray:
+        """
+        :return: The int elements of the ranking, sorted within each bucket
+        """
+        ids_buckets: np.ndarray = np.repeat(np.arange(len(self)), np.diff(self._offsets))
+        return self._elements[np.lexsort((self._elements, ids_buckets))]
+
     @staticmethod
     def uniform_permutations(nb_elem: int, nb_rankings: int) -> List['Ranking']:
         """
@@ -218,8 +354,9 @@ class Ranking:
         for _ in range(nb_rankings):
             ranking_random: List[int] = list(range(1, nb_elem + 1))
             shuffle(ranking_random)
-            ranking: List[Set[Element]] = [{Element(x)} for x in ranking_random]
-            rankings.append(Ranking(ranking))
+            # one element per bucket
+            rankings.append(Ranking.from_arrays(np.asarray(ranking_random, dtype=np.int64),
+                                                np.arange(nb_elem + 1, dtype=np.int64)))
         return rankings
 
     @staticmethod
@@ -267,17 +404,13 @@ class Ranking:
             else:
                 Ranking.__change_ranking_complete(ranking, steps, nb_elements)
 
-            # when rankings are modified, they are returned as a List of Set of integers
-            ranking_list: List[Set[Element]] = []
-            nb_buckets: int = np.max(ranking) + 1
-            for i in range(nb_buckets):
-                ranking_list.append(set())
-            for elem in range(nb_elements):
-                bucket_elem: int = ranking[elem]
-                if bucket_elem >= 0:
-                    ranking_list[bucket_elem].add(Element(elem))
-            if len(ranking_list) > 0:
-                rankings_list.append(Ranking(ranking_list))
+            # when rankings are modified, they are returned as arrays: ranked elements sorted by bucket id
+            present: np.ndarray = np.flatnonzero(ranking >= 0)
+            if len(present) > 0:
+                elements: np.ndarray = present[np.argsort(ranking[present], kind="stable")]
+                offsets: np.ndarray = np.zeros(np.max(ranking) + 2, dtype=np.int64)
+                np.cumsum(np.bincount(ranking[present]), out=offsets[1:])
+                rankings_list.append(Ranking.from_arrays(elements, offsets))
         return rankings_list
 
     @staticmethod
@@ -2,10 +2,71 @@
 Module with useful functions to interact with files or the os.
 """
 
-from typing import Callable, List, Tuple, Set
+from typing import Callable, List, Tuple, Set, Dict, Iterator, Union, Any
+from array import array
+import json
 import os
+import re
+import struct
+import numpy as np
+from numba import jit
+from numba.core.sigutils import normalize_signature
+from numba.core.typing import Signature
 from corankco.element import Element
 
+# a ranking in the usual formats [{A}, {B, C}] or [[A], [B, C]], checked with one regex before tokenization
+_RANKING_PATTERN = re.compile(r"[\[{]\s*(?:[\[{][^\[\]{}]*[\]}](?:\s*,\s*[\[{][^\[\]{}]*[\]}])*)?\s*[\]}]")
+# the content of a bucket
+_BUCKET_PATTERN = re.compile(r"[\[{]([^\[\]{}]*)[\]}]")
+
+# binary files: magic string, size of the JSON header, JSON header, then the arrays, each one aligned on 64 bytes
+_BINARY_MAGIC: bytes = b"CORANKCO"
+_BINARY_VERSION: int = 1
+_BINARY_ALIGNMENT: int = 64
+
+# integer types of the matrices of positions and bucket ids of the datasets, from the narrowest, see positions_dtype
+POSITIONS_TYPES: Tuple[str, ...] = ("int8", "int16", "int32")
+
+
+def positions_dtype(nb_elements: int) -> np.dtype:
+    """
+    :param nb_elements: a number of elements
+    :return: the narrowest type of POSITIONS_TYPES that can store the positions and the bucket ids of nb_elements
+             elements, from -1 (non-ranked) to nb_elements - 1. The type is signed because of the -1.
+    """
+    for positions_type in POSITIONS_TYPES[:-1]:
+        if nb_elements - 1 <= np.iinfo(positions_type).max:
+            return np.dtype(positions_type)
+    return np.dtype(POSITIONS_TYPES[-1])
+
+
+def jit_for_positions_types(**options) -> Callable:
+    """
+    Decorator of the numba kernels that read matrices of positions or bucket ids, whose type is one of POSITIONS_TYPES.
+    These kernels are compiled lazily, at the first call with each combination of types of arguments, rather than
+    eagerly for all the types: a process only uses a few of the combinations, and compiling all of them at import
+    would take minutes. The compiled kernels are cached on disk as the other ones.
+
+    :param options: options of numba.jit other than nopython and cache, e.g. parallel
+    :return: the decorator
+    """
+    return jit(nopython=True, cache=True, **options)
+
+
+def readonly_signatures(signatures: List[str], *readonly_args: int) -> List[Signature]:
+    """
+    :param signatures: numba signatures of a kernel
+    :param readonly_args: the indices of the array arguments that the kernel only reads
+    :return: the signatures where these arguments are read-only arrays, e.g. the matrices shared by a
+             PairwiseMatrixCache. Writeable arrays are accepted as well
+    """
+    res: List[Signature] = []
+    for signature in signatures:
+        args, return_type = normalize_signature(signature)
+        res.append(return_type(*(arg.copy(readonly=True) if index in readonly_args else arg
+                                 for index, arg in enumerate(args))))
+    return res
+
 
 def parse_ranking_with_ties(ranking: str, converter: Callable[[str], Element]) -> List[Set[Element]]:
     """
@@ -87,40 +148,252 @@ def parse_ranking_with_ties_of_int(ranking: str) -> List[Set[Element]]:
     return parse_ranking_with_ties(ranking, lambda x: Element(int(x)))
 
 
-def get_rankings_from_file(file: str) -> List[List[Set[Element]]]:
+def tokenize_ranking(ranking: str) -> Tuple[List[str], List[int]]:
     """
+    Function to split a ranking with ties into the str tokens of its elements, without any conversion. The usual formats
+    are tokenized with a few scans of the whole string; unusual formats and malformed rankings go through
+    parse_ranking_with_ties.
 
-    :param file: The file to get the rankings
-    :return: A List of Set of Element, i.e. a ranking, not yet encapsulated.
+    :param ranking: The str that corresponds to a ranking, for instance [{Bob}, {Martin, John}]
+    :raise ValueError: If the ranking is malformed
+    :return: a tuple with the List of the tokens of the elements in bucket order, and the List of the sizes of the
+             buckets
     """
-    ignore_lines = ["%"]
+    # removes the name of the ranking, and the final white spaces
+    body: str = ranking.strip().split(":")[-1].strip()
+    if _RANKING_PATTERN.fullmatch(body):
+        contents: List[str] = _BUCKET_PATTERN.findall(body, 1, len(body) - 1)
+        tokens: List[str] = list(map(str.strip, ",".join(contents).split(","))) if contents else []
+        # empty elements are reported by the generic parser
+        if "" not in tokens:
+            return tokens, [content.count(",") + 1 for content in contents]
+    buckets: List[Set[Element]] = parse_ranking_with_ties(ranking, Element)
+    return [str(element) for bucket in buckets for element in bucket], [len(bucket) for bucket in buckets]
+
+
+def _iter_ranking_lines(file: str) -> Iterator[str]:
+    """
+    Reads a file of rankings line by line, joining the lines ending with a backslash with the next one. Empty lines and
+    comments (lines starting with %) are skipped.
 
+    :param file: The file to read
+    :return: An iterator over the lines of the file that are rankings
+    """
+    ignore_lines = ["%"]
     with open(file, "r", encoding='utf-8') as file_rankings:
-        lines = file_rankings.read().replace("\\\n", "")
+        pending: str = ""
+        for line in file_rankings:
+            if line.endswith("\\\n"):
+                pending += line[:-2]
+                continue
+            line = pending + (line[:-1] if line.endswith("\n") else line)
+            pending = ""
+            if len(line) > 2 and line[0] not in ignore_lines:
+                yield line
+        if len(pending) > 2 and pending[0] not in ignore_lines:
+            yield pending
+
+
+def parse_rankings_file(file: str) -> Tuple[np.ndarray, Union[List[int], List[str]], np.ndarray, np.ndarray]:
+    """
+    Streaming parser of a file of rankings: the file is read line by line, and each element is directly replaced by a
+    unique int ID, in order of first appearance. The type of the elements is inferred once, at the end: the elements
+    are int iif all of them can be converted to int.
+
+    :param file: The file to get the rankings
+    :raise ValueError: If a ranking is malformed
+    :return: A tuple with the 1D int64 array of the IDs of the elements in bucket order (all the rankings being
+             concatenated), the List of the distinct elements (element of ID i at index i), the 1D int64 array of the
+             size of each bucket, and the 1D int64 array of the number of buckets of each ranking.
+    """
+    mapping_token_id: Dict[str, int] = {}
+    ids_elements: array = array("q")
+    sizes_buckets: array = array("q")
+    nb_buckets: array = array("q")
+    for line in _iter_ranking_lines(file):
+        tokens, sizes = tokenize_ranking(line)
+        ids_tokens: List[int] = list(map(mapping_token_id.get, tokens))
+        # the tokens seen for the first time get a new ID
+        if None in ids_tokens:
+            ids_tokens = [mapping_token_id.setdefault(token, len(mapping_token_id)) for token in tokens]
+        ids_elements.extend(ids_tokens)
+        sizes_buckets.extend(sizes)
+        nb_buckets.append(len(sizes))
+
+    ids: np.ndarray = np.asarray(ids_elements, dtype=np.int64)
+    tokens_elements: List[str] = list(mapping_token_id)
     try:
-        res = [parse_ranking_with_ties_of_int(line)
-               for line in lines.split("\n") if len(line) > 2 and line[0] not in ignore_lines]
+        values: List[int] = [int(token) for token in tokens_elements]
     except ValueError:
-        res = [parse_ranking_with_ties_of_str(line)
-               for line in lines.split("\n") if len(line) > 2 and line[0] not in ignore_lines]
+        return ids, tokens_elements, np.asarray(sizes_buckets, dtype=np.int64), np.asarray(nb_buckets, dtype=np.int64)
+
+    # distinct tokens such as 1 and 01 are the same int element
+    mapping_value_id: Dict[int, int] = {}
+    new_ids: List[int] = [mapping_value_id.setdefault(value, len(mapping_value_id)) for value in values]
+    if len(mapping_value_id) < len(values):
+        ids = np.asarray(new_ids, dtype=np.int64)[ids]
+    return ids, list(mapping_value_id), np.asarray(sizes_buckets, dtype=np.int64), np.asarray(nb_buckets,
+                                                                                                 dtype=np.int64)
+
+
+def get_rankings_from_file(file: str) -> List[List[Set[Element]]]:
+    """
+
+    :param file: The file to get the rankings
+    :return: A List of set of Element, i.e. a ranking, not yet encapsulated.
+    """
+    ids_elements, elements, sizes_buckets, nb_buckets = parse_rankings_file(file)
+    elements_enc: List[Element] = [Element(element) for element in elements]
+    res: List[List[Set[Element]]] = []
+    entry: int = 0
+    id_bucket: int = 0
+    for nb_buckets_ranking in nb_buckets.tolist():
+        ranking: List[Set[Element]] = []
+        for size in sizes_buckets[id_bucket:id_bucket + nb_buckets_ranking].tolist():
+            ranking.append({elements_enc[id_element] for id_element in ids_elements[entry:entry + size].tolist()})
+            entry += size
+        id_bucket += nb_buckets_ranking
+        res.append(ranking)
     return res
 
 
+def iter_rankings_from_folder(folder: str) -> Iterator[Tuple[List[List[Set[Element]]], str]]:
+    """
+    Generator version of get_rankings_from_folder: the files are parsed one at a time, in sorted order.
+
+    :param folder: The path of the folder where the datasets are stored.
+    :return: An iterator over the list of rankings (i.e. datasets not yet encapsulated) of each file, with the name of
+             the file.
+    """
+    for file_name in sorted(os.listdir(folder)):
+        yield get_rankings_from_file(join_paths(folder, file_name)), file_name
+
+
 def get_rankings_from_folder(folder: str) -> List[Tuple[List[List[Set[Element]]], str]]:
     """
 
     :param folder: The path of the folder where the datasets are stored.
     :return: A List of list of rankings (i.e. datasets not yet encapsulated) with the name of the file.
     """
-    res = []
-    if not folder.endswith(os.path.sep):
-        folder += os.path.sep
+    return list(iter_rankings_from_folder(folder))
 
-    for file_path in sorted(os.listdir(folder)):
-        rankings = get_rankings_from_file(folder + file_path)
-        res.append((rankings, file_path))
 
-    return res
+def rankings_file_statistics(file: str, count_elements: bool = True) -> Tuple[int, int]:
+    """
+    Get the number of elements and the number of rankings of a file of rankings without building the dataset. For a
+    binary file, both are read in its header. For a text file, the rankings are the non-empty non-comment lines, and
+    counting the elements requires to tokenize the rankings, which can be avoided with count_elements = False.
+
+    :param file: The file of rankings, text or binary
+    :param count_elements: If False, the number of elements of a text file is not computed and -1 is returned instead
+    :raise ValueError: If a ranking is malformed
+    :return: A tuple with the number of elements and the number of rankings of the file
+    """
+    if is_binary_file(file):
+        metadata: Dict[str, Any] = read_binary_header(file)[0]["metadata"]
+        return metadata["nb_elements"], metadata["nb_rankings"]
+    if not count_elements:
+        return -1, sum(1 for _ in _iter_ranking_lines(file))
+    tokens: Set[str] = set()
+    nb_rankings: int = 0
+    for line in _iter_ranking_lines(file):
+        tokens.update(tokenize_ranking(line)[0])
+        nb_rankings += 1
+    try:
+        # distinct tokens such as 1 and 01 are the same int element
+        return len({int(token) for token in tokens}), nb_rankings
+    except ValueError:
+        return len(tokens), nb_rankings
+
+
+def _aligned(offset: int) -> int:
+    """
+    :param offset: An offset in a binary file
+    :return: The lowest offset >= offset that is a multiple of the alignment of the arrays in binary files
+    """
+    return -(-offset // _BINARY_ALIGNMENT) * _BINARY_ALIGNMENT
+
+
+def write_binary_arrays(path: str, metadata: Dict[str, Any], arrays: Dict[str, np.ndarray]) -> None:
+    """
+    Writes named arrays and JSON-serializable metadata in a binary file, such that the arrays can be memory-mapped
+    when the file is read.
+
+    :param path: The path of the file to write
+    :param metadata: The metadata to store in the header of the file
+    :param arrays: The arrays to store, by name
+    :return: None
+    """
+    descriptions: Dict[str, Dict[str, Any]] = {}
+    # offsets are relative to the beginning of the data part of the file, which follows the header
+    offset: int = 0
+    for name, values in arrays.items():
+        descriptions[name] = {"dtype": values.dtype.str, "shape": list(values.shape), "offset": offset}
+        offset = _aligned(offset + values.nbytes)
+    header: bytes = json.dumps({"version": _BINARY_VERSION, "metadata": metadata, "arrays": descriptions}).encode()
+
+    data_start: int = _aligned(len(_BINARY_MAGIC) + 8 + len(header))
+    with open(path, "wb") as file:
+        file.write(_BINARY_MAGIC)
+        file.write(struct.pack("<Q", len(header)))
+        file.write(header)
+        for name, values in arrays.items():
+            file.write(b"\0" * (data_start + descriptions[name]["offset"] - file.tell()))
+            np.ascontiguousarray(values).tofile(file)
+
+
+def is_binary_file(path: str) -> bool:
+    """
+    :param path: The path of a file
+    :return: True iif the file starts as a binary file written by write_binary_arrays
+    """
+    with open(path, "rb") as file:
+        return file.read(len(_BINARY_MAGIC)) == _BINARY_MAGIC
+
+
+def read_binary_header(path: str) -> Tuple[Dict[str, Any], int]:
+    """
+    Reads the header of a binary file written by write_binary_arrays, without reading the arrays.
+
+    :param path: The path of the file to read
+    :raise ValueError: If the file is not a binary file of the expected format or version
+    :return: A tuple with the header (metadata and descriptions of the arrays), and the offset of the data part
+    """
+    with open(path, "rb") as file:
+        magic: bytes = file.read(len(_BINARY_MAGIC))
+        if magic != _BINARY_MAGIC:
+            raise ValueError(f"{path} is not a binary dataset file")
+        size_header: int = struct.unpack("<Q", file.read(8))[0]
+        header: Dict[str, Any] = json.loads(file.read(size_header).decode())
+    if header["version"] != _BINARY_VERSION:
+        raise ValueError(f"Unsupported version of binary dataset file: {header['version']}")
+    return header, _aligned(len(_BINARY_MAGIC) + 8 + size_header)
+
+
+def read_binary_arrays(path: str, mmap: bool = True) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """
+    Reads a binary file written by write_binary_arrays.
+
+    :param path: The path of the file to read
+    :param mmap: If True, the arrays are memory-mapped in copy-on-write mode: the pages of the file are only read when
+                 they are accessed, and shared through the page cache by all the processes that map the file. Otherwise,
+                 the arrays are read in memory.
+    :raise ValueError: If the file is not a binary file of the expected format or version
+    :return: A tuple with the metadata, and the arrays by name
+    """
+    header, data_start = read_binary_header(path)
+    arrays: Dict[str, np.ndarray] = {}
+    with open(path, "rb") as file:
+        for name, description in header["arrays"].items():
+            dtype: np.dtype = np.dtype(description["dtype"])
+            shape: Tuple[int, ...] = tuple(description["shape"])
+            offset: int = data_start + description["offset"]
+            if mmap and int(np.prod(shape)) > 0:
+                arrays[name] = np.memmap(path, dtype=dtype, mode="c", offset=offset, shape=shape)
+            else:
+                file.seek(offset)
+                arrays[name] = np.fromfile(file, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+    return header["metadata"], arrays
 
 
 def write_rankings(rankings: List[List[Set[Element]]], path: str) -> None:
@@ -1,8 +1,10 @@
+import os
 import unittest
 from corankco.dataset import Dataset
 from corankco.scoringscheme import ScoringScheme
 from corankco.algorithms.bioconsert.bioconsert import BioConsert
 from corankco.ranking import Ranking
+from corankco.consensus import ConsensusFeature
 
 
 class TestBioConsert(unittest.TestCase):
@@ -23,6 +25,33 @@ class TestBioConsert(unittest.TestCase):
         consensus = self.my_alg.compute_consensus_rankings(dataset, self.scoring_scheme_pseudo_05, False)
         self.assertEqual(len(consensus), 3)
 
+    def test_sparse_cost_matrix(self):
+        dataset = Dataset.from_file(os.path.join(os.path.dirname(os.path.abspath(__file__)), "dataset_examples",
+                                                 "dataset_example_top_k"))
+        for scoring_scheme in (self.scoring_scheme_unifying, self.scoring_scheme_pseudo_05):
+            consensus = self.my_alg.compute_consensus_rankings(dataset, scoring_scheme)
+            consensus_sparse = BioConsert(sparse=True).compute_consensus_rankings(dataset, scoring_scheme)
+            self.assertEqual(consensus.consensus_rankings, consensus_sparse.consensus_rankings)
+            self.assertEqual(consensus.features[ConsensusFeature.KEMENY_SCORE],
+                             consensus_sparse.features[ConsensusFeature.KEMENY_SCORE])
+
+    def test_sparse_cost_matrix_without_co_ranked_elements(self):
+        dataset = Dataset.from_raw_list([[{1}], [{2}], [{3}]])
+        consensus = self.my_alg.compute_consensus_rankings(dataset, self.scoring_scheme_pseudo_05)
+        consensus_sparse = BioConsert(sparse=True).compute_consensus_rankings(dataset, self.scoring_scheme_pseudo_05)
+        self.assertEqual(consensus.consensus_rankings, consensus_sparse.consensus_rankings)
+        self.assertEqual(consensus.features[ConsensusFeature.KEMENY_SCORE],
+                         consensus_sparse.features[ConsensusFeature.KEMENY_SCORE])
+
+    def test_nb_threads(self):
+        dataset = Dataset.get_uniform_permutation_dataset(30, 20)
+        consensus = BioConsert(nb_threads=1).compute_consensus_rankings(dataset, self.scoring_scheme_pseudo_05)
+        for sparse in (False, True):
+            consensus_parallel = BioConsert(sparse=sparse, nb_threads=4).compute_consensus_rankings(
+                dataset, self.scoring_scheme_pseudo_05)
+            self.assertEqual(consensus.consensus_rankings, consensus_parallel.consensus_rankings)
+            self.assertAlmostEqual(consensus.kemeny_score, consensus_parallel.kemeny_score)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,3 +1,4 @@
+import os
 import unittest
 from corankco.dataset import Dataset
 from corankco.scoringscheme import ScoringScheme
@@ -23,6 +24,34 @@ class TestCopeland(unittest.TestCase):
         consensus = self.my_alg.compute_consensus_rankings(dataset, self.scoring_scheme_induced)
         self.assertEqual(consensus.consensus_rankings[0], Ranking([{3}, {1}, {2}]))
 
+    def test_tiled_cost_matrix(self):
+        dataset = Dataset.get_random_dataset_markov(30, 10, 100)
+        consensus = self.my_alg.compute_consensus_rankings(dataset, self.scoring_scheme_pseudo)
+        consensus_tiled = CopelandMethod(tile_size=7).compute_consensus_rankings(dataset, self.scoring_scheme_pseudo)
+        self.assertEqual(consensus.consensus_rankings, consensus_tiled.consensus_rankings)
+        self.assertEqual(consensus.features[ConsensusFeature.COPELAND_VICTORIES],
+                         consensus_tiled.features[ConsensusFeature.COPELAND_VICTORIES])
+
+    def test_sparse_cost_matrix(self):
+        dataset = Dataset.from_file(os.path.join(os.path.dirname(os.path.abspath(__file__)), "dataset_examples",
+                                                 "dataset_example_top_k"))
+        for scoring_scheme in (self.scoring_scheme_unifying, self.scoring_scheme_induced, self.scoring_scheme_pseudo):
+            consensus = self.my_alg.compute_consensus_rankings(dataset, scoring_scheme)
+            consensus_sparse = CopelandMethod(sparse=True).compute_consensus_rankings(dataset, scoring_scheme)
+            self.assertEqual(consensus.consensus_rankings, consensus_sparse.consensus_rankings)
+            self.assertEqual(consensus.features[ConsensusFeature.COPELAND_VICTORIES],
+                             consensus_sparse.features[ConsensusFeature.COPELAND_VICTORIES])
+        with self.assertRaises(ValueError):
+            CopelandMethod(tile_size=7, sparse=True)
+
+    def test_sparse_cost_matrix_without_co_ranked_elements(self):
+        dataset = Dataset.from_raw_list([[{1}], [{2}], [{3}]])
+        consensus = self.my_alg.compute_consensus_rankings(dataset, self.scoring_scheme_pseudo)
+        consensus_sparse = CopelandMethod(sparse=True).compute_consensus_rankings(dataset, self.scoring_scheme_pseudo)
+        self.assertEqual(consensus.consensus_rankings, consensus_sparse.consensus_rankings)
+        self.assertEqual(consensus.features[ConsensusFeature.COPELAND_VICTORIES],
+                         consensus_sparse.features[ConsensusFeature.COPELAND_VICTORIES])
+
 
 if __name__ == '__main__':
     unittest.main()
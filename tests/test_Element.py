@@ -1,4 +1,7 @@
 import unittest
+import copy
+import gc
+import pickle
 from corankco.element import Element
 
 
@@ -21,6 +24,24 @@ class TestElement(unittest.TestCase):
         elem2 = Element(1)
         self.assertEqual(elem1, elem2)
 
+    def test_interning(self):
+        self.assertIs(Element(1), Element(1))
+        self.assertIs(Element('A'), Element('A'))
+        self.assertIs(Element(Element(1)), Element(1))
+        self.assertIsNot(Element(1), Element('1'))
+        elem = Element('B')
+        self.assertIs(copy.deepcopy(elem), elem)
+        self.assertIs(pickle.loads(pickle.dumps(elem)), elem)
+        with self.assertRaises(AttributeError):
+            elem.other_attribute = 1
+
+    def test_interning_does_not_keep_unused_elements(self):
+        elem = Element('element only referenced by this test')
+        self.assertIs(Element('element only referenced by this test'), elem)
+        del elem
+        gc.collect()
+        self.assertNotIn((str, 'element only referenced by this test'), Element._pool)
+
     def test_not_equal(self):
         elem1 = Element(1)
         elem2 = Element(2)
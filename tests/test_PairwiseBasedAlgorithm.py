@@ -0,0 +1,269 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from corankco.dataset import Dataset
+from corankco.scoringscheme import ScoringScheme
+from corankco.ranking import Ranking
+from corankco.kemeny_score_computation import KemenyComputingFactory
+from corankco.algorithms.pairwisebasedalgorithm import PairwiseBasedAlgorithm, TiledCostMatrix, \
+    PartialPairwiseMatrix, SparseCostMatrix, PairwiseMatrixCache, _pairwise_cost_matrix_only, \
+    _pairwise_cost_matrix_parallel, GENERIC_RANKINGS, COMPLETE_RANKINGS, COMPLETE_RANKINGS_WITHOUT_TIES
+from corankco.partitioning.ordered_partition import OrderedPartition
+
+
+class TestPairwiseBasedAlgorithm(unittest.TestCase):
+
+    def setUp(self):
+        self.dataset = Dataset.get_random_dataset_markov(40, 15, 200)
+        self.weights = np.random.default_rng(0).random(self.dataset.nb_rankings)
+        self.scoring_scheme = ScoringScheme.get_pseudodistance_scoring_scheme_p(0.7)
+
+    def test_pairwise_cost_matrix(self):
+        positions = Dataset.from_raw_list([[{1}, {2, 3}], [{3}, {1}]]).get_positions()
+        matrix = PairwiseBasedAlgorithm.pairwise_cost_matrix(positions, ScoringScheme.get_unifying_scoring_scheme())
+        # element 1 vs element 3: one ranking 1 before 3, one ranking 3 before 1
+        self.assertTrue(np.array_equal(matrix[0][2], [1., 1., 2.]))
+        self.assertTrue(np.array_equal(matrix[2][0], [1., 1., 2.]))
+        # element 2 vs element 3: tied in the first ranking, only 3 is ranked in the second one
+        self.assertTrue(np.array_equal(matrix[1][2], [2., 1., 1.]))
+        self.assertTrue(np.array_equal(matrix[2][1], [1., 2., 1.]))
+
+    def test_parallel_pairwise_cost_matrix(self):
+        penalties = np.asarray(self.scoring_scheme.penalty_vectors)
+        for nb_elements in (0, 1, 2, 3, self.dataset.nb_elements):
+            positions = np.ascontiguousarray(self.dataset.get_positions()[:nb_elements])
+            args = (positions, penalties, self.weights, nb_elements, self.dataset.nb_rankings, GENERIC_RANKINGS)
+            self.assertTrue(np.array_equal(_pairwise_cost_matrix_parallel(*args), _pairwise_cost_matrix_only(*args)))
+        self.assertTrue(np.array_equal(
+            PairwiseBasedAlgorithm.pairwise_cost_matrix(self.dataset.get_positions(), self.scoring_scheme,
+                                                        self.weights, nb_threads=1),
+            _pairwise_cost_matrix_only(self.dataset.get_positions(), penalties, self.weights,
+                                       self.dataset.nb_elements, self.dataset.nb_rankings, GENERIC_RANKINGS)))
+
+    def test_kinds_of_rankings(self):
+        penalties = np.asarray(self.scoring_scheme.penalty_vectors)
+        permutations = Dataset.get_uniform_permutation_dataset(30, 20)
+        complete = Dataset.get_random_dataset_markov(30, 20, 100, complete=True)
+        incomplete = Dataset.from_raw_list([[{1}, {2, 3}], [{3}, {1}]])
+        self.assertEqual(PairwiseBasedAlgorithm.kind_of_rankings(permutations.get_positions()),
+                         COMPLETE_RANKINGS_WITHOUT_TIES)
+        self.assertEqual(PairwiseBasedAlgorithm.kind_of_rankings(incomplete.get_positions()), GENERIC_RANKINGS)
+        self.assertEqual(PairwiseBasedAlgorithm.kind_of_rankings(Dataset.from_raw_list(
+            [[{1}, {2, 3}], [{3}, {1, 2}]]).get_positions()), COMPLETE_RANKINGS)
+        for dataset in (permutations, complete):
+            positions = dataset.get_positions()
+            kind = PairwiseBasedAlgorithm.kind_of_rankings(positions)
+            weights = np.random.default_rng(1).random(dataset.nb_rankings)
+            generic = _pairwise_cost_matrix_only(positions, penalties, weights, dataset.nb_elements,
+                                                 dataset.nb_rankings, GENERIC_RANKINGS)
+            # the specialised kernels sum the costs in the same order as the generic one
+            for kernel in (_pairwise_cost_matrix_only, _pairwise_cost_matrix_parallel):
+                self.assertTrue(np.array_equal(kernel(positions, penalties, weights, dataset.nb_elements,
+                                                      dataset.nb_rankings, kind), generic))
+            packed = PairwiseBasedAlgorithm.pairwise_cost_matrix_packed(positions, self.scoring_scheme, weights)
+            self.assertTrue(np.array_equal(packed, PairwiseBasedAlgorithm.pack_cost_matrix(generic)))
+            with TiledCostMatrix.compute(positions, self.scoring_scheme, weights, tile_size=50) as tiled:
+                self.assertTrue(np.array_equal(tiled.to_packed(), packed))
+
+    def test_situation_counts(self):
+        positions = Dataset.from_raw_list([[{1}, {2, 3}], [{3}, {1}], [{4}]]).get_positions()
+        counts = PairwiseBasedAlgorithm.pairwise_situation_counts(positions)
+        self.assertEqual(counts[0][2].tolist(), [1., 1., 0., 0., 0., 1.])
+        self.assertEqual(counts[1][2].tolist(), [0., 0., 1., 0., 1., 1.])
+        self.assertEqual(counts[2][1].tolist(), [0., 0., 1., 1., 0., 1.])
+        self.assertTrue(np.array_equal(counts.sum(axis=2) + 3 * np.eye(4), np.full((4, 4), 3.)))
+
+        counts = PairwiseBasedAlgorithm.pairwise_situation_counts(self.dataset.get_positions(), self.weights)
+        for scoring_scheme in (self.scoring_scheme, ScoringScheme.get_unifying_scoring_scheme_p(0.3),
+                               ScoringScheme.get_induced_measure_scoring_scheme()):
+            self.assertTrue(np.allclose(
+                PairwiseBasedAlgorithm.cost_matrix_from_situation_counts(counts, scoring_scheme),
+                PairwiseBasedAlgorithm.pairwise_cost_matrix(self.dataset.get_positions(), scoring_scheme,
+                                                            self.weights)))
+
+    def test_packed_cost_matrix(self):
+        positions = self.dataset.get_positions()
+        dense = PairwiseBasedAlgorithm.pairwise_cost_matrix(positions, self.scoring_scheme, self.weights)
+        packed = PairwiseBasedAlgorithm.pairwise_cost_matrix_packed(positions, self.scoring_scheme, self.weights)
+        nb_elements = self.dataset.nb_elements
+        self.assertEqual(packed.shape, (nb_elements * (nb_elements - 1) // 2, 3))
+        self.assertEqual(PairwiseBasedAlgorithm.nb_elements_of_cost_matrix(packed), nb_elements)
+        self.assertTrue(np.array_equal(packed, PairwiseBasedAlgorithm.pack_cost_matrix(dense)))
+        self.assertTrue(np.array_equal(PairwiseBasedAlgorithm.unpack_cost_matrix(packed), dense))
+        for elem1, elem2 in ((0, 1), (3, 17), (17, 3), (nb_elements - 1, 0)):
+            self.assertTrue(np.array_equal(PairwiseBasedAlgorithm.costs_of_pair(packed, elem1, elem2),
+                                           dense[elem1][elem2]))
+        self.assertTrue(np.allclose(
+            PairwiseBasedAlgorithm.pairwise_cost_matrix_packed(positions, self.scoring_scheme, self.weights,
+                                                               np.float32), packed))
+
+        graph_dense, _, arcs_dense = PairwiseBasedAlgorithm.graph_of_elements_with_robust_arcs(
+            positions, self.scoring_scheme)
+        graph_packed, _, arcs_packed = PairwiseBasedAlgorithm.graph_of_elements_with_robust_arcs(
+            positions, self.scoring_scheme, packed=True)
+        self.assertEqual(graph_dense.get_edgelist(), graph_packed.get_edgelist())
+        self.assertEqual(arcs_dense, arcs_packed)
+
+        unifying = ScoringScheme.get_unifying_scoring_scheme()
+        self.assertTrue(np.array_equal(
+            PairwiseBasedAlgorithm.pairwise_cost_matrix_packed(positions, unifying, dtype=np.int32),
+            PairwiseBasedAlgorithm.pairwise_cost_matrix_packed(positions, unifying)))
+        with self.assertRaises(ValueError):
+            PairwiseBasedAlgorithm.pairwise_cost_matrix_packed(positions, self.scoring_scheme, self.weights,
+                                                               np.int32)
+
+    def test_tiled_cost_matrix(self):
+        positions = self.dataset.get_positions()
+        packed = PairwiseBasedAlgorithm.pairwise_cost_matrix_packed(positions, self.scoring_scheme, self.weights)
+        graph, _ = PairwiseBasedAlgorithm.graph_of_elements(positions, self.scoring_scheme, self.weights)
+        for tile_size in (1, 13, packed.shape[0] + 1):
+            with TiledCostMatrix.compute(positions, self.scoring_scheme, self.weights, tile_size=tile_size) as tiled:
+                self.assertEqual(tiled.nb_tiles, -(-packed.shape[0] // tile_size))
+                self.assertTrue(np.array_equal(tiled.to_packed(), packed))
+                self.assertTrue(np.array_equal(tiled.costs_of_pair(5, 2), packed[PairwiseBasedAlgorithm.packed_index(
+                    2, 5, self.dataset.nb_elements)][[1, 0, 2]]))
+                self.assertEqual(sorted(tiled.graph_of_elements().get_edgelist()), sorted(graph.get_edgelist()))
+                components = tiled.components()
+                self.assertEqual(sorted(components), sorted(sorted(scc) for scc in graph.components()))
+                # topological order: no arc from a component to a previous one
+                id_component = {elem: i for i, component in enumerate(components) for elem in component}
+                self.assertTrue(all(id_component[elem1] <= id_component[elem2]
+                                    for elem1, elem2 in graph.get_edgelist()))
+                path = tiled.path
+        self.assertFalse(os.path.exists(path))
+
+        partition = OrderedPartition.parcons_partition(self.dataset, self.scoring_scheme, tile_size=100).partition
+        self.assertEqual(set(map(frozenset, partition)),
+                         set(map(frozenset, OrderedPartition.parcons_partition(self.dataset,
+                                                                               self.scoring_scheme).partition)))
+
+    def test_partial_pairwise_matrix(self):
+        positions = self.dataset.get_positions()
+        cost_matrix = PairwiseBasedAlgorithm.pairwise_cost_matrix(positions, self.scoring_scheme, self.weights)
+        self.assertTrue(np.allclose(PairwiseBasedAlgorithm.pairwise_cost_matrix(
+            positions, self.scoring_scheme, self.weights, nb_processes=2), cost_matrix))
+        counts = PartialPairwiseMatrix.compute(positions, self.weights, nb_shards=4)
+        self.assertEqual(counts.nb_rankings, self.dataset.nb_rankings)
+        self.assertTrue(np.allclose(counts.cost_matrix(self.scoring_scheme), cost_matrix))
+        with self.assertRaises(ValueError):
+            counts.cost_matrix()
+
+        with tempfile.TemporaryDirectory() as directory:
+            # partial matrices of two runs, combined after a round trip on disk
+            path = os.path.join(directory, "shard.bin")
+            PartialPairwiseMatrix.compute(positions[:, :80], self.weights[:80], self.scoring_scheme).save(path)
+            combined = PartialPairwiseMatrix.combine([
+                PartialPairwiseMatrix.load(path),
+                PartialPairwiseMatrix.compute(positions[:, 80:], self.weights[80:], self.scoring_scheme)])
+            self.assertTrue(np.allclose(combined.cost_matrix(self.scoring_scheme), cost_matrix))
+            with self.assertRaises(ValueError):
+                combined + counts
+
+            cache_path = os.path.join(directory, "cache.bin")
+            computed = PartialPairwiseMatrix.compute(positions, self.weights, nb_shards=3, cache_path=cache_path)
+            cached = PartialPairwiseMatrix.compute(positions, self.weights, nb_shards=3, cache_path=cache_path)
+            self.assertIsInstance(cached.matrix, np.memmap)
+            self.assertTrue(np.array_equal(cached.matrix, computed.matrix))
+            # other weights: the cache is not used
+            self.assertFalse(np.array_equal(PartialPairwiseMatrix.compute(positions, cache_path=cache_path).matrix,
+                                            computed.matrix))
+
+    def test_sparse_cost_matrix(self):
+        positions = self.dataset.get_positions()
+        packed = PairwiseBasedAlgorithm.pairwise_cost_matrix_packed(positions, self.scoring_scheme, self.weights)
+        sparse = SparseCostMatrix.compute(positions, self.scoring_scheme, self.weights)
+        self.assertTrue(np.allclose(sparse.to_packed(), packed))
+        self.assertTrue(np.allclose(sparse.costs_of_pair(7, 3), PairwiseBasedAlgorithm.costs_of_pair(packed, 7, 3)))
+        self.assertTrue(np.allclose(sparse.costs_of_element(3)[7], PairwiseBasedAlgorithm.costs_of_pair(packed, 3, 7)))
+
+        # top-k rankings: only the pairs ranked together have corrections
+        dataset = Dataset.from_file(os.path.join(os.path.dirname(os.path.abspath(__file__)), "dataset_examples",
+                                                 "dataset_example_top_k"))
+        positions = dataset.get_positions()
+        sparse = SparseCostMatrix.compute(positions, self.scoring_scheme)
+        self.assertEqual(sparse.nb_co_ranked_pairs, 9)
+        self.assertTrue(np.allclose(sparse.to_packed(), PairwiseBasedAlgorithm.pairwise_cost_matrix_packed(
+            positions, self.scoring_scheme)))
+        graph, _ = PairwiseBasedAlgorithm.graph_of_elements(positions, self.scoring_scheme)
+        self.assertEqual(sparse.graph_of_elements().get_edgelist(), graph.get_edgelist())
+        self.assertEqual(sorted(sparse.components()), sorted(sorted(scc) for scc in graph.components()))
+
+    def test_components_of_graph_of_elements(self):
+        datasets = [self.dataset, Dataset.get_random_dataset_markov(60, 4, 30), Dataset.get_uniform_permutation_dataset(
+            70, 5), Dataset.from_raw_list([[{1}, {2, 3}], [{3}, {1}]])]
+        for dataset in datasets:
+            packed = PairwiseBasedAlgorithm.pairwise_cost_matrix_packed(dataset.get_positions(), self.scoring_scheme)
+            components = PairwiseBasedAlgorithm.components_of_graph_of_elements(packed)
+            self.assertEqual(PairwiseBasedAlgorithm.components_of_graph_of_elements(
+                PairwiseBasedAlgorithm.unpack_cost_matrix(packed)), components)
+            graph, _ = PairwiseBasedAlgorithm.graph_of_elements(dataset.get_positions(), self.scoring_scheme)
+            self.assertEqual(sorted(components), sorted(sorted(scc) for scc in graph.components()))
+            # topological order: no arc goes back to a previous component
+            component_of = {elem: id_component for id_component, component in enumerate(components)
+                            for elem in component}
+            for elem1, elem2 in graph.get_edgelist():
+                self.assertLessEqual(component_of[elem1], component_of[elem2])
+
+    def test_kemeny_score_from_cost_matrix(self):
+        kemeny = KemenyComputingFactory(self.scoring_scheme)
+        positions = self.dataset.get_positions()
+        packed = PairwiseBasedAlgorithm.pairwise_cost_matrix_packed(positions, self.scoring_scheme,
+                                                                    self.dataset.weights)
+        for ranking in Ranking.generate_rankings(self.dataset.nb_elements, 20, 10, complete=True):
+            buckets = KemenyComputingFactory.consensus_buckets(ranking, self.dataset)[0]
+            expected = kemeny.get_kemeny_score_of_buckets(buckets, self.dataset)
+            self.assertAlmostEqual(PairwiseBasedAlgorithm.kemeny_score_of_buckets(packed, buckets), expected)
+            self.assertAlmostEqual(PairwiseBasedAlgorithm.kemeny_score_of_buckets(
+                PairwiseBasedAlgorithm.unpack_cost_matrix(packed), buckets), expected)
+            self.assertAlmostEqual(PairwiseBasedAlgorithm.kemeny_score_from_cost_matrix(packed, ranking, self.dataset),
+                                   expected)
+            with TiledCostMatrix.compute(positions, self.scoring_scheme, self.dataset.weights, tile_size=7) as tiled:
+                self.assertAlmostEqual(tiled.kemeny_score_of_buckets(buckets), expected)
+
+    def test_matrix_cache(self):
+        positions = self.dataset.get_positions()
+        other_scoring_scheme = ScoringScheme.get_unifying_scoring_scheme()
+        expected = PairwiseBasedAlgorithm.pairwise_cost_matrix_packed(positions, self.scoring_scheme, self.weights)
+        with tempfile.TemporaryDirectory() as directory:
+            # room for a single packed matrix in memory
+            cache = PairwiseMatrixCache(max_bytes=expected.nbytes, directory=directory)
+            previous = PairwiseBasedAlgorithm.set_matrix_cache(cache)
+            try:
+                packed = PairwiseBasedAlgorithm.pairwise_cost_matrix_packed(positions, self.scoring_scheme,
+                                                                            self.weights)
+                self.assertTrue(np.array_equal(packed, expected))
+                # the shared matrices are read-only
+                with self.assertRaises(ValueError):
+                    packed[0][0] = 0.
+                # the integer type of the positions does not change the key
+                self.assertIs(PairwiseBasedAlgorithm.graph_of_elements(positions.astype(np.int32), self.scoring_scheme,
+                                                                       self.weights, packed=True)[1], packed)
+                PairwiseBasedAlgorithm.pairwise_cost_matrix_packed(positions, other_scoring_scheme, self.weights)
+                self.assertEqual(cache.statistics(), {"hits": 1, "disk_hits": 0, "misses": 2, "evictions": 1,
+                                                      "nb_matrices": 1, "nb_bytes": expected.nbytes})
+
+                # evicted from memory, read back from disk
+                packed = PairwiseBasedAlgorithm.pairwise_cost_matrix_packed(positions, self.scoring_scheme,
+                                                                            self.weights)
+                self.assertTrue(np.array_equal(packed, expected))
+                self.assertEqual(cache.statistics()["disk_hits"], 1)
+                with self.assertRaises(ValueError):
+                    packed[0][0] = 0.
+                # the forms and the types of the matrices are distinct entries
+                self.assertEqual(PairwiseBasedAlgorithm.pairwise_cost_matrix(positions, self.scoring_scheme,
+                                                                             self.weights).shape, (40, 40, 3))
+                self.assertEqual(PairwiseBasedAlgorithm.pairwise_cost_matrix_packed(
+                    positions, self.scoring_scheme, self.weights, dtype=np.float32).dtype, np.float32)
+                self.assertEqual(cache.statistics()["misses"], 4)
+
+                cache.clear(on_disk=True)
+                self.assertEqual(len(cache), 0)
+                self.assertEqual(os.listdir(directory), [])
+            finally:
+                PairwiseBasedAlgorithm.set_matrix_cache(previous)
+        self.assertIsNone(PairwiseBasedAlgorithm.matrix_cache())
+
+
+if __name__ == '__main__':
+    unittest.main()
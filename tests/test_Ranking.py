@@ -1,4 +1,5 @@
 from typing import List, Set
+import numpy as np
 from corankco.element import Element
 from corankco.ranking import Ranking
 import unittest
@@ -12,7 +13,7 @@ class TestRanking(unittest.TestCase):
         # Test with disjoint sets
         buckets: List[Set[Element]] = [{Element('A'), Element('B')}, {Element('C')}]
         ranking = Ranking(buckets)
-        self.assertEqual(ranking._buckets, buckets)
+        self.assertEqual(ranking.buckets, buckets)
         self.assertEqual(ranking.positions, {Element('A'): 1, Element('B'): 1, Element('C'): 3})
 
         # Test with overlapping sets
@@ -26,7 +27,7 @@ class TestRanking(unittest.TestCase):
         # Test with disjoint sets
         buckets: List[Set[str]] = [{'A', 'B'}, {'C'}]
         ranking = Ranking(buckets)
-        self.assertEqual(ranking._buckets, [{Element('A'), Element('B')}, {Element('C')}])
+        self.assertEqual(ranking.buckets, [{Element('A'), Element('B')}, {Element('C')}])
         self.assertEqual(ranking.positions, {Element('A'): 1, Element('B'): 1, Element('C'): 3})
 
         # Test with overlapping sets
@@ -40,7 +41,7 @@ class TestRanking(unittest.TestCase):
         # Test with disjoint sets
         buckets: List[Set[int]] = [{1, 2}, {3}]
         ranking = Ranking(buckets)
-        self.assertEqual(ranking._buckets, [{1, 2}, {3}])
+        self.assertEqual(ranking.buckets, [{1, 2}, {3}])
         self.assertEqual(ranking.positions, {1: 1, 2: 1, 3: 3})
 
         # Test with overlapping sets
@@ -91,6 +92,21 @@ class TestRanking(unittest.TestCase):
         assert ranking[1] == bucket2
         assert ranking[2] == bucket3
 
+    def test_arrays(self):
+        ranking = Ranking([{3, 1}, {2}, {5, 4, 6}])
+        self.assertTrue(ranking.is_of_int)
+        self.assertEqual(ranking.bucket_offsets.tolist(), [0, 2, 3, 6])
+        self.assertEqual(sorted(ranking.elements_array[:2].tolist()), [1, 3])
+        same_ranking = Ranking.from_arrays(np.asarray([1, 3, 2, 6, 5, 4]), np.asarray([0, 2, 3, 6]))
+        self.assertEqual(ranking, same_ranking)
+        self.assertNotEqual(ranking, Ranking.from_arrays(np.asarray([1, 2, 3, 6, 5, 4]), np.asarray([0, 2, 3, 6])))
+        self.assertEqual(same_ranking.buckets, [{1, 3}, {2}, {4, 5, 6}])
+        self.assertEqual(same_ranking.positions[Element(5)], 4)
+        self.assertFalse(self.ranking.is_of_int)
+        self.assertEqual(self.ranking.elements_array.dtype, object)
+        with self.assertRaises(ValueError):
+            Ranking.from_arrays(np.asarray([1, 2, 1]), np.asarray([0, 2, 3]))
+
 
 # To run the tests:
 if __name__ == '__main__':
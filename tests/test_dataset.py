@@ -1,8 +1,15 @@
 import unittest
+import tempfile
+from unittest import mock
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 from corankco.ranking import Ranking
-from corankco.dataset import Dataset
+from corankco.dataset import Dataset, DatasetSelector, EmptyDatasetException
 from corankco.element import Element
 import os
+from corankco.utils import positions_dtype
+from corankco.scoringscheme import ScoringScheme
+from corankco.algorithms.pairwisebasedalgorithm import PairwiseBasedAlgorithm
 
 
 class TestDataset(unittest.TestCase):
@@ -18,6 +25,15 @@ class TestDataset(unittest.TestCase):
         self.assertEqual(self.dataset_1.name, "None")
         self.assertEqual(self.dataset_2.nb_elements, 4)
 
+    def test_init_edge_cases(self):
+        for rankings in ([Ranking([])], [Ranking([]), Ranking([])]):
+            with self.assertRaises(EmptyDatasetException):
+                Dataset(rankings)
+        # integers beyond 64 bits are kept as Elements
+        dataset = Dataset.from_raw_list([[{2 ** 70}, {1}], [{'1'}, {'3'}]])
+        self.assertEqual(dataset.universe, {Element(2 ** 70), Element(1), Element(3)})
+        self.assertEqual(dataset.get_positions().tolist(), [[0, -1], [1, 0], [-1, 1]])
+
     def test_from_file(self):
         # Test from_file method with a test file
         # Get the directory of the current script
@@ -29,6 +45,80 @@ class TestDataset(unittest.TestCase):
         self.assertEqual(len(dataset.rankings), 3)
         # Add other assertions based on the expected content of the file
 
+    def test_from_file_formats(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "rankings")
+            with open(path, "w", encoding="utf-8") as file:
+                file.write("% comment\nr1: [{1}, {2, 03}]\n\n[[3], [1 , \\\n 4]]\n")
+            dataset = Dataset.from_file(path)
+            self.assertEqual(dataset, Dataset.from_raw_list([[{1}, {2, 3}], [{3}, {1, 4}]]))
+            self.assertEqual(dataset.name, "rankings")
+            self.assertTrue(all(element.type is int for element in dataset.universe))
+
+            with open(path, "w", encoding="utf-8") as file:
+                file.write("[{1}, {B}]\n[{B}, {2}, {1}]\n")
+            self.assertEqual(Dataset.from_file(path), Dataset.from_raw_list([[{'1'}, {'B'}], [{'B'}, {'2'}, {'1'}]]))
+
+            for wrong_ranking in ["[{1}, {2}] x", "[{1}, {}]", "[{1}, {2}, {1}]"]:
+                with open(path, "w", encoding="utf-8") as file:
+                    file.write(wrong_ranking)
+                with self.assertRaises(ValueError):
+                    Dataset.from_file(path)
+
+    def test_binary(self):
+        datasets = [Dataset.from_raw_list([[{1}, {2, 3}], [{3}, {1, 4}]]),
+                    Dataset.from_raw_list([[{'a'}, {'é', 'c'}], [{'c'}, {'a'}], [{'c'}, {'a'}]]).compressed()]
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "dataset.bin")
+            for dataset in datasets:
+                dataset.save_binary(path)
+                for mmap in (True, False):
+                    opened = Dataset.open_binary(path, mmap)
+                    self.assertEqual(opened, dataset)
+                    self.assertEqual(opened.universe, dataset.universe)
+                    self.assertEqual(opened.is_complete, dataset.is_complete)
+                    self.assertEqual(opened.without_ties, dataset.without_ties)
+                    self.assertTrue(np.array_equal(opened.weights, dataset.weights))
+                    self.assertTrue(np.array_equal(opened.get_positions(), dataset.get_positions()))
+            self.assertTrue(np.array_equal(Dataset.open_binary(path).compression_mapping, [0, 1, 1]))
+            with open(path, "w", encoding="utf-8") as file:
+                file.write("[{1}, {2}]\n")
+            with self.assertRaises(ValueError):
+                Dataset.open_binary(path)
+
+    def test_datasets_from_folder(self):
+        datasets = [Dataset.from_raw_list([[{1}, {2, 3}], [{3}, {1, 4}]]),
+                    Dataset.from_raw_list([[{'a'}, {'b'}], [{'b'}, {'a'}], [{'a'}]]),
+                    Dataset.from_raw_list([[{1}, {2}, {3}, {4}, {5}]])]
+        with tempfile.TemporaryDirectory() as folder:
+            datasets[0].write(os.path.join(folder, "d0"))
+            datasets[1].save_binary(os.path.join(folder, "d1"))
+            datasets[2].write(os.path.join(folder, "d2"))
+            self.assertEqual(Dataset.get_datasets_from_folder(folder), datasets)
+            self.assertEqual([dataset.name for dataset in Dataset.iter_datasets_from_folder(folder)],
+                             ["d0", "d1", "d2"])
+            self.assertEqual(list(Dataset.iter_datasets_from_folder(folder, nb_processes=2, prefetch=1)), datasets)
+            self.assertEqual(Dataset.get_datasets_from_folder(folder, DatasetSelector(nb_rankings_min=2)),
+                             datasets[:2])
+            self.assertEqual(Dataset.get_datasets_from_folder(folder, DatasetSelector(nb_elem_max=4)), datasets[:2])
+            self.assertEqual(Dataset.get_datasets_from_folder(folder, DatasetSelector(nb_elem_min=3)),
+                             [datasets[0], datasets[2]])
+            # only binary files are selected before being parsed, text files are selected by the worker processes
+            self.assertTrue(DatasetSelector(nb_elem_max=1).select_file(os.path.join(folder, "d0")))
+            self.assertFalse(DatasetSelector(nb_elem_max=1).select_file(os.path.join(folder, "d1")))
+            selector = DatasetSelector(nb_rankings_max=2)
+            self.assertEqual(Dataset.get_datasets_from_folder(folder, selector, nb_processes=2),
+                             [datasets[0], datasets[2]])
+
+    def test_datasets_from_folder_spawned_workers(self):
+        # forked workers could deadlock if numba threads are running in the main process, they must be spawned
+        dataset = Dataset.from_raw_list([[{1}, {2, 3}], [{3}, {1, 4}]])
+        with tempfile.TemporaryDirectory() as folder:
+            dataset.write(os.path.join(folder, "d0"))
+            with mock.patch("corankco.dataset.ProcessPoolExecutor", wraps=ProcessPoolExecutor) as pool:
+                self.assertEqual(list(Dataset.iter_datasets_from_folder(folder, nb_processes=2)), [dataset])
+            self.assertEqual(pool.call_args.kwargs["mp_context"].get_start_method(), "spawn")
+
     def test_from_raw_list(self):
         # Test from_raw_list method
         dataset = Dataset.from_raw_list([[{1}, {2, 3}, {4}], [{1, 2}, {3}, {4}]])
@@ -94,6 +184,14 @@ class TestDataset(unittest.TestCase):
         self.assertFalse(dataset.contains_element(0))
         self.assertFalse(dataset.contains_element(45))
 
+    def test_dataset_eq(self):
+        # 1 and 9 collide in a small set, so both buckets are iterated, and printed, in their order of insertion
+        dataset = Dataset.from_raw_list([[{1, 9}, {2}], [{2}, {1, 9}]])
+        self.assertEqual(dataset, Dataset.from_raw_list([[{2}, {9, 1}], [{9, 1}, {2}]]))
+        self.assertEqual(dataset, Dataset([Ranking([{9, 1}, {2}]), Ranking([{2}, {9, 1}])]))
+        self.assertEqual(Dataset.from_raw_list([[{1, 9}], [{9, 1}]]), Dataset([Ranking([{1, 9}])], weights=[2.]))
+        self.assertNotEqual(dataset, Dataset.from_raw_list([[{1, 9}, {2}], [{2}, {1}, {9}]]))
+
     def test_dataset_projection(self):
         ranking1 = Ranking([{1, 2, 3, 9}, {4, 5}])
         ranking2 = Ranking([{9, 5, 6}, {2}, {1}])
@@ -103,6 +201,151 @@ class TestDataset(unittest.TestCase):
         dataset3 = Dataset([Ranking([{1, 2}]), Ranking([{2}, {1}])])
         self.assertEqual(dataset2, dataset3)
 
+    def test_columnar_core(self):
+        dataset = Dataset.from_raw_list([[{1}, {2, 3}, {4}], [{3}, {1, 2}]])
+        self.assertIs(dataset.get_positions(), dataset.get_positions())
+        id_3 = dataset.mapping_elem_id[Element(3)]
+        id_4 = dataset.mapping_elem_id[Element(4)]
+        self.assertEqual(list(dataset.get_positions()[id_3]), [1, 0])
+        self.assertEqual(list(dataset.get_bucket_ids()[id_3]), [1, 0])
+        self.assertEqual(list(dataset.get_positions()[id_4]), [3, -1])
+        self.assertFalse(dataset.is_complete)
+        dataset.remove_elements({Element(4)})
+        self.assertEqual(dataset.get_positions().shape, (3, 2))
+        self.assertTrue(dataset.is_complete)
+        self.assertEqual(set(dataset.mapping_id_elem.values()), {Element(1), Element(2), Element(3)})
+
+    def test_ids_of_elements(self):
+        # integer and string datasets must both number the elements in order of first appearance
+        dataset_int = Dataset.from_raw_list([[{5}, {3}], [{1}, {3, 8}], [{5, 2}]])
+        dataset_str = Dataset.from_raw_list([[{'5'}, {'c'}], [{'a'}, {'c', '8'}], [{'5', 'b'}]])
+        self.assertEqual(list(dataset_int.mapping_id_elem.values()), [5, 3, 1, 8, 2])
+        self.assertEqual(list(dataset_str.mapping_id_elem.values()), ['5', 'c', 'a', '8', 'b'])
+        self.assertTrue(all(element.type is int for element in dataset_int.universe))
+        self.assertTrue(all(element.type is str for element in dataset_str.universe))
+        self.assertEqual(dataset_int.get_positions().tolist(), dataset_str.get_positions().tolist())
+
+    def test_weights_and_repetitions(self):
+        ranking1 = Ranking([{1}, {2, 3}, {4}])
+        ranking2 = Ranking([{4}, {1}, {3}])
+        dataset = Dataset([ranking1, ranking2], repetitions=[3, 2], weights=[1., 0.5])
+        self.assertEqual(list(dataset.weights), [3., 1.])
+        self.assertEqual(dataset, Dataset([ranking1] * 3 + [ranking2]))
+        self.assertEqual(list(Dataset([ranking1, ranking2]).weights), [1., 1.])
+        with self.assertRaises(ValueError):
+            Dataset([ranking1, ranking2], weights=[1.])
+        with self.assertRaises(ValueError):
+            Dataset([ranking1, ranking2], repetitions=[1, 0])
+        dataset.remove_elements({Element(1), Element(2), Element(3)})
+        self.assertEqual(list(dataset.weights), [3., 1.])
+        projection = Dataset([ranking1, ranking2], weights=[2., 1.]).sub_problem_from_elements({Element(2)})
+        self.assertEqual(list(projection.weights), [2.])
+
+    def test_compressed(self):
+        ranking1 = Ranking([{1}, {2, 3}, {4}])
+        ranking2 = Ranking([{4}, {1}, {3}])
+        dataset = Dataset([ranking1, ranking2, ranking1, ranking1, ranking2], weights=[1., 2., 1., 1., 1.])
+        first_occurrences, mapping = dataset.distinct_rankings()
+        self.assertEqual(list(first_occurrences), [0, 1])
+        self.assertEqual(list(mapping), [0, 1, 0, 0, 1])
+        compressed = dataset.compressed()
+        self.assertEqual(compressed.nb_rankings, 2)
+        self.assertEqual(list(compressed.weights), [3., 3.])
+        self.assertEqual(list(compressed.compression_mapping), [0, 1, 0, 0, 1])
+        self.assertEqual(compressed, dataset)
+        self.assertEqual(list(dataset.compression_mapping), [0, 1, 2, 3, 4])
+
+    def test_compression_mapping_after_removals(self):
+        compressed = Dataset.from_raw_list([[{1}, {2}], [], [{1}, {2}], [{3}], []]).compressed()
+        self.assertEqual(list(compressed.compression_mapping), [0, 1, 0, 2, 1])
+        compressed.remove_empty_rankings()
+        self.assertEqual(compressed.nb_rankings, 2)
+        self.assertEqual(list(compressed.compression_mapping), [0, -1, 0, 1, -1])
+        compressed.remove_elements({Element(3)})
+        self.assertEqual(list(compressed.compression_mapping), [0, -1, 0, -1, -1])
+
+    def test_from_bucket_matrix(self):
+        bucket_ids = np.asarray([[0, 1], [1, 0], [1, -1], [2, 2]], dtype=np.int8)
+        dataset = Dataset.from_bucket_matrix(bucket_ids, elements=['A', 'B', 'C', 'D'])
+        # the matrix is shared without copy, through a read-only view
+        self.assertTrue(np.shares_memory(dataset.get_compact_bucket_ids(), bucket_ids))
+        self.assertTrue(bucket_ids.flags.writeable)
+        self.assertEqual(dataset.get_positions().tolist(), [[0, 1], [1, 0], [1, -1], [3, 2]])
+        self.assertEqual(dataset, Dataset.from_raw_list([[{'A'}, {'B', 'C'}, {'D'}], [{'B'}, {'A'}, {'D'}]]))
+        self.assertFalse(dataset.is_complete)
+        self.assertFalse(dataset.without_ties)
+        matrix, labels = dataset.to_bucket_matrix()
+        self.assertTrue(np.shares_memory(matrix, bucket_ids))
+        self.assertEqual(Dataset.from_bucket_matrix(matrix, labels), dataset)
+
+        # gaps between bucket ids are removed, never ranked elements are ignored, labels are integers by default
+        dataset = Dataset.from_bucket_matrix(np.asarray([[4, 0], [9, -1], [-1, -1]]), weights=[2., 1.])
+        self.assertEqual(dataset.get_bucket_ids().tolist(), [[0, 0], [1, -1]])
+        self.assertEqual(dataset.rankings, [Ranking([{0}, {1}]), Ranking([{0}])])
+        self.assertEqual(dataset, Dataset([Ranking([{0}, {1}]), Ranking([{0}])], weights=[2., 1.]))
+
+        dataset = Dataset.from_position_matrix(np.asarray([[0, 2], [0, 0], [2, 1]]), elements=['3', '1', '2'])
+        self.assertEqual(dataset, Dataset.from_raw_list([[{3, 1}, {2}], [{1}, {2}, {3}]]))
+        with self.assertRaises(ValueError):
+            Dataset.from_bucket_matrix(np.asarray([[0], [1]]), elements=['A', 'A'])
+        with self.assertRaises(ValueError):
+            Dataset.from_bucket_matrix(np.asarray([[0.5], [1.]]))
+        for elements in ([2 ** 70, 3], np.asarray([2 ** 63, 3], dtype=np.uint64)):
+            self.assertEqual(Dataset.from_bucket_matrix(np.asarray([[0], [1]]), elements=elements),
+                             Dataset.from_raw_list([[{int(elements[0])}, {3}]]))
+
+    def test_positions_types(self):
+        self.assertEqual(positions_dtype(1), np.int8)
+        self.assertEqual(positions_dtype(128), np.int8)
+        self.assertEqual(positions_dtype(129), np.int16)
+        self.assertEqual(positions_dtype(100000), np.int32)
+        self.assertEqual(Dataset.from_raw_list([[{1}, {2}]]).get_compact_positions().dtype, np.int8)
+
+        # the shared matrices are read-only
+        dataset = Dataset.from_raw_list([[{1}, {2}]])
+        for matrix in (dataset.get_positions(), dataset.get_bucket_ids(), dataset.get_compact_positions(),
+                       dataset.get_compact_bucket_ids()):
+            self.assertFalse(matrix.flags.writeable)
+            with self.assertRaises(ValueError):
+                matrix[0][0] = 1
+
+        # the type of the positions depends on the number of elements, not on the matrix given by the user
+        rng = np.random.default_rng(1)
+        bucket_ids = np.asarray([rng.permutation(200) for _ in range(4)], dtype=np.int32).transpose()
+        bucket_ids[rng.integers(0, 200, 20), 2] = -1
+        dataset = Dataset.from_bucket_matrix(bucket_ids)
+        self.assertEqual(dataset.get_compact_positions().dtype, np.int16)
+        self.assertEqual(dataset.get_compact_bucket_ids().dtype, np.int16)
+        self.assertEqual(dataset, Dataset(dataset.rankings))
+
+        # the public matrices are int32 whatever the type of the stored ones, the arithmetic on them does not wrap
+        dataset = Dataset.from_raw_list([[{i} for i in range(128)]])
+        self.assertEqual(dataset.get_compact_positions().dtype, np.int8)
+        self.assertEqual(dataset.get_positions().dtype, np.int32)
+        self.assertEqual(dataset.get_bucket_ids().dtype, np.int32)
+        self.assertEqual(int((dataset.get_positions() + 1).max()), 128)
+        self.assertTrue(np.array_equal(dataset.get_positions(), dataset.get_compact_positions()))
+
+        # the kernels give the same results whatever the type of the positions
+        scoring_scheme = ScoringScheme.get_pseudodistance_scoring_scheme_p(0.5)
+        self.assertTrue(np.array_equal(
+            PairwiseBasedAlgorithm.pairwise_cost_matrix(dataset.get_compact_positions(), scoring_scheme),
+            PairwiseBasedAlgorithm.pairwise_cost_matrix(dataset.get_positions(), scoring_scheme)))
+
+    def test_from_scores(self):
+        scores = np.asarray([[0.01, np.nan, 0.3],
+                             [0.5, 0.2, 0.3],
+                             [0.011, 0.1, np.nan],
+                             [0.2, np.nan, 0.05]])
+        dataset = Dataset.from_scores(scores, elements=['A', 'B', 'C', 'D'])
+        self.assertEqual(dataset, Dataset.from_raw_list([[{'A'}, {'C'}, {'D'}, {'B'}],
+                                                         [{'C'}, {'B'}],
+                                                         [{'D'}, {'A', 'B'}]]))
+        dataset = Dataset.from_scores(scores, ascending=False, tie_tolerance=0.005)
+        self.assertEqual(dataset, Dataset.from_raw_list([[{1}, {3}, {0, 2}], [{1}, {2}], [{0, 1}, {3}]]))
+        with self.assertRaises(ValueError):
+            Dataset.from_scores(scores, tie_tolerance=-1.)
+
     def test_generation(self):
         dataset = Dataset.get_random_dataset_markov(10, 3, 50, True)
         self.assertEqual(dataset.nb_elements, 10)
@@ -1,8 +1,10 @@
 import unittest
+import numpy as np
 from corankco.scoringscheme import ScoringScheme
 from corankco.dataset import Dataset
 from corankco.ranking import Ranking
-from corankco.kemeny_score_computation import KemenyComputingFactory
+from corankco.kemeny_score_computation import KemenyComputingFactory, InvalidRankingsForComputingDistance, \
+    _situation_counts_of_rankings
 from random import seed
 
 
@@ -49,8 +51,89 @@ class TestKemenyComputation(unittest.TestCase):
             score_nsquare = TestKemenyComputation.naive_score_implementation(consensus, dataset_test, self._sc3)
             self.assertEqual(score_nlogn, score_nsquare)
 
+    def test_kemeny_score_weighted_dataset(self):
+        for i in range(20):
+            rankings = Ranking.generate_rankings(8, 3, 300, complete=False)
+            repetitions = list(range(1, len(rankings) + 1))
+            dataset_weighted = Dataset(rankings, repetitions=repetitions)
+            dataset_repeated = Dataset([ranking for ranking, nb_occurrences in zip(rankings, repetitions)
+                                        for _ in range(nb_occurrences)])
+            consensus = Ranking.generate_rankings(8, 1, 1000, complete=True)[0]
+            for kemeny in (self._kemeny1, self._kemeny2, self._kemeny3):
+                self.assertEqual(kemeny.get_kemeny_score(consensus, dataset_weighted),
+                                 kemeny.get_kemeny_score(consensus, dataset_repeated))
+
+    def test_kemeny_score_permutations(self):
+        for i in range(20):
+            permutations = Ranking.uniform_permutations(30, 6)
+            # consensus with ties: buckets of 1, 2, 3, 1, 2, 3... consecutive elements of a permutation
+            elements = list(Ranking.uniform_permutations(30, 1)[0])
+            consensus = Ranking([set().union(*elements[6 * j + start:6 * j + end])
+                                 for j in range(5) for start, end in ((0, 1), (1, 3), (3, 6))])
+            for dataset in (Dataset(permutations), Dataset(permutations, weights=[0.5, 1., 1.5, 2., 2.5, 3.])):
+                self.assertTrue(dataset.is_complete and dataset.without_ties)
+                for kemeny in (self._kemeny1, self._kemeny2):
+                    self.assertAlmostEqual(kemeny.get_kemeny_score(consensus, dataset),
+                                           TestKemenyComputation.naive_score_implementation(
+                                               consensus, dataset, kemeny.scoring_scheme, dataset.weights))
+
+    def test_kemeny_score_of_buckets(self):
+        dataset = Dataset.from_raw_list([[{1}, {2, 3}], [{3}, {1}, {4}], [{4, 2}]])
+        # element 5 is not in the dataset, non-ranked in all the rankings
+        consensus = Ranking([{1, 5}, {3}, {2, 4}])
+        consensus_buckets, absent_by_bucket = KemenyComputingFactory.consensus_buckets(consensus, dataset)
+        self.assertEqual([consensus_buckets[dataset.mapping_elem_id[elem]] for elem in (1, 2, 3, 4)], [0, 2, 1, 2])
+        self.assertEqual(absent_by_bucket.tolist(), [1, 0, 0])
+        for kemeny in (self._kemeny1, self._kemeny2, self._kemeny3):
+            self.assertEqual(kemeny.get_kemeny_score_of_buckets(consensus_buckets, dataset, absent_by_bucket),
+                             TestKemenyComputation.naive_score_implementation(consensus, dataset,
+                                                                              kemeny.scoring_scheme))
+        with self.assertRaises(InvalidRankingsForComputingDistance):
+            self._kemeny1.get_kemeny_score(Ranking([{1}, {2, 3}]), dataset)
+
+        # one count per pair of elements of the consensus and per ranking
+        counts = _situation_counts_of_rankings(dataset.get_positions(), consensus_buckets, absent_by_bucket)
+        self.assertEqual(counts.sum(axis=1).tolist(), [10, 10, 10])
+        # first ranking: (1, 3) and (1, 2) in the same order, (3, 2) tied, (1, 4) and (3, 4) only x ranked, (5, 3) and
+        # (5, 2) only y ranked, (5, 4) none ranked; tied in the consensus, (1, 5) and (2, 4) only one ranked
+        self.assertEqual(counts[0].tolist(), [2, 0, 1, 2, 2, 1, 0, 0, 0, 2, 0, 0])
+
+    def test_prepared_scores(self):
+        dataset = Dataset.get_random_dataset_markov(12, 6, 100)
+        candidates = np.asarray([KemenyComputingFactory.consensus_buckets(ranking, dataset)[0]
+                                 for ranking in Ranking.generate_rankings(12, 100, 50, complete=True)])
+        for kemeny in (self._kemeny1, self._kemeny2, self._kemeny3):
+            prepared = kemeny.prepare(dataset)
+            scores = prepared.scores(candidates)
+            for candidate, score in zip(candidates, scores):
+                self.assertAlmostEqual(score, kemeny.get_kemeny_score_of_buckets(candidate, dataset))
+            self.assertAlmostEqual(prepared.scores(candidates[0])[0], scores[0])
+            # with a bound, the best candidates keep their score, the other ones may be abandoned
+            pruned = prepared.scores(candidates, upper_bound=np.inf)
+            self.assertTrue(np.array_equal(pruned == scores.min(), scores == scores.min()))
+            self.assertTrue(np.all(np.logical_or(pruned == scores, pruned == np.inf)))
+            self.assertTrue(np.all(prepared.scores(candidates, upper_bound=scores.min() - 1.) == np.inf))
+        with self.assertRaises(InvalidRankingsForComputingDistance):
+            self._kemeny1.prepare(dataset).scores(np.full(dataset.nb_elements, -1))
+
+    def test_distances(self):
+        dataset = Dataset.get_random_dataset_markov(10, 5, 50)
+        unified = dataset.unified_rankings()
+        for kemeny, sc in ((self._kemeny1, self._sc1), (self._kemeny2, self._sc2), (self._kemeny3, self._sc3)):
+            consensus = unified[0]
+            distances = kemeny.get_kemeny_score_by_ranking(consensus, dataset)
+            self.assertEqual(distances.shape, (5, ))
+            self.assertAlmostEqual(distances @ dataset.weights, kemeny.get_kemeny_score(consensus, dataset))
+            matrix = kemeny.get_distance_matrix(dataset)
+            self.assertEqual(matrix.shape, (5, 5))
+            for j, ranking_j in enumerate(unified):
+                for i, ranking_i in enumerate(dataset.rankings):
+                    self.assertAlmostEqual(matrix[i][j], self.naive_score_implementation(
+                        ranking_j, Dataset([ranking_i]), sc))
+            self.assertTrue(np.allclose(matrix[:, 0], distances))
+
     @staticmethod
-    def naive_score_implementation(consensus: Ranking, dataset: Dataset, sc: ScoringScheme) -> float:
+    def naive_score_implementation(consensus: Ranking, dataset: Dataset, sc: ScoringScheme, weights=None) -> float:
         # the consensus ranking as target for the computation of the score
         r_cons: Ranking = consensus
         # its number of buckets
@@ -58,7 +141,7 @@ class TestKemenyComputation(unittest.TestCase):
         # score of the consensus
         score: float = 0.
 
-        for r_input in dataset:
+        for id_ranking, r_input in enumerate(dataset):
             # compute score associated to each ranking
             score_ri = 0.
             # pos_r_input[e] = position of e in ranking r_input
@@ -123,7 +206,7 @@ class TestKemenyComputation(unittest.TestCase):
                                 score_ri += sc.t_vector[2]
                             else:
                                 score_ri += sc.t_vector[0]
-            score += score_ri
+            score += score_ri if weights is None else weights[id_ranking] * score_ri
         return score
 
 